@@ -1,128 +1,525 @@
-from flask import Flask, request, jsonify, send_from_directory, url_for, flash, redirect
-from services.ai_service import AIService
+from flask import Flask, Response, request, jsonify, send_from_directory, url_for, flash, redirect, stream_with_context
+from services.batching import MicroBatcher
+from services.index_queue import IndexQueue
+from services.lazy import LazyService
+from services.uploads import RENDITIONS, UnsupportedImage, UploadStore, content_address, rendition_name
 from flask_cors import CORS
-from models import Session, Task, Priority, Category, Habit, HabitCompletion, BucketList
+from bulk import MAX_BATCH_ITEMS, MODES, apply_batch, count_items, succeeded
+from habit_stats import rebuild_habit_stats, record_completion, stats_snapshot, upsert_completion
+from models import Session, Task, Priority, Category, Habit, HabitCompletion, BucketList, BucketListStatus, engine, init_db, log_changes, pool_metrics
 from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+import metrics
+from profiling import ProfileSpool, RequestProfiler
+import search
+from serializers import TASK, BUCKET_LIST, HABIT, HABIT_COMPLETION, OrjsonProvider, dumps
+from sync import CHANGE_LOG_RETENTION_DAYS, changes_since, current_token, prune_change_log, pruned_through, table_versions
 from werkzeug.utils import secure_filename
+import click
+import mimetypes
 import os
+import threading
+import time
+import zlib
 
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+metrics.instrument_app(app)
+metrics.instrument_engine(engine)
+# Off unless PROFILE_TOKEN (sent back as an X-Profile header) or PROFILE_SAMPLE_RATE is set
+profiler = RequestProfiler(
+    ProfileSpool(os.environ.get('PROFILE_DIR', 'profiles'), int(os.environ.get('PROFILE_MAX_CAPTURES', 50))),
+    token=os.environ.get('PROFILE_TOKEN'),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    mode=os.environ.get('PROFILE_MODE', 'sample'),
+    interval=float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+)
+profiler.init_app(app)
+CORS_ORIGINS = ["http://localhost:8081", "http://127.0.0.1:5000", "http://192.168.1.7:8081"]
+CORS_EXPOSE_HEADERS = ["Content-Range", "X-Content-Range", "X-Next-Cursor", "ETag"]
 CORS(app, resources={
     r"/*": {
-        "origins": ["http://localhost:8081", "http://127.0.0.1:5000", "http://192.168.1.7:8081"],
+        "origins": CORS_ORIGINS,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
         "supports_credentials": True,
-        "expose_headers": ["Content-Range", "X-Content-Range"]
+        "expose_headers": CORS_EXPOSE_HEADERS
         }
     })
-ai_service = AIService()
 
+def load_ai_service():
+    # Imported here so the encoder stack (numpy, and torch when model weights
+    # are bundled) loads with the service rather than with the app
+    from services.ai_service import AIService
+    return AIService()
+
+# Built on first use; AI_SERVICE_WARMUP=1 builds it in the background at startup instead
+ai_service = LazyService(load_ai_service, name='ai-service')
+if os.environ.get('AI_SERVICE_WARMUP') == '1':
+    ai_service.warm_up()
+
+# Concurrent single suggestion requests can be coalesced into one scoring pass.
+# Off unless SUGGESTION_BATCH_WINDOW_MS is set, since the window delays every request.
+SUGGESTION_BATCH_WINDOW = float(os.environ.get('SUGGESTION_BATCH_WINDOW_MS', 0)) / 1000
+SUGGESTION_BATCH_TIMEOUT = float(os.environ.get('SUGGESTION_BATCH_TIMEOUT_S', 10))
+MAX_SUGGESTION_BATCH = 256
+MAX_SUGGESTION_TOP_K = 50
+similar_batcher = MicroBatcher(lambda texts: ai_service.find_similar_tasks_batch(texts), max_wait=SUGGESTION_BATCH_WINDOW,
+                               name='similar-tasks-batcher') if SUGGESTION_BATCH_WINDOW > 0 else None
+
+# Task writes reach the similar-task index from a background worker, so a
+# request never waits on index fsyncs or on loading the AI service
+TASK_INDEX_DELAY = float(os.environ.get('TASK_INDEX_DELAY_MS', 50)) / 1000
+task_indexer = IndexQueue(lambda rows: ai_service.index_tasks(rows), lambda ids: ai_service.remove_tasks(ids),
+                          max_wait=TASK_INDEX_DELAY, name='task-indexer')
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create any missing tables and search indexes."""
+    init_db()
+    print(f"Database schema is up to date at {engine.url.render_as_string(hide_password=True)}")
+
+@app.cli.command('index-tasks')
+def index_tasks_command():
+    """Sync the similar-task index with every task in the database."""
+    session = Session()
+    tasks = session.query(Task.id, Task.title, Task.description).yield_per(1000)
+    upserted, removed = ai_service.sync_tasks(tasks)
+    print(f"Indexed {upserted} task(s), removed {removed} stale entr{'y' if removed == 1 else 'ies'}")
+
+@app.cli.command('prune-change-log')
+@click.option('--days', type=float, default=CHANGE_LOG_RETENTION_DAYS, show_default=True,
+              help='keep changes this recent; older /sync tokens get a full resync')
+def prune_change_log_command(days):
+    """Delete change log rows older than the retention period."""
+    session = Session()
+    pruned = prune_change_log(session, datetime.utcnow() - timedelta(days=days))
+    Session.remove()
+    print(f"Pruned {pruned} change log row(s)")
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    # Return this request's connection to the pool and drop its identity map
+    Session.remove()
+
+def pool_stat(key):
+    return lambda: pool_metrics(engine).get(key)
+
+def suggestion_cache_stat(key):
+    # Nothing to report until the AI service has been built
+    return lambda: ai_service.suggestion_cache.stats()[key] if ai_service.loaded else None
+
+metrics.Gauge('db_pool_checked_out', 'Connections currently checked out.', function=pool_stat('checked_out'))
+metrics.Gauge('db_pool_overflow', 'Connections open beyond the pool size.', function=pool_stat('overflow'))
+metrics.Counter('db_pool_checkouts_total', 'Connection checkouts.', function=pool_stat('checkouts'))
+metrics.Counter('db_pool_timeouts_total', 'Checkouts that timed out waiting for a connection.',
+                function=pool_stat('timeouts'))
+metrics.Gauge('suggestion_cache_entries', 'Suggestion results held in memory.', function=suggestion_cache_stat('size'))
+metrics.Counter('suggestion_cache_hits_total', 'Suggestion cache hits.', function=suggestion_cache_stat('hits'))
+metrics.Counter('suggestion_cache_misses_total', 'Suggestion cache misses.', function=suggestion_cache_stat('misses'))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
-UPLOAD_FOLDER = 'uploads'
+@app.route('/metrics/pool', methods=['GET'])
+def get_pool_metrics():
+    return jsonify(pool_metrics(engine))
+
+@app.route('/metrics/suggestion-cache', methods=['GET'])
+def get_suggestion_cache_metrics():
+    return jsonify(ai_service.suggestion_cache.stats())
+
+
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+upload_store = UploadStore(UPLOAD_FOLDER, max_workers=int(os.environ.get('RENDITION_WORKERS', 2)))
+# Content-addressed files never change; anything else is revalidated hourly
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 3600
+# Hand file bodies to a front proxy: "nginx" sends X-Accel-Redirect to
+# UPLOAD_ACCEL_PREFIX/<file> (an internal location aliased to UPLOAD_FOLDER),
+# "x-sendfile" sends X-Sendfile with the file path (Apache, lighttpd)
+UPLOAD_ACCEL = os.environ.get('UPLOAD_ACCEL', '')
+UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads').rstrip('/')
+app.config['USE_X_SENDFILE'] = UPLOAD_ACCEL == 'x-sendfile'
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-# Rename the upload function to avoid conflicts
+
 @app.route('/upload', methods=['POST'])
-def handle_file_upload():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+def upload_file():
+    """Store an image, sent as the multipart field ``file`` or as the raw request body.
+
+    Files are named by the SHA-256 of their content, so re-uploading an
+    image returns the existing file. ``renditions`` holds URLs of smaller
+    WebP versions for list screens; they are generated in the background.
+    """
+    if request.mimetype.startswith('image/'):
+        stream = request.stream
+    else:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file part'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+        stream = file.stream
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        
-        # Ensure upload folder exists
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        # Save the file
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        # Return the file URL
-        file_url = url_for('serve_file', filename=filename, _external=True)
-        return jsonify({
-            'message': 'File uploaded successfully',
-            'filename': filename,
-            'url': file_url
-        })
+    try:
+        stored = upload_store.save(stream, max_size=MAX_CONTENT_LENGTH)
+    except UnsupportedImage as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'error': 'File type not allowed'}), 400
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'filename': stored['filename'],
+        'url': url_for('serve_file', filename=stored['filename'], _external=True),
+        'sha256': stored['digest'],
+        'size': stored['size'],
+        'duplicate': not stored['created'],
+        'renditions': {
+            name: url_for('serve_file', filename=rendition_name(stored['digest'], name), _external=True)
+            for name in RENDITIONS
+        }
+    })
 
 # Serve uploaded files
 @app.route('/uploads/<filename>')
 def serve_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Uploaded file with long-lived caching, ETag/Last-Modified revalidation and byte ranges.
+
+    send_file answers If-None-Match/If-Modified-Since with 304 and Range with
+    206, and hands the open file to the server's wsgi.file_wrapper, which
+    uses sendfile() under servers that support it (gunicorn, uWSGI).
+    """
+    # A rendition requested before the worker pool got to it is rendered now
+    upload_store.ensure(secure_filename(filename))
+    etag = content_address(filename)
+    if etag and UPLOAD_ACCEL == 'nginx' and os.path.isfile(upload_store.path(filename)):
+        return accel_redirect(filename, etag)
+
+    response = send_from_directory(app.config['UPLOAD_FOLDER'], filename,
+                                   etag=etag or True,
+                                   max_age=IMMUTABLE_MAX_AGE if etag else MUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    if etag:
+        response.cache_control.immutable = True
+    return response
+
+def accel_redirect(filename, etag):
+    # nginx serves the body (ranges included) from its internal location;
+    # revalidation is still answered here, without touching the file
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f'{UPLOAD_ACCEL_PREFIX}/{filename}'
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+def parse_fields(schema, args):
+    requested = args.get('fields')
+    if not requested:
+        return list(schema.fields)
+
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = sorted(names - set(schema.fields))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # Schema order, without repeats: one compiled serializer per field set
+    return [name for name in schema.fields if name in names]
+
+def parse_page_args(args):
+    limit = args.get('limit')
+    cursor = args.get('cursor')
+    try:
+        limit = int(limit) if limit is not None else None
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    # A cursor without a limit still pages, using the default page size
+    if cursor is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    return limit, cursor
+
+def list_etag(session, tables, query_string):
+    """Weak ETag for a listing: the tables' change log versions plus the query string."""
+    versions = '.'.join(str(version) for version in table_versions(session, tables))
+    return f"{versions}-{zlib.crc32(query_string):08x}"
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
+def page_query(session, schema, names, cursor):
+    # row[0] is always the primary key used as the keyset cursor
+    query = session.query(*schema.columns(names)).order_by(schema.model.id)
+    if cursor is not None:
+        query = query.filter(schema.model.id > cursor)
+    return query
+
+def fetch_page(session, schema, names, limit, cursor):
+    """``(rows, next_cursor)``; every row after ``cursor`` when ``limit`` is None."""
+    query = page_query(session, schema, names, cursor)
+    if limit is None:
+        return query.all(), None
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+def list_response(schema):
+    """Keyset-paginated, field-projected listing of a table.
+
+    Without ``limit``/``cursor`` the whole table is returned as before. With
+    them, one page is returned and ``X-Next-Cursor`` holds the cursor for the
+    next page. ``format=ndjson`` streams one JSON object per line instead.
+    Responses carry an ETag, and a matching ``If-None-Match`` gets a 304.
+    """
+    try:
+        names = parse_fields(schema, request.args)
+        limit, cursor = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    model = schema.model
+    serialize_row, serialize_rows = schema.serializer(names)
+    session = Session()
+    etag = list_etag(session, [model.__tablename__], request.query_string)
+    if request.if_none_match.contains_weak(etag):
+        session.close()
+        return not_modified(etag)
+
+    if request.args.get('format') == 'ndjson':
+        query = page_query(session, schema, names, cursor)
+        if limit is not None:
+            query = query.limit(limit)
+
+        def generate():
+            try:
+                for row in query.yield_per(STREAM_BATCH_SIZE):
+                    yield dumps(serialize_row(row)) + b'\n'
+            finally:
+                session.close()
+
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        response.set_etag(etag, weak=True)
+        return response
+
+    try:
+        rows, next_cursor = fetch_page(session, schema, names, limit, cursor)
+    finally:
+        session.close()
+
+    response = jsonify(serialize_rows(rows))
+    response.set_etag(etag, weak=True)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+def project_rows(session, schema, ids=None):
+    """All fields of the rows with ``ids`` (every row if None), ordered by id."""
+    names = list(schema.fields)
+    query = session.query(*schema.columns(names)).order_by(schema.model.id)
+    if ids is not None:
+        query = query.filter(schema.model.id.in_(ids))
+    return schema.serializer(names)[1](query)
+
+
+# Table name in the change log -> schema of the rows sent to clients
+SYNC_SOURCES = {
+    'tasks': TASK,
+    'bucket_lists': BUCKET_LIST,
+    'habits': HABIT,
+    'habit_completions': HABIT_COMPLETION
+}
+
+@app.route('/sync', methods=['GET'])
+def sync_changes():
+    """Rows changed since the client's ``since`` token; everything if no token.
+
+    Each table lists changed rows under ``upserts`` and ids of deleted rows
+    under ``tombstones``. Store the returned ``token`` and pass it back next
+    time; while ``more`` is true there are further changes to fetch. A
+    token older than the pruned part of the change log gets everything
+    again, with ``full`` set, and the client should replace its copy.
+    """
+    since = request.args.get('since')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({'error': 'since must be an integer token'}), 400
+
+    session = Session()
+    try:
+        payload = {table: {'upserts': [], 'tombstones': []} for table in SYNC_SOURCES}
+        full = since is None or since < pruned_through(session)
+        if full:
+            # Read the token first: rows changed meanwhile are simply sent again next time
+            token, more = current_token(session), False
+            for table, schema in SYNC_SOURCES.items():
+                payload[table]['upserts'] = project_rows(session, schema)
+        else:
+            token, more, changes = changes_since(session, since)
+            for table, (changed_ids, deleted_ids) in changes.items():
+                upserts = project_rows(session, SYNC_SOURCES[table], changed_ids) if changed_ids else []
+                found = {row['id'] for row in upserts}
+                payload[table] = {
+                    'upserts': upserts,
+                    # Rows deleted after this page of the log ends are gone already
+                    'tombstones': deleted_ids + [row_id for row_id in changed_ids if row_id not in found]
+                }
+    finally:
+        session.close()
+
+    return jsonify({'token': token, 'full': full, 'more': more, 'changes': payload})
 
 
 @app.route('/bucket-list', methods=['GET'])
 def get_bucket_list():
-    session = Session()
-    items = session.query(BucketList).all()
-    
-    return jsonify([{
-        'id': item.id,
-        'title': item.title,
-        'description': item.description,
-        'deadline': item.deadline.isoformat() if item.deadline else None,
-        'status': item.status.value,
-        'category': item.category.value,
-        'priority': item.priority.value,
-        'progress': item.progress,
-        'image_url': item.image_url,
-        'inspiration_images': item.inspiration_images,
-        'tags': item.tags,
-        'reward': item.reward,
-        'steps': item.steps,
-        'motivation': item.motivation,
-        'created_at': item.created_at.isoformat(),
-        'updated_at': item.updated_at.isoformat()
-    } for item in items])
+    return list_response(BUCKET_LIST)
+
+# Bucket-list stats are cached in-process until a bucket-list mutation
+# invalidates them. The TTL bounds staleness when several worker processes
+# each hold their own copy.
+BUCKET_LIST_STATS_TTL = 60
+bucket_list_stats_cache = {'value': None, 'expires': 0.0, 'generation': 0}
+bucket_list_stats_lock = threading.Lock()
+
+def invalidate_bucket_list_stats():
+    with bucket_list_stats_lock:
+        bucket_list_stats_cache['value'] = None
+        bucket_list_stats_cache['generation'] += 1
+
+def label(value):
+    return value.value if value else 'unknown'
+
+def compute_bucket_list_stats(session):
+    rows = session.query(
+        BucketList.status, BucketList.category, BucketList.priority, func.count(BucketList.id)
+    ).group_by(BucketList.status, BucketList.category, BucketList.priority).all()
+    
+    by_status, by_category, by_priority = {}, {}, {}
+    breakdown = []
+    for status, category, priority, count in rows:
+        by_status[label(status)] = by_status.get(label(status), 0) + count
+        by_category[label(category)] = by_category.get(label(category), 0) + count
+        by_priority[label(priority)] = by_priority.get(label(priority), 0) + count
+        breakdown.append({
+            'status': label(status),
+            'category': label(category),
+            'priority': label(priority),
+            'count': count
+        })
+    
+    total_goals = sum(by_status.values())
+    completed_goals = by_status.get(BucketListStatus.COMPLETED.value, 0)
+    return {
+        'total_goals': total_goals,
+        'completed_goals': completed_goals,
+        'in_progress': by_status.get(BucketListStatus.IN_PROGRESS.value, 0),
+        'completion_rate': (completed_goals / total_goals * 100) if total_goals > 0 else 0,
+        'by_status': by_status,
+        'by_category': by_category,
+        'by_priority': by_priority,
+        'breakdown': breakdown
+    }
 
 @app.route('/bucket-list/stats', methods=['GET'])
 def get_bucket_list_stats():
-    session = Session()
-    total_goals = session.query(BucketList).count()
-    completed_goals = session.query(BucketList).filter(BucketList.status == 'COMPLETED').count()
-    in_progress = session.query(BucketList).filter(BucketList.status == 'IN_PROGRESS').count()
+    with bucket_list_stats_lock:
+        if bucket_list_stats_cache['value'] is not None and time.monotonic() < bucket_list_stats_cache['expires']:
+            return jsonify(bucket_list_stats_cache['value'])
+        generation = bucket_list_stats_cache['generation']
     
-    return jsonify({
-        'total_goals': total_goals,
-        'completed_goals': completed_goals,
-        'in_progress': in_progress,
-        'completion_rate': (completed_goals / total_goals * 100) if total_goals > 0 else 0
-    })
+    stats = compute_bucket_list_stats(Session())
+    
+    with bucket_list_stats_lock:
+        # Don't cache a result that a concurrent mutation has already made stale
+        if bucket_list_stats_cache['generation'] == generation:
+            bucket_list_stats_cache['value'] = stats
+            bucket_list_stats_cache['expires'] = time.monotonic() + BUCKET_LIST_STATS_TTL
+    return jsonify(stats)
 
 @app.route('/bucket-list/search', methods=['GET'])
 def search_bucket_list():
     query = request.args.get('query', '')
-    category = request.args.get('category')
-    priority = request.args.get('priority')
-    status = request.args.get('status')
+    filters = {facet: request.args.get(facet) for facet in ('category', 'priority', 'status')}
     
     session = Session()
-    items_query = session.query(BucketList)
-    
-    if query:
-        items_query = items_query.filter(BucketList.title.ilike(f'%{query}%'))
-    if category:
-        items_query = items_query.filter(BucketList.category == Category[category.upper()])
-    if priority:
-        items_query = items_query.filter(BucketList.priority == Priority[priority.upper()])
-    if status:
-        items_query = items_query.filter(BucketList.status == status)
+    try:
+        if query:
+            hits = search.search(session, query, ['bucket_list'], filters, search.MAX_LIMIT)
+            ids = [hit['id'] for hit in hits]
+            items = {item['id']: item for item in project_rows(session, BUCKET_LIST, ids)}
+            # Keep the relevance order
+            return jsonify([items[item_id] for item_id in ids if item_id in items])
         
-    items = items_query.all()
+        names = list(BUCKET_LIST.fields)
+        items_query = session.query(*BUCKET_LIST.columns(names))
+        for facet, value in filters.items():
+            if value:
+                column, enum_class = search.SOURCES['bucket_list']['facets'][facet]
+                items_query = items_query.filter(getattr(BucketList, column) == enum_class[value.upper()])
+        return jsonify(BUCKET_LIST.serializer(names)[1](items_query.order_by(BucketList.id)))
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Invalid filter: {e}'}), 400
+    finally:
+        session.close()
+
+@app.route('/search', methods=['GET'])
+def search_everything():
+    """Ranked full-text search over tasks, bucket-list items and habits.
+
+    ``q`` is free text; the last word also matches as a prefix unless
+    ``prefix=0``. ``type`` (comma-separated: task, bucket_list, habit)
+    narrows the types, and ``category``, ``priority`` and ``status`` filter
+    on those fields.
+    """
+    query = request.args.get('q', '')
+    kinds = [kind.strip() for kind in request.args.get('type', '').split(',') if kind.strip()] or None
+    if kinds and any(kind not in search.SOURCES for kind in kinds):
+        return jsonify({'error': f"type must be among {', '.join(search.SOURCES)}"}), 400
+    try:
+        limit = int(request.args.get('limit', search.DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= search.MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {search.MAX_LIMIT}'}), 400
+    
+    session = Session()
+    try:
+        results = search.search(session, query, kinds, {facet: request.args.get(facet) for facet in search.FACETS},
+                                limit, prefix=request.args.get('prefix', '1') != '0')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        session.close()
+    return jsonify({'query': query, 'results': results})
 
 @app.route('/bucket-list', methods=['POST'])
 def add_bucket_list_item():
@@ -142,26 +539,17 @@ def add_bucket_list_item():
         steps=data.get('steps', []),
         motivation=data.get('motivation'),
         progress=0,
-        status='NOT_STARTED'
+        status=BucketListStatus.NOT_STARTED
     )
     
     session.add(item)
     session.commit()
+    invalidate_bucket_list_stats()
     return jsonify({'message': 'Bucket list item added successfully', 'id': item.id})
 
 @app.route('/tasks', methods=['GET'])
 def get_tasks():
-    session = Session()
-    tasks = session.query(Task).all()
-    return jsonify([{
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'category': task.category.value,
-        'priority': task.priority.value,
-        'deadline': task.deadline.isoformat() if task.deadline else None,
-        'completed': task.completed
-    } for task in tasks])
+    return list_response(TASK)
 
 @app.route('/add', methods=['POST'])
 def add_task():
@@ -182,6 +570,7 @@ def add_task():
     
     session.add(task)
     session.commit()
+    task_indexer.put(task.id, task.title, task.description)
     return jsonify({'message': 'Task added successfully'})
 
 @app.route('/update/<int:task_id>', methods=['PUT'])
@@ -207,6 +596,8 @@ def update_task(task_id):
         task.completed = data['completed']
     
     session.commit()
+    if 'title' in data or 'description' in data:
+        task_indexer.put(task.id, task.title, task.description)
     return jsonify({'message': 'Task updated successfully'})
 
 @app.route('/remove/<int:task_id>', methods=['DELETE'])
@@ -219,44 +610,53 @@ def remove_task(task_id):
     
     session.delete(task)
     session.commit()
+    task_indexer.discard(task_id)
     return jsonify({'message': 'Task removed successfully'})
 
 
-@app.route('/habits', methods=['GET'])
-def get_habits():
-    session = Session()
-    # Get the date parameter from the request
-    selected_date = request.args.get('date')
-    
-    # Base query
-    query = session.query(Habit)
+def habits_with_completions(session, selected_date=None):
+    """Every habit with its completions; only those started by and completed on
+    ``selected_date`` (an ISO date or datetime string) when it is given."""
+    names = list(HABIT.fields)
+    serialize_habit = HABIT.serializer(names)[0]
+    habits = session.query(*HABIT.columns(names))
+    completions = session.query(HabitCompletion.habit_id,
+                                HabitCompletion.completed_date,
+                                HabitCompletion.count)
     
     # If date is provided, filter habits for that date
     if selected_date:
         selected_date = datetime.fromisoformat(selected_date.split('T')[0])
         # Filter habits based on their start_date
-        query = query.filter(Habit.start_date <= selected_date)
-    
-    habits = query.all()
+        habits = habits.filter(Habit.start_date <= selected_date)
+        # Only load that day's completions instead of each habit's full history
+        completions = completions.filter(HabitCompletion.completed_date == selected_date.date())
+    
+    # All completions arrive in one extra SELECT ... IN query rather than one per habit
+    by_habit = {}
+    completions = completions.filter(
+        HabitCompletion.habit_id.in_(habits.with_entities(Habit.id).scalar_subquery())
+    ).order_by(HabitCompletion.id)
+    for habit_id, completed_date, count in completions:
+        by_habit.setdefault(habit_id, []).append({'date': completed_date.isoformat(), 'count': count})
+    
+    result = []
+    for row in habits.order_by(Habit.id):
+        habit = serialize_habit(row)
+        habit['completions'] = by_habit.get(row[0], [])
+        result.append(habit)
+    return result
+
+@app.route('/habits', methods=['GET'])
+def get_habits():
+    session = Session()
+    etag = list_etag(session, ['habits', 'habit_completions'], request.query_string)
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
     
-    # For each habit, check if it has completions for the selected date
-    return jsonify([{
-        'id': habit.id,
-        'name': habit.name,
-        'description': habit.description,
-        'frequency': habit.frequency,
-        'category': habit.category,
-        'streak': habit.streak,
-        'start_date': habit.start_date.isoformat() if habit.start_date else None,
-        'last_completed': habit.last_completed.isoformat() if habit.last_completed else None,
-        'reminder': habit.reminder,
-        'target_count': habit.target_count,
-        'completions': [{
-            'date': completion.completed_date.isoformat(),
-            'count': completion.count
-        } for completion in habit.completions if not selected_date or 
-            completion.completed_date == selected_date.date()]
-    } for habit in habits])
+    response = jsonify(habits_with_completions(session, request.args.get('date')))
+    response.set_etag(etag, weak=True)
+    return response
 
 @app.route('/add_habit', methods=['POST'])
 def add_habit():
@@ -297,6 +697,8 @@ def update_habit(habit_id):
         habit.description = data['description']
     if 'frequency' in data:
         habit.frequency = data['frequency']
+        # Streak periods depend on the frequency
+        rebuild_habit_stats(session, habit)
     if 'streak' in data:
         habit.streak = data['streak']
     if 'last_completed' in data:
@@ -327,36 +729,16 @@ def complete_habit(habit_id):
     
     current_date = datetime.utcnow().date()
     
-    # Check if habit was already completed today
-    existing_completion = session.query(HabitCompletion).filter(
-        HabitCompletion.habit_id == habit_id,
-        HabitCompletion.completed_date == current_date
-    ).first()
-    
-    if existing_completion:
-        if habit.frequency == 'daily':
-            return jsonify({'message': 'Already completed today'})
-        # For habits that can be completed multiple times
-        existing_completion.count += 1
-    else:
-        # Create new completion record
-        completion = HabitCompletion(
-            habit_id=habit_id,
-            completed_date=current_date,
-            count=1
-        )
-        session.add(completion)
-        
-        # Update streak
-        if not habit.last_completed:
-            habit.streak = 1
-        else:
-            last_completed_date = habit.last_completed.date()
-            if current_date - last_completed_date == timedelta(days=1):
-                habit.streak += 1
-            elif current_date - last_completed_date > timedelta(days=1):
-                habit.streak = 1
+    # Insert today's row or bump its count in one statement; daily habits count once
+    completion = upsert_completion(session, habit, current_date)
+    if completion is None:
+        session.rollback()
+        return jsonify({'message': 'Already completed today'})
+    # The upsert bypasses the flush hook that feeds /sync
+    log_changes(session, HabitCompletion.__tablename__, [completion.id])
     
+    # Streaks and rolling counts are updated in the same transaction
+    record_completion(session, habit, current_date)
     habit.last_completed = datetime.utcnow()
     session.commit()
     
@@ -364,7 +746,7 @@ def complete_habit(habit_id):
         'message': 'Habit completed',
         'streak': habit.streak,
         'last_completed': habit.last_completed.isoformat(),
-        'completion_count': existing_completion.count if existing_completion else 1
+        'completion_count': completion.count
     })
 
 @app.route('/habit_stats/<int:habit_id>', methods=['GET'])
@@ -375,46 +757,59 @@ def get_habit_stats(habit_id):
     if not habit:
         return jsonify({'error': 'Habit not found'}), 404
     
-    # Calculate completion rate for the last 30 days
-    thirty_days_ago = datetime.utcnow().date() - timedelta(days=30)
-    completions = session.query(HabitCompletion).filter(
-        HabitCompletion.habit_id == habit_id,
-        HabitCompletion.completed_date >= thirty_days_ago
-    ).all()
+    stats = habit.stats
+    if stats is None:
+        # Habits created before the stats table get their row on first read
+        stats = rebuild_habit_stats(session, habit)
+        session.commit()
+    
+    snapshot = stats_snapshot(habit, stats, datetime.utcnow().date())
+    days_completed = len(snapshot['completion_history'])
     
     # Calculate completion rate based on frequency
     if habit.frequency == 'daily':
-        completion_rate = len(completions) / 30.0
+        completion_rate = days_completed / 30.0
     elif habit.frequency == 'weekly':
-        completion_rate = len(completions) / 4.0  # 4 weeks
+        completion_rate = days_completed / 4.0  # 4 weeks
     else:  # monthly
-        completion_rate = len(completions)  # 1 month
-    
-    # Get completion history for calendar view
-    completion_dates = {
-        completion.completed_date.isoformat(): completion.count 
-        for completion in completions
-    }
+        completion_rate = days_completed  # 1 month
     
     return jsonify({
-        'streak': habit.streak,
+        'streak': snapshot['current_streak'],
+        'longest_streak': snapshot['longest_streak'],
+        'total_completions': snapshot['total_completions'],
+        'rolling_counts': snapshot['rolling_counts'],
         'completion_rate': completion_rate,
         'last_completed': habit.last_completed.isoformat() if habit.last_completed else None,
-        'completion_history': completion_dates
+        'completion_history': snapshot['completion_history']
     })
 
 @app.route('/habit_completions/<int:habit_id>', methods=['GET'])
 def get_habit_completions(habit_id):
     session = Session()
-    completions = session.query(HabitCompletion).filter(
+    names = ['date', 'count', 'notes']
+    completions = session.query(*HABIT_COMPLETION.columns(names)).filter(
         HabitCompletion.habit_id == habit_id
-    ).order_by(HabitCompletion.completed_date.desc()).all()
+    ).order_by(HabitCompletion.completed_date.desc())
+    
+    return jsonify(HABIT_COMPLETION.serializer(names)[1](completions))
+
+def similar_task_suggestions(text, existing_tasks=None):
+    if similar_batcher and text:
+        try:
+            similar_tasks = similar_batcher.submit(text, timeout=SUGGESTION_BATCH_TIMEOUT)
+        except Exception as e:
+            # No suggestions, as find_similar_tasks returns when scoring fails
+            print(f"Error in batched find_similar_tasks: {e}")
+            similar_tasks = []
+    else:
+        similar_tasks = ai_service.find_similar_tasks(text, existing_tasks or [])
     
-    return jsonify([{
-        'date': completion.completed_date.isoformat(),
-        'count': completion.count,
-        'notes': completion.notes
-    } for completion in completions])
+    return {
+        'suggestions': similar_tasks,
+        'existing_matches': ai_service.find_similar_existing_tasks(text),
+        'status': 'success'
+    }
 
 @app.route('/api/suggestions/similar', methods=['POST'])
 def get_similar_tasks():
@@ -422,16 +817,8 @@ def get_similar_tasks():
         data = request.json
         if not data or 'text' not in data:
             return jsonify({'error': 'Missing text parameter'}), 400
-            
-        similar_tasks = ai_service.find_similar_tasks(
-            data['text'],
-            data.get('existing_tasks', [])
-        )
         
-        return jsonify({
-            'suggestions': similar_tasks,
-            'status': 'success'
-        })
+        return jsonify(similar_task_suggestions(data['text'], data.get('existing_tasks', [])))
     except Exception as e:
         print(f"Error in get_similar_tasks: {e}")
         return jsonify({
@@ -439,6 +826,24 @@ def get_similar_tasks():
             'status': 'error'
         }), 500
 
+@app.route('/api/suggestions/similar/batch', methods=['POST'])
+def get_similar_tasks_batch():
+    data = request.json
+    if not data or not isinstance(data.get('texts'), list):
+        return jsonify({'error': 'Missing texts parameter'}), 400
+    if len(data['texts']) > MAX_SUGGESTION_BATCH:
+        return jsonify({'error': f'At most {MAX_SUGGESTION_BATCH} texts per batch'}), 400
+    top_k = data.get('top_k', 3)
+    if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= MAX_SUGGESTION_TOP_K:
+        return jsonify({'error': f'top_k must be an integer between 1 and {MAX_SUGGESTION_TOP_K}'}), 400
+    
+    try:
+        results = ai_service.find_similar_tasks_batch(data['texts'], top_k)
+    except Exception as e:
+        print(f"Error in get_similar_tasks_batch: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+    return jsonify({'results': results, 'status': 'success'})
+
 @app.route('/api/suggestions/category', methods=['POST'])
 def get_category_suggestion():
     data = request.json
@@ -446,7 +851,23 @@ def get_category_suggestion():
         data['title'],
         data['description']
     )
-    return jsonify({'category': category})
+    return jsonify({
+        'category': category,
+        'scores': ai_service.category_scores(data['title'], data['description'])
+    })
+
+@app.route('/api/suggestions/category/batch', methods=['POST'])
+def get_category_suggestion_batch():
+    data = request.json
+    if not data or not isinstance(data.get('items'), list):
+        return jsonify({'error': 'Missing items parameter'}), 400
+    if len(data['items']) > MAX_SUGGESTION_BATCH:
+        return jsonify({'error': f'At most {MAX_SUGGESTION_BATCH} items per batch'}), 400
+    
+    categories = ai_service.suggest_category_batch(
+        (item.get('title', ''), item.get('description', '')) for item in data['items']
+    )
+    return jsonify({'categories': categories})
 
 @app.route('/bucket-list/<int:item_id>', methods=['PUT'])
 def update_bucket_list_item(item_id):
@@ -486,6 +907,7 @@ def update_bucket_list_item(item_id):
     
     item.updated_at = datetime.utcnow()
     session.commit()
+    invalidate_bucket_list_stats()
     return jsonify({'message': 'Bucket list item updated successfully'})
 
 @app.route('/bucket-list/<int:item_id>', methods=['DELETE'])
@@ -498,8 +920,55 @@ def delete_bucket_list_item(item_id):
     
     session.delete(item)
     session.commit()
+    invalidate_bucket_list_stats()
     return jsonify({'message': 'Bucket list item deleted successfully'})
 
+@app.route('/batch', methods=['POST'])
+def batch_mutations():
+    """Creates, updates and deletes across tasks, habits and bucket-list items in one transaction.
+
+    ``mode`` is ``atomic`` (default: any invalid item rolls back everything)
+    or ``best_effort`` (invalid items are skipped). ``results`` mirrors the
+    request with one ``{'ok', 'id', 'error'}`` entry per item.
+    """
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    mode = data.get('mode', 'atomic')
+    if mode not in MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MODES)}"}), 400
+    try:
+        if count_items(data) > MAX_BATCH_ITEMS:
+            return jsonify({'error': f'At most {MAX_BATCH_ITEMS} items per batch'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    session = Session()
+    try:
+        applied, results, effects = apply_batch(session, data, mode)
+        if not applied:
+            session.rollback()
+            return jsonify({'status': 'rolled_back', 'mode': mode, 'results': results}), 400
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        print(f"Error in batch_mutations: {e}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+    tasks = effects['tasks']
+    reindex = tasks['created'] + [task_id for task_id, values in tasks['updated'].items()
+                                  if 'title' in values or 'description' in values]
+    if reindex:
+        for task_id, title, description in session.query(Task.id, Task.title, Task.description).filter(
+                Task.id.in_(reindex)):
+            task_indexer.put(task_id, title, description)
+    for task_id in tasks['deleted']:
+        task_indexer.discard(task_id)
+    if any(effects['bucket_list'].values()):
+        invalidate_bucket_list_stats()
+
+    return jsonify({'status': 'ok' if succeeded(results) else 'partial', 'mode': mode, 'results': results})
+
 @app.route('/bucket-list/<int:item_id>/start', methods=['PUT'])
 def start_bucket_list_item(item_id):
     session = Session()
@@ -508,9 +977,10 @@ def start_bucket_list_item(item_id):
     if not item:
         return jsonify({'error': 'Item not found'}), 404
     
-    item.status = 'IN_PROGRESS'
+    item.status = BucketListStatus.IN_PROGRESS
     item.updated_at = datetime.utcnow()
     session.commit()
+    invalidate_bucket_list_stats()
     return jsonify({'message': 'Bucket list item started successfully'})
 
 @app.route('/bucket-list/<int:item_id>/complete', methods=['PUT'])
@@ -521,36 +991,12 @@ def complete_bucket_list_item(item_id):
     if not item:
         return jsonify({'error': 'Item not found'}), 404
     
-    item.status = 'COMPLETED'
+    item.status = BucketListStatus.COMPLETED
     item.progress = 100
     item.updated_at = datetime.utcnow()
     session.commit()
+    invalidate_bucket_list_stats()
     return jsonify({'message': 'Bucket list item completed successfully'})
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
-    
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        # Create uploads directory if it doesn't exist
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        file.save(filepath)
-        return jsonify({
-            'message': 'File uploaded successfully',
-            'filename': filename,
-            'url': f'/uploads/{filename}'
-        })
-    
-    return jsonify({'error': 'Invalid file type'}), 400
-
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
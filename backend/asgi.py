@@ -0,0 +1,236 @@
+"""ASGI serving mode: hot read and suggestion routes run async, the rest through Flask.
+
+    pip install -r requirements-asgi.txt
+    python asgi.py --workers 4 --port 8000
+    uvicorn asgi:app --workers 4        # or: hypercorn asgi:app --workers 4
+
+GET /tasks, /bucket-list and /habits read through an async SQLAlchemy engine
+(aiosqlite), reusing app.py's query code via ``AsyncSession.run_sync``, so a
+request waiting on SQLite holds no thread. The suggestion routes run AIService
+scoring on a dedicated executor (AI_EXECUTOR_WORKERS threads) instead of the
+event loop. Every other route, and NDJSON listings, go to the Flask app through
+asgiref's WSGI adapter unchanged. Run one worker per core: SQLite still allows
+one writer at a time, and scoring holds the GIL.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qsl
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_etags
+
+import app as flask_app
+import metrics
+from models import DATABASE_URL, apply_sqlite_pragmas
+from serializers import BUCKET_LIST, TASK
+
+AI_EXECUTOR_WORKERS = int(os.environ.get('AI_EXECUTOR_WORKERS', 4))
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def create_async_db_engine(url=None):
+    """Async engine for the same database, with the same per-connection pragmas."""
+    url = url or DATABASE_URL
+    kwargs = {}
+    if url.startswith('sqlite'):
+        url = url.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+        kwargs['connect_args'] = {'timeout': 30}
+    engine = create_async_engine(url, **kwargs)
+    if url.startswith('sqlite'):
+        apply_sqlite_pragmas(engine.sync_engine)
+    metrics.instrument_engine(engine.sync_engine)
+    return engine
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope['query_string']
+        self.args = MultiDict(parse_qsl(self.query_string.decode('latin-1'), keep_blank_values=True))
+        self.headers = Headers([(name.decode('latin-1'), value.decode('latin-1'))
+                                for name, value in scope['headers']])
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+def json_response(payload, status=200, headers=None):
+    # Same encoder and options as the Flask app's jsonify
+    return status, dict(headers or {}, **{'Content-Type': 'application/json'}), \
+        flask_app.app.json.dumps(payload).encode() + b'\n'
+
+
+class AsyncApp:
+    """Routes ``(method, path)`` to async handlers and everything else to Flask."""
+
+    def __init__(self, wsgi_app, engine):
+        self.wsgi = WsgiToAsgi(wsgi_app)
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine)
+        self.ai_executor = ThreadPoolExecutor(AI_EXECUTOR_WORKERS, thread_name_prefix='ai-executor')
+        self.routes = {
+            ('GET', '/tasks'): partial(self.list_rows, TASK),
+            ('GET', '/bucket-list'): partial(self.list_rows, BUCKET_LIST),
+            ('GET', '/habits'): self.habits,
+            ('POST', '/api/suggestions/similar'): self.similar_tasks,
+            ('POST', '/api/suggestions/category'): self.category,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        handler = self.routes.get((scope.get('method'), scope.get('path')))
+        if scope['type'] != 'http' or handler is None or (
+                scope['path'] in ('/tasks', '/bucket-list') and b'format=ndjson' in scope['query_string']):
+            # A fresh context per call: uvicorn starts the next request on a kept-alive
+            # connection from the previous one's context, and asgiref keeps its
+            # per-request executor there, so it would be handed one that has quit.
+            return await asyncio.get_running_loop().create_task(
+                self.wsgi(scope, receive, send), context=contextvars.Context())
+
+        metrics.IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            body = await read_body(receive)
+            if body is None:
+                status, headers, content = json_response({'error': 'Request body too large'}, 413)
+            else:
+                request = Request(scope, body)
+                try:
+                    status, headers, content = await handler(request)
+                except Exception as e:
+                    print(f"Error in {scope['method']} {scope['path']}: {e}")
+                    status, headers, content = json_response({'error': str(e), 'status': 'error'}, 500)
+                headers.update(cors_headers(request.headers.get('Origin')))
+            await send({'type': 'http.response.start', 'status': status,
+                        'headers': [(name.encode('latin-1'), str(value).encode('latin-1'))
+                                    for name, value in headers.items()]})
+            await send({'type': 'http.response.body', 'body': content})
+        finally:
+            metrics.IN_FLIGHT.dec()
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, scope['method'], scope['path'])
+            metrics.REQUESTS.inc(scope['method'], scope['path'], str(status))
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.ai_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_sync(self, fn, *args):
+        """``fn(session, *args)`` with a sync Session facade over the async connection."""
+        async with self.sessions() as session:
+            return await session.run_sync(fn, *args)
+
+    async def conditional(self, request, tables):
+        """``(etag, 304 response or None)`` for a listing of ``tables``."""
+        etag = await self.run_sync(flask_app.list_etag, tables, request.query_string)
+        if parse_etags(request.headers.get('If-None-Match')).contains_weak(etag):
+            return etag, (304, {'ETag': f'W/"{etag}"'}, b'')
+        return etag, None
+
+    async def list_rows(self, schema, request):
+        try:
+            names = flask_app.parse_fields(schema, request.args)
+            limit, cursor = flask_app.parse_page_args(request.args)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        etag, not_modified = await self.conditional(request, [schema.model.__tablename__])
+        if not_modified:
+            return not_modified
+        rows, next_cursor = await self.run_sync(flask_app.fetch_page, schema, names, limit, cursor)
+        headers = {'ETag': f'W/"{etag}"'}
+        if next_cursor is not None:
+            headers['X-Next-Cursor'] = next_cursor
+        return json_response(schema.serializer(names)[1](rows), headers=headers)
+
+    async def habits(self, request):
+        etag, not_modified = await self.conditional(request, ['habits', 'habit_completions'])
+        if not_modified:
+            return not_modified
+        habits = await self.run_sync(flask_app.habits_with_completions, request.args.get('date'))
+        return json_response(habits, headers={'ETag': f'W/"{etag}"'})
+
+    async def similar_tasks(self, request):
+        data = request.json()
+        if not data or 'text' not in data:
+            return json_response({'error': 'Missing text parameter'}, 400)
+        loop = asyncio.get_running_loop()
+        return json_response(await loop.run_in_executor(
+            self.ai_executor, flask_app.similar_task_suggestions, data['text'], data.get('existing_tasks', [])))
+
+    async def category(self, request):
+        data = request.json()
+        if not data or 'title' not in data or 'description' not in data:
+            return json_response({'error': 'Missing title or description'}, 400)
+        ai_service = flask_app.ai_service
+
+        def suggest():
+            return {'category': ai_service.suggest_category(data['title'], data['description']),
+                    'scores': ai_service.category_scores(data['title'], data['description'])}
+        return json_response(await asyncio.get_running_loop().run_in_executor(self.ai_executor, suggest))
+
+
+async def read_body(receive):
+    """The request body, or None once it exceeds MAX_BODY_SIZE."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def cors_headers(origin):
+    # What Flask-CORS adds for the same origins on the routes it serves
+    if origin not in flask_app.CORS_ORIGINS:
+        return {}
+    return {
+        'Access-Control-Allow-Origin': origin,
+        'Access-Control-Allow-Credentials': 'true',
+        'Access-Control-Expose-Headers': ', '.join(flask_app.CORS_EXPOSE_HEADERS),
+        'Vary': 'Origin',
+    }
+
+
+app = AsyncApp(flask_app.app, create_async_db_engine())
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    uvicorn.run('asgi:app', host=args.host, port=args.port, workers=args.workers,
+                log_level='warning', access_log=False)
+
+
+if __name__ == '__main__':
+    main()
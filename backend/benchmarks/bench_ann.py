@@ -0,0 +1,58 @@
+"""Recall@k and QPS of the IVF-flat ANN backend against exact search.
+
+    python benchmarks/bench_ann.py --size 1000000 --probes 1 2 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_similarity import synthetic_corpus  # noqa: E402
+from services.ann import IVFFlatIndex  # noqa: E402
+from services.similarity import HashingEncoder, top_k_rows  # noqa: E402
+
+
+def timed_search(search, queries, top_k):
+    start = time.perf_counter()
+    results = [[row for row, _score in search(query, top_k)] for query in queries]
+    return results, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--lists', type=int, default=None, help='IVF lists (default 4*sqrt(size))')
+    parser.add_argument('--probes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    encoder = HashingEncoder()
+    corpus = synthetic_corpus(args.size)
+    encoder.fit(corpus)
+    vectors = np.vstack([encoder.encode(corpus[start:start + 10000]) for start in range(0, len(corpus), 10000)])
+    queries = encoder.encode(synthetic_corpus(args.queries, seed=1))
+
+    truth, exact_qps = timed_search(lambda q, k: top_k_rows(vectors, q, k), queries, args.top_k)
+
+    start = time.perf_counter()
+    ivf = IVFFlatIndex(n_lists=args.lists).build(vectors)
+    print(f'{args.size} rows, {len(ivf.centroids)} lists, IVF build {time.perf_counter() - start:.1f}s')
+    print(f"{'search':>10} {'recall@' + str(args.top_k):>10} {'QPS':>10}")
+    print(f"{'exact':>10} {1.0:>10.3f} {exact_qps:>10.1f}")
+
+    for n_probe in args.probes:
+        ivf.n_probe = n_probe
+        found, qps = timed_search(lambda q, k: ivf.search(vectors, q, k), queries, args.top_k)
+        recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)])
+        print(f"{'ivf/' + str(n_probe):>10} {recall:>10.3f} {qps:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
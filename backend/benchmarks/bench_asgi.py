@@ -0,0 +1,104 @@
+"""Concurrency scaling: the threaded Flask server vs asgi.py under uvicorn.
+
+    python benchmarks/bench_asgi.py --workers 4 --concurrency 1 8 32 64
+
+Both servers run as subprocesses against the same generated database and are
+driven over HTTP with load_test.py's scenarios, one keep-alive connection per
+client thread. Needs the ASGI extras: pip install -r requirements-asgi.txt
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+from load_test import Fixture, HttpClient, run_scenario  # noqa: E402
+
+SERVERS = {
+    'threaded': lambda port, workers: [sys.executable, '-c',
+                                       f'from app import app; app.run(port={port}, threaded=True)'],
+    'asgi': lambda port, workers: [sys.executable, 'asgi.py', '--port', str(port), '--workers', str(workers)],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not listen on port {port} within {timeout}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='uvicorn worker processes')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario and concurrency level')
+    parser.add_argument('--scenarios', nargs='+', default=['tasks_page', 'habits_for_day', 'suggest_similar'])
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   EMBEDDING_INDEX_DIR=os.path.join(tmp, 'index'), UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+                   SUGGESTION_BATCH_WINDOW_MS='0')
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'generate_data.py'), '--tasks', str(args.tasks)],
+                       env=env, cwd=BACKEND_DIR, check=True)
+
+        for server in args.servers:
+            port = free_port()
+            process = subprocess.Popen(SERVERS[server](port, args.workers), env=env, cwd=BACKEND_DIR,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_listening(port, process)
+                url = f'http://127.0.0.1:{port}'
+
+                def make_client():
+                    return HttpClient(url)
+
+                fixture = Fixture(make_client(), random.Random(42))
+                for concurrency in args.concurrency:
+                    for name in args.scenarios:
+                        result = run_scenario(name, make_client, fixture, concurrency, args.requests, 42)
+                        results.append(dict(result, server=server))
+            finally:
+                process.terminate()
+                process.wait()
+
+    print(f"{'scenario':>16} {'conc':>5} " + ' '.join(f"{server + ' req/s':>15} {'p99 ms':>9}"
+                                                        for server in args.servers))
+    for concurrency in args.concurrency:
+        for name in args.scenarios:
+            rows = {row['server']: row for row in results
+                    if row['scenario'] == name and row['concurrency'] == concurrency}
+            print(f'{name:>16} {concurrency:>5} ' + ' '.join(
+                f"{rows[server]['throughput_rps']:>15} {rows[server]['p99_ms']:>9}" for server in args.servers))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'workers': args.workers, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
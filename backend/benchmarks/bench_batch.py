@@ -0,0 +1,87 @@
+"""Task create/update/delete throughput: single-row routes vs one POST /batch.
+
+    python benchmarks/bench_batch.py --items 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# A throwaway database and task index, set before app/models are imported
+_tmp = tempfile.mkdtemp(prefix='bench-batch-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ['EMBEDDING_INDEX_DIR'] = os.path.join(_tmp, 'index')
+
+from app import app  # noqa: E402
+from models import Session, Task, init_db  # noqa: E402
+
+init_db()
+
+
+def new_task(i):
+    return {'title': f'Imported task {i}', 'description': f'Row {i} of the import',
+            'category': 'work', 'priority': 'medium'}
+
+
+def task_ids():
+    session = Session()
+    ids = [task_id for (task_id,) in session.query(Task.id).order_by(Task.id)]
+    session.close()
+    return ids
+
+
+def run_single(client, items):
+    timings = {}
+    start = time.perf_counter()
+    for i in range(items):
+        client.post('/add', json=new_task(i))
+    timings['create'] = time.perf_counter() - start
+
+    ids = task_ids()
+    start = time.perf_counter()
+    for task_id in ids:
+        client.put(f'/update/{task_id}', json={'completed': True})
+    timings['update'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        client.delete(f'/remove/{task_id}')
+    timings['delete'] = time.perf_counter() - start
+    return timings
+
+
+def run_batch(client, items):
+    timings = {}
+    start = time.perf_counter()
+    client.post('/batch', json={'tasks': {'create': [new_task(i) for i in range(items)]}})
+    timings['create'] = time.perf_counter() - start
+
+    ids = task_ids()
+    start = time.perf_counter()
+    client.post('/batch', json={'tasks': {'update': [{'id': task_id, 'completed': True} for task_id in ids]}})
+    timings['update'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    client.post('/batch', json={'tasks': {'delete': ids}})
+    timings['delete'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=500)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    print(f"{'impl':>8} {'create/s':>10} {'update/s':>10} {'delete/s':>10}")
+    for name, run in (('single', run_single), ('batch', run_batch)):
+        timings = run(client, args.items)
+        print(f"{name:>8} " + ' '.join(f"{args.items / timings[op]:>10.0f}" for op in ('create', 'update', 'delete')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Suggestion throughput at batch sizes 1-256, and singles through the micro-batcher.
+
+    python benchmarks/bench_batching.py --size 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_similarity import synthetic_corpus  # noqa: E402
+from services.batching import MicroBatcher  # noqa: E402
+from services.embedding_index import EmbeddingIndex  # noqa: E402
+from services.similarity import HashingEncoder  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help='corpus entries')
+    parser.add_argument('--queries', type=int, default=512)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    parser.add_argument('--threads', type=int, default=32, help='concurrent callers for the micro-batcher run')
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    queries = synthetic_corpus(args.queries, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EmbeddingIndex(tmp, HashingEncoder())
+        index.build((str(i), text, {}) for i, text in enumerate(synthetic_corpus(args.size)))
+
+        print(f'{args.size} entries, exact search')
+        print(f"{'batch':>6} {'queries/s':>10}")
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            for offset in range(0, len(queries), batch_size):
+                index.search_batch(queries[offset:offset + batch_size])
+            print(f'{batch_size:>6} {len(queries) / (time.perf_counter() - start):>10.1f}')
+
+        print(f'\n{args.threads} concurrent single callers')
+        with ThreadPoolExecutor(args.threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(index.search, queries))
+            print(f"{'direct':>12} {len(queries) / (time.perf_counter() - start):>10.1f} queries/s")
+
+            batcher = MicroBatcher(index.search_batch, max_batch_size=256, max_wait=args.window_ms / 1000)
+            start = time.perf_counter()
+            list(pool.map(batcher.submit, queries))
+            elapsed = time.perf_counter() - start
+            print(f"{'batched':>12} {len(queries) / elapsed:>10.1f} queries/s "
+                  f"(mean batch {batcher.items / max(batcher.batches, 1):.1f})")
+
+
+if __name__ == '__main__':
+    main()
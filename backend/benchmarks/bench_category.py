@@ -0,0 +1,95 @@
+"""Throughput of the compiled category classifier vs the old per-keyword scan.
+
+    python benchmarks/bench_category.py --size 200000
+    python benchmarks/bench_category.py --size 20000 --keywords 2000
+
+--keywords swaps the shipped config for a synthetic one with that many
+keywords, to show how each implementation scales with the keyword count.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.ai_service import CATEGORY_KEYWORDS_PATH  # noqa: E402
+from services.category_classifier import CategoryClassifier  # noqa: E402
+
+WORDS = ('call finish review send book plan write fix update clean pick up order email schedule the a for with '
+         'my to of and project meeting office family home grocery store buy urgent asap report client life '
+         'dentist garden car invoice presentation birthday gift trip budget laundry herself myself').split()
+
+
+LEGACY_KEYWORDS = {
+    'work': ['work', 'project', 'meeting', 'deadline', 'office'],
+    'personal': ['home', 'family', 'self', 'life', 'personal'],
+    'shopping': ['buy', 'shop', 'purchase', 'grocery', 'store'],
+    'urgent': ['urgent', 'important', 'asap', 'deadline', 'critical']
+}
+
+
+def legacy_suggest_category(title, description, category_keywords=LEGACY_KEYWORDS):
+    # The pre-compiled implementation: substring scan per keyword
+    text = f"{title} {description}".lower()
+    max_matches = 0
+    suggested_category = 'personal'
+    for category, keywords in category_keywords.items():
+        matches = sum(1 for keyword in keywords if keyword in text)
+        if matches > max_matches:
+            max_matches = matches
+            suggested_category = category
+    return suggested_category
+
+
+def synthetic_keywords(count, seed=0):
+    """``count`` made-up keywords spread over the four categories, plus the real ones."""
+    rng = random.Random(seed)
+    category_keywords = {category: list(keywords) for category, keywords in LEGACY_KEYWORDS.items()}
+    categories = list(category_keywords)
+    for i in range(count):
+        word = ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(5, 9)))
+        category_keywords[categories[i % len(categories)]].append(word)
+    return category_keywords
+
+
+def synthetic_items(size, seed=0):
+    rng = random.Random(seed)
+    return [(' '.join(rng.choices(WORDS, k=rng.randint(2, 6))), ' '.join(rng.choices(WORDS, k=rng.randint(0, 25))))
+            for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--keywords', type=int, default=0, help='synthetic keywords to add to the config')
+    args = parser.parse_args()
+
+    items = synthetic_items(args.size)
+    category_keywords, config_path = LEGACY_KEYWORDS, CATEGORY_KEYWORDS_PATH
+    if args.keywords:
+        category_keywords = synthetic_keywords(args.keywords)
+        config_path = os.path.join(tempfile.mkdtemp(), 'category_keywords.json')
+        with open(config_path, 'w') as f:
+            json.dump({'default': 'personal', 'categories': {
+                category: {keyword: 1.0 for keyword in keywords}
+                for category, keywords in category_keywords.items()}}, f)
+    classifier = CategoryClassifier(config_path)
+    runs = {
+        'legacy': lambda: [legacy_suggest_category(title, description, category_keywords)
+                           for title, description in items],
+        'compiled': lambda: [classifier.classify(f'{title} {description}')[0] for title, description in items],
+    }
+    print(f"{'impl':>10} {'items/s':>12}")
+    for name, run in runs.items():
+        start = time.perf_counter()
+        run()
+        print(f'{name:>10} {args.size / (time.perf_counter() - start):>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark GET /habits?date=... against the old lazy-loading handler.
+
+    python benchmarks/bench_get_habits.py --habits 50 --days 365 1095
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(db_path, habits, days):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from models import init_db
+    init_db()
+
+    conn = sqlite3.connect(db_path)
+    start = datetime(2015, 1, 1).isoformat(' ')
+    conn.executemany(
+        'INSERT INTO habits (id, name, description, frequency, category, streak, start_date, reminder, target_count) '
+        "VALUES (?, ?, '', 'daily', 'health', 0, ?, 0, 1)",
+        ((i, f'Habit {i}', start) for i in range(1, habits + 1)))
+    today = date.today()
+    conn.executemany(
+        'INSERT INTO habit_completions (habit_id, completed_date, count) VALUES (?, ?, 1)',
+        ((i, (today - timedelta(days=day)).isoformat()) for i in range(1, habits + 1) for day in range(days)))
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_habits():
+    # The handler before the fix: one lazy load of the full history per habit
+    from flask import jsonify, request
+    from models import Session, Habit
+    session = Session()
+    selected_date = datetime.fromisoformat(request.args['date'].split('T')[0])
+    habits = session.query(Habit).filter(Habit.start_date <= selected_date).all()
+    return jsonify([{
+        'id': habit.id,
+        'name': habit.name,
+        'completions': [{
+            'date': completion.completed_date.isoformat(),
+            'count': completion.count
+        } for completion in habit.completions if completion.completed_date == selected_date.date()]
+    } for habit in habits])
+
+
+def run_worker(db_path, repeat):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import event
+    from app import app
+    from models import engine
+
+    app.add_url_rule('/bench/legacy-habits', 'bench_legacy_habits', legacy_get_habits)
+    client = app.test_client()
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    today = date.today().isoformat()
+    for name, url in [('legacy', f'/bench/legacy-habits?date={today}'), ('selectin', f'/habits?date={today}')]:
+        latencies = []
+        for _ in range(repeat):
+            statements.clear()
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f'{name:>10} {latencies[len(latencies) // 2]:>10.2f} {p99:>10.2f} {len(statements):>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--habits', type=int, default=50)
+    parser.add_argument('--days', type=int, nargs='+', default=[30, 365, 1095])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in args.days:
+            db_path = os.path.join(tmp, f'habits_{days}.db')
+            seed_code = (f'import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); '
+                         f'import bench_get_habits as b; b.seed({db_path!r}, {args.habits}, {days})')
+            subprocess.run([sys.executable, '-c', seed_code], check=True, cwd=tmp)
+            print(f'\n{args.habits} habits x {days} days of history')
+            print(f"{'handler':>10} {'p50 ms':>10} {'p99 ms':>10} {'queries':>8}")
+            subprocess.run([sys.executable, '-c',
+                            f'import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); '
+                            f'import bench_get_habits as b; b.run_worker({db_path!r}, {args.repeat})'],
+                           check=True, cwd=tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark GET /tasks: full materialization vs keyset pages vs NDJSON streaming.
+
+Every (size, mode) pair runs in its own subprocess so peak RSS is comparable.
+
+    python benchmarks/bench_list_endpoints.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ['legacy', 'full', 'page', 'ndjson']
+
+
+def seed(db_path, size):
+    # Create the schema in the database behind DATABASE_URL
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from models import init_db
+    init_db()
+
+    conn = sqlite3.connect(db_path)
+    now = datetime.utcnow().isoformat(' ')
+    rows = ((f'Task {i}', f'Description for task {i}', 'PERSONAL', 'MEDIUM', None, now, i % 2)
+            for i in range(size))
+    conn.executemany(
+        'INSERT INTO tasks (title, description, category, priority, deadline, created_at, completed) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_tasks():
+    # The handler as it was before pagination: hydrate every row, then jsonify
+    from flask import jsonify
+    from models import Session, Task
+    session = Session()
+    tasks = session.query(Task).all()
+    response = jsonify([{
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'category': task.category.value,
+        'priority': task.priority.value,
+        'deadline': task.deadline.isoformat() if task.deadline else None,
+        'completed': task.completed
+    } for task in tasks])
+    session.close()
+    return response
+
+
+def run_worker(db_path, size, mode, repeat):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+
+    app.add_url_rule('/bench/legacy-tasks', 'bench_legacy_tasks', legacy_get_tasks)
+    client = app.test_client()
+    urls = {
+        'legacy': '/bench/legacy-tasks',
+        'full': '/tasks',
+        'page': f'/tasks?limit=100&cursor={size // 2}',
+        'ndjson': '/tasks?format=ndjson',
+    }
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(urls[mode], buffered=False)
+        for _chunk in response.response:
+            pass
+        response.close()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(json.dumps({
+        'size': size,
+        'mode': mode,
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--worker', nargs=3, metavar=('DB', 'SIZE', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        db_path, size, mode = args.worker
+        run_worker(db_path, int(size), mode, args.repeat)
+        return
+
+    print(f"{'rows':>9} {'mode':>7} {'p50 ms':>10} {'p99 ms':>10} {'rss MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            db_path = os.path.join(tmp, f'tasks_{size}.db')
+            subprocess.run([sys.executable, '-c',
+                            f'import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); '
+                            f'import bench_list_endpoints as b; b.seed({db_path!r}, {size})'],
+                           check=True, cwd=tmp)
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--worker', db_path, str(size), mode, '--repeat', str(args.repeat)],
+                    check=True, capture_output=True, text=True, cwd=tmp).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{size:>9} {mode:>7} {result['p50_ms']:>10} {result['p99_ms']:>10} {result['max_rss_mb']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Search latency: LIKE '%term%' scans vs the FTS5 index, at 100k+ tasks.
+
+    python benchmarks/bench_search.py --size 200000
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp = tempfile.mkdtemp(prefix='bench-search-')
+DB_PATH = os.path.join(_tmp, 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+
+from models import Session, init_db  # noqa: E402
+import search  # noqa: E402
+
+# The schema, FTS tables and triggers included
+init_db()
+
+VOCABULARY = ('call email review plan write fix update clean order schedule book pay renew return '
+              'report invoice client meeting dentist garden car budget laundry presentation birthday '
+              'gift trip passport insurance taxes groceries plumber landlord fence roof paint').split()
+QUERIES = ['dentist', 'garden fence', 'pass', 'inv', 'quarterly taxes']
+
+
+def vocabulary(rng, extra_words=20000):
+    # The real words plus a long tail of made-up ones, drawn with Zipf-like
+    # weights so a few words are common and most are rare, as in real text
+    words = list(VOCABULARY) + [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 10)))
+                                for _ in range(extra_words)]
+    rng.shuffle(words)
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+
+def seed(size, seed=0):
+    rng = random.Random(seed)
+    words, cum_weights = vocabulary(rng)
+    now = datetime.utcnow().isoformat(' ')
+    conn = sqlite3.connect(DB_PATH)
+    rows = ((' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5))).capitalize(),
+             ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(5, 20))), 'WORK', 'MEDIUM', now, now, 0)
+            for _ in range(size))
+    # The insert trigger indexes every row as it goes in
+    conn.executemany('INSERT INTO tasks (title, description, category, priority, created_at, updated_at, completed) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def like_search(conn, query):
+    # The old approach: substring match on every row, every match returned unranked
+    conditions = ' AND '.join('(title LIKE ? OR description LIKE ?)' for _ in query.split())
+    params = [pattern for word in query.split() for pattern in (f'%{word}%', f'%{word}%')]
+    return conn.execute(f'SELECT id, title FROM tasks WHERE {conditions}', params).fetchall()
+
+
+def timed(run, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.size)
+    print(f'seeded {args.size} tasks in {time.perf_counter() - start:.1f}s')
+
+    conn = sqlite3.connect(DB_PATH)
+    session = Session()
+    print(f"{'query':>16} {'matches':>8} {'like ms':>9} {'fts ms':>9}")
+    for query in QUERIES:
+        matches = len(like_search(conn, query))
+        like = timed(lambda: like_search(conn, query), args.repeat)
+        fts = timed(lambda: search.search(session, query, ['task'], limit=args.limit), args.repeat)
+        print(f'{query:>16} {matches:>8} {like:>9.2f} {fts:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Per-model serialization throughput: per-field loop + json vs compiled schema + orjson.
+
+    python benchmarks/bench_serializers.py --rows 20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp = tempfile.mkdtemp(prefix='bench-serializers-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+
+from models import (Session, Task, init_db, Habit, HabitCompletion, BucketList,  # noqa: E402
+                    Category, Priority, BucketListStatus)
+from serializers import TASK, BUCKET_LIST, HABIT, HABIT_COMPLETION, dumps, orjson  # noqa: E402
+
+SCHEMAS = {'task': TASK, 'bucket_list': BUCKET_LIST, 'habit': HABIT, 'habit_completion': HABIT_COMPLETION}
+
+
+def seed(rows):
+    init_db()
+    rng = random.Random(7)
+    now = datetime(2024, 1, 1)
+    session = Session()
+    session.add_all(Task(title=f'Task {i}', description='Lorem ipsum dolor sit amet ' * 3,
+                         category=rng.choice(list(Category)), priority=rng.choice(list(Priority)),
+                         deadline=now + timedelta(hours=i), completed=bool(i % 2))
+                    for i in range(rows))
+    session.add_all(BucketList(title=f'Goal {i}', description='Somewhere far away',
+                               status=rng.choice(list(BucketListStatus)),
+                               category=rng.choice(list(Category)),
+                               priority=rng.choice(list(Priority)), progress=i % 100,
+                               tags=['travel', 'food'], steps=[{'title': 'Book', 'done': False}],
+                               deadline=now + timedelta(days=i))
+                    for i in range(rows))
+    session.add_all(Habit(name=f'Habit {i}', description='Every day', frequency='daily',
+                          category='health', start_date=now, last_completed=now + timedelta(days=1))
+                    for i in range(rows))
+    session.flush()
+    session.add_all(HabitCompletion(habit_id=i + 1, completed_date=(now + timedelta(days=i)).date(),
+                                    count=1, notes='Done')
+                    for i in range(rows))
+    session.commit()
+    session.close()
+
+
+def legacy(schema, names, rows):
+    # What list_response did before: look up each field's converter per value
+    items = []
+    for row in rows:
+        item = {}
+        for name, value in zip(names, row[1:]):
+            convert = schema.fields[name][1]
+            item[name] = convert(value) if convert and value is not None else value
+        items.append(item)
+    return json.dumps(items).encode()
+
+
+def compiled(schema, names, rows):
+    return dumps(schema.serializer(names)[1](rows))
+
+
+def best_of(repeat, fn, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    session = Session()
+    print(f"encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+    print(f"{'model':>17} {'legacy rows/s':>14} {'compiled rows/s':>16} {'speedup':>8}")
+    for label, schema in SCHEMAS.items():
+        names = list(schema.fields)
+        rows = session.query(*schema.columns(names)).all()
+        assert json.loads(legacy(schema, names, rows)) == json.loads(compiled(schema, names, rows))
+        old = best_of(args.repeat, legacy, schema, names, rows)
+        new = best_of(args.repeat, compiled, schema, names, rows)
+        print(f'{label:>17} {len(rows) / old:>14,.0f} {len(rows) / new:>16,.0f} {old / new:>7.1f}x')
+    session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Per-query latency of the vector similarity engine vs the old Jaccard loop.
+
+    python benchmarks/bench_similarity.py --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.similarity import HashingEncoder, SimilarityEngine  # noqa: E402
+
+VERBS = ['go', 'buy', 'plan', 'study', 'clean', 'call', 'write', 'read', 'practice', 'finish', 'review', 'cook']
+NOUNS = ['run', 'groceries', 'report', 'meeting', 'kitchen', 'mom', 'essay', 'book', 'guitar', 'taxes',
+         'presentation', 'dinner', 'garden', 'budget', 'workout', 'emails', 'meditation', 'project']
+EXTRAS = ['today', 'tomorrow', 'this week', 'before noon', 'for 1 hour', 'with friends', 'at home', 'at work']
+
+
+def synthetic_corpus(size, seed=0):
+    rng = random.Random(seed)
+    return [f'{rng.choice(VERBS)} {rng.choice(NOUNS)} {rng.choice(EXTRAS)} {i}' for i in range(size)]
+
+
+def legacy_search(corpus, input_text, top_k=3):
+    # The pre-engine implementation: Jaccard over word sets, one dict per candidate
+    input_words = set(input_text.lower().split())
+    similarities = []
+    for task_text in corpus:
+        task_words = set(task_text.lower().split())
+        union_length = len(input_words.union(task_words))
+        if union_length > 0:
+            similarity = len(input_words.intersection(task_words)) / union_length
+            similarities.append((similarity, {'title': task_text, 'similarity_score': similarity}))
+    similarities.sort(key=lambda x: x[0], reverse=True)
+    return [item[1] for item in similarities[:top_k]]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--legacy-max-size', type=int, default=100000,
+                        help='skip the (slow) legacy loop above this corpus size')
+    args = parser.parse_args()
+
+    queries = synthetic_corpus(args.queries, seed=1)
+    print(f"{'entries':>9} {'impl':>8} {'build s':>9} {'p50 ms':>9} {'p99 ms':>9} {'matrix MB':>10}")
+    for size in args.sizes:
+        corpus = synthetic_corpus(size)
+
+        start = time.perf_counter()
+        engine = SimilarityEngine(HashingEncoder()).build(corpus)
+        build_time = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            engine.search(query, top_k=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p99 = percentiles(latencies)
+        print(f'{size:>9} {"engine":>8} {build_time:>9.2f} {p50:>9.3f} {p99:>9.3f} {engine.matrix.nbytes / 2**20:>10.1f}')
+
+        if size <= args.legacy_max_size:
+            latencies = []
+            for query in queries[:10]:
+                start = time.perf_counter()
+                legacy_search(corpus, query)
+                latencies.append((time.perf_counter() - start) * 1000)
+            p50, p99 = percentiles(latencies)
+            print(f'{size:>9} {"legacy":>8} {"-":>9} {p50:>9.3f} {p99:>9.3f} {"-":>10}')
+
+
+if __name__ == '__main__':
+    main()
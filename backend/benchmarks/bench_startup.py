@@ -0,0 +1,112 @@
+"""Cold start: import time of the app and time to its first responses.
+
+    python benchmarks/bench_startup.py --runs 5 --max-ready-ms 1500
+
+Each run is a fresh interpreter. ``ready`` is process spawn to the first
+GET /tasks response; ``first suggestion`` adds the first request that needs
+the AI service, which is built lazily. Exits non-zero when a median goes over
+its --max-* budget, so this can gate a CI job.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Should only load with the AI service, never just to serve the first request
+ML_MODULES = ('numpy', 'torch', 'transformers', 'sentence_transformers')
+_IMPORTTIME_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_worker():
+    # time.monotonic() is system-wide, so the parent can compare it to its spawn time
+    start = time.monotonic()
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    imported = time.monotonic()
+
+    client = app.test_client()
+    assert client.get('/tasks').status_code == 200
+    ready = time.monotonic()
+    loaded_at_ready = [name for name in ML_MODULES if name in sys.modules]
+    assert client.post('/api/suggestions/similar', json={'text': 'buy groceries'}).status_code == 200
+    suggested = time.monotonic()
+    print(json.dumps({'start': start, 'imported': imported, 'ready': ready, 'suggested': suggested,
+                      'loaded_at_ready': loaded_at_ready}))
+
+
+def import_profile(env):
+    """``(app_us, [(cumulative_us, module), ...])`` for the modules ``app`` imports directly."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], env=env,
+                            cwd=BACKEND_DIR, check=True, capture_output=True, text=True).stderr
+    # A module's line follows its imports' lines; one more level of nesting is two more spaces
+    children = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 3:
+            children.append((cumulative, module))
+        elif indent == 1:
+            if module == 'app':
+                return cumulative, sorted(children, reverse=True)
+            children = []
+    return 0, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    parser.add_argument('--max-import-ms', type=float)
+    parser.add_argument('--max-ready-ms', type=float)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   EMBEDDING_INDEX_DIR=os.path.join(tmp, 'index'), UPLOAD_FOLDER=os.path.join(tmp, 'uploads'))
+        env.pop('AI_SERVICE_WARMUP', None)
+        subprocess.run([sys.executable, '-c', 'from models import init_db; init_db()'],
+                       env=env, cwd=BACKEND_DIR, check=True)
+
+        timings = {'import app': [], 'ready': [], 'first suggestion': []}
+        for _ in range(args.runs):
+            spawned = time.monotonic()
+            output = subprocess.run([sys.executable, __file__, '--worker'], env=env, cwd=tmp,
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            timings['import app'].append((result['imported'] - result['start']) * 1000)
+            timings['ready'].append((result['ready'] - spawned) * 1000)
+            timings['first suggestion'].append((result['suggested'] - spawned) * 1000)
+
+        total, imports = import_profile(env)
+
+    print(f"{'phase':>17} {'median ms':>10} {'min ms':>8}")
+    for phase, values in timings.items():
+        print(f'{phase:>17} {statistics.median(values):>10.1f} {min(values):>8.1f}')
+    print(f'\n-X importtime, slowest imports of app ({total / 1000:.1f} ms in total):')
+    for cumulative, module in imports[:args.top]:
+        print(f'{cumulative / 1000:>10.1f} ms  {module}')
+    print(f"\nML modules loaded before the first suggestion: {', '.join(result['loaded_at_ready']) or 'none'}")
+
+    failed = False
+    for budget, phase in ((args.max_import_ms, 'import app'), (args.max_ready_ms, 'ready')):
+        if budget is not None and statistics.median(timings[phase]) > budget:
+            print(f'{phase}: median {statistics.median(timings[phase]):.1f} ms is over the {budget:.0f} ms budget')
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Suggestion latency with the memo cache cold, hot in-process, and hot from the shared file.
+
+    python benchmarks/bench_suggestion_cache.py --queries 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_tmp = tempfile.mkdtemp(prefix='bench-suggestion-cache-')
+os.environ['EMBEDDING_INDEX_DIR'] = os.path.join(_tmp, 'index')
+
+from bench_similarity import synthetic_corpus  # noqa: E402
+from services.ai_service import AIService  # noqa: E402
+from services.suggestion_cache import SuggestionCache  # noqa: E402
+
+
+def per_call_us(run, texts):
+    start = time.perf_counter()
+    for text in texts:
+        run(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = synthetic_corpus(args.queries, seed=1)
+    service = AIService()
+    shared_path = os.path.join(_tmp, 'suggestions.db')
+    print(f"{'cache':>14} {'similar us':>11} {'category us':>12}")
+    for label, cache in [('cold', SuggestionCache(max_entries=0)),
+                         ('hot local', SuggestionCache(max_entries=2 * len(texts))),
+                         ('hot shared', SuggestionCache(max_entries=2 * len(texts), path=shared_path))]:
+        service.suggestion_cache = cache
+        if label == 'hot local':
+            for text in texts:
+                service.find_similar_tasks(text)
+                service.suggest_category(text, '')
+        elif label == 'hot shared':
+            # A "second process": the file is warm, this process's LRU is not
+            for text in texts:
+                service.find_similar_tasks(text)
+                service.suggest_category(text, '')
+            service.suggestion_cache = SuggestionCache(max_entries=2 * len(texts), path=shared_path)
+        similar = per_call_us(service.find_similar_tasks, texts)
+        category = per_call_us(lambda text: service.suggest_category(text, ''), texts)
+        print(f'{label:>14} {similar:>11.1f} {category:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
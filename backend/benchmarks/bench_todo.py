@@ -0,0 +1,86 @@
+"""todo.py storage: open, add, remove and save for the text file vs the journal.
+
+    python benchmarks/bench_todo.py --tasks 1000000 --ops 1000
+
+The text format loads the whole file, removes with list.remove and keeps
+nothing on disk until save_tasks rewrites the file. The journal appends each
+change as it happens, fsyncs every --sync-every records and rewrites the
+file only when it compacts. Its first removal builds the hash index, so the
+remove and reopen rows include one pass over every task.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from todo import JournaledTasks, load_tasks, save_tasks  # noqa: E402
+
+
+def timed(results, name, fn):
+    start = time.perf_counter()
+    value = fn()
+    results[name] = (time.perf_counter() - start) * 1000
+    return value
+
+
+def bench_text(filename, added, removed):
+    results = {}
+    tasks = timed(results, 'open', lambda: load_tasks(filename))
+    timed(results, 'add', lambda: [tasks.append(task) for task in added])
+    timed(results, 'remove', lambda: [tasks.remove(task) for task in removed])
+    timed(results, 'save', lambda: save_tasks(tasks, filename))
+    return results
+
+
+def bench_journal(filename, added, removed, sync_every):
+    results = {}
+    # compact_min above the op count, so compaction is timed on its own below
+    compact_min = 2 * (len(added) + len(removed)) + 1
+    tasks = timed(results, 'open', lambda: JournaledTasks(filename, sync_every, compact_min))
+    timed(results, 'add', lambda: [tasks.append(task) for task in added])
+    timed(results, 'remove', lambda: [tasks.remove(task) for task in removed])
+    timed(results, 'save', tasks.close)
+    tasks = timed(results, 'reopen', lambda: JournaledTasks(filename, sync_every, compact_min))
+    timed(results, 'compact', tasks.compact)
+    tasks.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--ops', type=int, default=1000, help='adds, and then removes, per run')
+    parser.add_argument('--sync-every', type=int, default=64)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tasks = [f'Task {i}: {rng.choice(["call", "buy", "write", "fix", "plan"])} item {rng.randrange(10 ** 6)}'
+             for i in range(args.tasks)]
+    added = [f'New task {i}' for i in range(args.ops)]
+    removed = rng.sample(tasks, args.ops)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('text', 'journal'):
+            filename = os.path.join(tmp, f'{name}.txt')
+            save_tasks(tasks, filename)
+            if name == 'text':
+                results[name] = bench_text(filename, added, removed)
+            else:
+                results[name] = bench_journal(filename, added, removed, args.sync_every)
+            assert load_tasks(filename)[-args.ops:] == added
+
+    print(f'{args.tasks} tasks, {args.ops} adds and {args.ops} removes, journal fsync every {args.sync_every}')
+    print(f"{'step':>8} {'text ms':>10} {'journal ms':>11}")
+    for step in ('open', 'add', 'remove', 'save', 'reopen', 'compact'):
+        text = results['text'].get(step)
+        print(f"{step:>8} {'-' if text is None else f'{text:.1f}':>10} {results['journal'][step]:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Fill a database with realistic synthetic tasks, habits and bucket-list items.
+
+    python benchmarks/generate_data.py --tasks 50000 --habits 200 --years 3 --bucket-list 5000
+    python benchmarks/generate_data.py --db /tmp/load.db --reset --seed 7
+
+Habits get multi-year completion histories with streaks and lapses; bucket
+list items carry JSON steps, tags and inspiration images. Dates are relative
+to today; otherwise the same --seed gives the same data. Rows go in with bulk inserts, and are added to the
+change log and habit stats the way the API would leave them.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CHUNK_SIZE = 5000
+VERBS = ('Call', 'Email', 'Review', 'Plan', 'Write', 'Fix', 'Update', 'Clean', 'Order', 'Schedule', 'Book',
+         'Pay', 'Renew', 'Return', 'Prepare', 'Organize', 'Buy', 'Read', 'Finish', 'Cancel')
+OBJECTS = ('the quarterly report', 'client invoice', 'dentist appointment', 'garden fence', 'car insurance',
+           'team meeting notes', 'birthday gift', 'passport', 'tax return', 'groceries', 'landlord',
+           'presentation slides', 'gym membership', 'flight tickets', 'budget spreadsheet', 'laundry',
+           'project proposal', 'kitchen sink', 'library books', 'vet visit')
+DETAILS = ('before Friday', 'ask about the discount', 'check last year first', 'needs two signatures',
+           'see the shared folder', 'bring the receipt', 'follow up if no answer', '')
+HABITS = (('Meditate', 'health'), ('Run 5k', 'fitness'), ('Read 20 pages', 'learning'), ('Drink water', 'health'),
+          ('Practice guitar', 'learning'), ('Journal', 'mindfulness'), ('Stretch', 'fitness'),
+          ('Call family', 'social'), ('Review budget', 'finance'), ('Walk the dog', 'health'))
+FREQUENCIES = ('daily', 'daily', 'daily', 'weekly', 'monthly')
+GOALS = ('See the northern lights', 'Run a marathon', 'Learn Japanese', 'Visit Machu Picchu', 'Write a novel',
+         'Go scuba diving', 'Build a cabin', 'Learn to sail', 'Hike the Camino', 'Cook a seven course dinner',
+         'Ride the Trans-Siberian', 'Start a vegetable garden')
+TAGS = ('travel', 'adventure', 'fitness', 'learning', 'family', 'outdoors', 'creative', 'food', 'career', 'someday')
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bulk_insert(session, model, rows):
+    """Insert ``rows`` and return their new ids in order."""
+    from sqlalchemy import insert
+
+    ids = []
+    for chunk in chunks(rows):
+        ids.extend(sorted(session.scalars(insert(model).returning(model.id), chunk)))
+    return ids
+
+
+def task_rows(rng, count, now):
+    from models import Category, Priority
+
+    rows = []
+    for _ in range(count):
+        created = now - timedelta(days=rng.randint(0, 730), minutes=rng.randint(0, 1440))
+        rows.append({
+            'title': f'{rng.choice(VERBS)} {rng.choice(OBJECTS)}',
+            'description': rng.choice(DETAILS),
+            'category': rng.choice(list(Category)),
+            'priority': rng.choices(list(Priority), weights=(3, 5, 2))[0],
+            'deadline': created + timedelta(days=rng.randint(1, 60)) if rng.random() < 0.6 else None,
+            'created_at': created,
+            'updated_at': created,
+            'completed': rng.random() < 0.4,
+        })
+    return rows
+
+
+def habit_rows(rng, count, years, today):
+    rows = []
+    for i in range(count):
+        name, category = HABITS[i % len(HABITS)]
+        frequency = rng.choice(FREQUENCIES)
+        rows.append({
+            'name': name if i < len(HABITS) else f'{name} #{i // len(HABITS) + 1}',
+            'description': f'{frequency.capitalize()} {name.lower()}',
+            'frequency': frequency,
+            'category': category,
+            'streak': 0,
+            'start_date': datetime.combine(today - timedelta(days=int(365 * years * rng.uniform(0.5, 1))),
+                                           datetime.min.time()),
+            'reminder': rng.random() < 0.5,
+            'target_count': rng.choice((1, 1, 1, 2, 3)),
+        })
+    return rows
+
+
+def completion_rows(rng, habit_id, habit, today):
+    # A two-state chain: on a streak, days are usually kept; after a lapse,
+    # picking the habit back up is less likely, so histories have real streaks
+    keep, resume = rng.uniform(0.75, 0.97), rng.uniform(0.2, 0.6)
+    step = {'daily': 1, 'weekly': 7, 'monthly': 30}[habit['frequency']]
+    day, done, rows = habit['start_date'].date(), True, []
+    while day <= today:
+        done = rng.random() < (keep if done else resume)
+        if done:
+            completed = min(day + timedelta(days=rng.randrange(step)), today)
+            rows.append({'habit_id': habit_id, 'completed_date': completed,
+                         'count': rng.randint(1, habit['target_count']),
+                         'notes': 'Felt great' if rng.random() < 0.05 else None})
+        day += timedelta(days=step)
+    return rows
+
+
+def bucket_list_rows(rng, count, now):
+    from models import BucketListStatus, Category, Priority
+
+    rows = []
+    for i in range(count):
+        steps = [{'title': f'Step {n + 1}', 'completed': rng.random() < 0.4} for n in range(rng.randint(0, 8))]
+        done = sum(step['completed'] for step in steps)
+        status = rng.choice(list(BucketListStatus))
+        created = now - timedelta(days=rng.randint(0, 1000))
+        rows.append({
+            'title': f'{GOALS[i % len(GOALS)]}' + (f' ({i // len(GOALS) + 1})' if i >= len(GOALS) else ''),
+            'description': 'Something to do at least once',
+            'deadline': now + timedelta(days=rng.randint(30, 3650)) if rng.random() < 0.7 else None,
+            'status': status,
+            'category': rng.choice(list(Category)),
+            'priority': rng.choice(list(Priority)),
+            'progress': 100.0 if status == BucketListStatus.COMPLETED else round(100 * done / len(steps), 1)
+            if steps else 0.0,
+            'image_url': None,
+            'inspiration_images': [f'https://example.com/inspiration/{i}-{n}.jpg' for n in range(rng.randint(0, 3))],
+            'tags': rng.sample(TAGS, rng.randint(0, 4)),
+            'reward': 'A nice dinner' if rng.random() < 0.3 else None,
+            'steps': steps,
+            'motivation': 'Because life is short' if rng.random() < 0.5 else None,
+            'created_at': created,
+            'updated_at': created,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='SQLite file to fill (default: DATABASE_URL, else todo.db)')
+    parser.add_argument('--tasks', type=int, default=10000)
+    parser.add_argument('--habits', type=int, default=100)
+    parser.add_argument('--years', type=float, default=3, help='length of the longest habit histories')
+    parser.add_argument('--bucket-list', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='drop every table first')
+    args = parser.parse_args()
+
+    if args.db:
+        os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+    from habit_stats import rebuild_habit_stats
+    from models import Base, BucketList, Habit, HabitCompletion, Session, Task, engine, init_db, log_changes
+
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    init_db()
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = date.today()
+    session = Session()
+    started = time.perf_counter()
+
+    task_ids = bulk_insert(session, Task, task_rows(rng, args.tasks, now))
+    log_changes(session, 'tasks', task_ids)
+
+    habits = habit_rows(rng, args.habits, args.years, today)
+    habit_ids = bulk_insert(session, Habit, habits)
+    log_changes(session, 'habits', habit_ids)
+    completions = [row for habit_id, habit in zip(habit_ids, habits) for row in completion_rows(rng, habit_id, habit, today)]
+    completion_ids = bulk_insert(session, HabitCompletion, completions)
+    log_changes(session, 'habit_completions', completion_ids)
+
+    item_ids = bulk_insert(session, BucketList, bucket_list_rows(rng, args.bucket_list, now))
+    log_changes(session, 'bucket_lists', item_ids)
+
+    # Streaks and rolling counts, as record_completion would have kept them
+    for habit in session.query(Habit).filter(Habit.id.in_(habit_ids)):
+        rebuild_habit_stats(session, habit, today)
+    session.commit()
+    Session.remove()
+
+    print(f"Inserted {len(task_ids)} tasks, {len(habit_ids)} habits with {len(completion_ids)} completions "
+          f"and {len(item_ids)} bucket list items into {engine.url.database} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""Load test every API route: throughput, p50/p95/p99 latency and queries per request.
+
+    python benchmarks/generate_data.py --db /tmp/load.db --reset
+    python benchmarks/load_test.py --db /tmp/load.db --concurrency 1 8 --output results/before.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --concurrency 16 --requests 500
+    python benchmarks/load_test.py --compare results/before.json results/after.json
+
+Without --url the app runs in-process behind the Flask test client, one client
+per worker thread; with --url the same scenarios go over HTTP with one
+keep-alive connection per worker. Queries per request come from the server's
+/metrics histograms, so they work in both modes. Results are saved as JSON so
+runs can be compared with --compare.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Routes that are not part of the API under test
+UNTESTED_ROUTES = {'/static/<path:filename>', '/profiles', '/profiles/<name>'}
+_SAMPLE_RE = re.compile(r'^http_request_queries_(sum|count)\{route="([^"]*)"\} (\S+)$')
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json_body=None, body=None, headers=None):
+        response = self.client.open(path, method=method, json=json_body, data=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def request(self, method, path, json_body=None, body=None, headers=None):
+        headers = dict(headers or {})
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # The server closed an idle keep-alive connection; reconnect once
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        return response.status, response.read()
+
+
+class Pool:
+    """Ids a destructive scenario may use up, each once, across threads."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            return self.ids.pop() if self.ids else None
+
+
+class Fixture:
+    """Ids and inputs the scenarios draw from, read through the API itself."""
+
+    def __init__(self, client, rng):
+        def get(path):
+            status, body = client.request('GET', path)
+            if status != 200:
+                raise RuntimeError(f'GET {path} returned {status}')
+            return json.loads(body)
+
+        task_ids = [row['id'] for row in get('/tasks?fields=id')]
+        self.habits = get('/habits')
+        item_ids = [row['id'] for row in get('/bucket-list?fields=id')]
+        if not (task_ids and self.habits and item_ids):
+            raise SystemExit('The database is empty; fill it with benchmarks/generate_data.py first')
+        self.habit_ids = [habit['id'] for habit in self.habits]
+        # The last tenth of each table may be deleted; the rest is only read and updated
+        self.task_ids, deletable_tasks = split(task_ids)
+        self.item_ids, deletable_items = split(item_ids)
+        self.habit_ids, deletable_habits = split(self.habit_ids)
+        self.deletable = {'tasks': Pool(deletable_tasks), 'items': Pool(deletable_items),
+                          'habits': Pool(deletable_habits)}
+        self.words = sorted({word.lower() for row in get('/tasks?fields=title&limit=500')
+                             for word in row['title'].split() if len(word) > 3})
+        self.upload = image_bytes()
+        status, body = client.request('POST', '/upload', body=self.upload, headers={'Content-Type': 'image/png'})
+        self.upload_url = urlsplit(json.loads(body)['url']).path if status == 200 else None
+        self.rng = rng
+
+
+def split(ids):
+    keep = max(len(ids) - len(ids) // 10, 1)
+    return ids[:keep], ids[keep:]
+
+
+def image_bytes():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (200, 120, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def new_task(rng):
+    return {'title': f'Load test task {rng.randrange(10 ** 6)}', 'description': 'Created by load_test.py',
+            'category': rng.choice(('work', 'personal', 'shopping', 'urgent')),
+            'priority': rng.choice(('low', 'medium', 'high'))}
+
+
+# name -> (method, route, build(rng, fixture) -> (path, json body, raw body, headers) or None)
+SCENARIOS = {
+    'list_tasks': ('GET', '/tasks', lambda rng, f: ('/tasks', None, None, None)),
+    'tasks_page': ('GET', '/tasks', lambda rng, f: (f'/tasks?limit=50&cursor={rng.choice(f.task_ids)}',
+                                                     None, None, None)),
+    'add_task': ('POST', '/add', lambda rng, f: ('/add', new_task(rng), None, None)),
+    'update_task': ('PUT', '/update/<int:task_id>',
+                    lambda rng, f: (f'/update/{rng.choice(f.task_ids)}', {'completed': rng.random() < 0.5},
+                                    None, None)),
+    'remove_task': ('DELETE', '/remove/<int:task_id>', lambda rng, f: removal('/remove', f.deletable['tasks'])),
+    'batch': ('POST', '/batch', lambda rng, f: ('/batch', {'tasks': {
+        'create': [new_task(rng) for _ in range(10)],
+        'update': [{'id': rng.choice(f.task_ids), 'completed': True} for _ in range(10)]}}, None, None)),
+    'list_habits': ('GET', '/habits', lambda rng, f: ('/habits', None, None, None)),
+    'habits_for_day': ('GET', '/habits', lambda rng, f: (f'/habits?date={date.today().isoformat()}',
+                                                         None, None, None)),
+    'add_habit': ('POST', '/add_habit', lambda rng, f: ('/add_habit', {
+        'name': f'Load test habit {rng.randrange(10 ** 6)}', 'frequency': 'daily', 'category': 'health'},
+        None, None)),
+    'update_habit': ('PUT', '/update_habit/<int:habit_id>', lambda rng, f: (
+        f'/update_habit/{rng.choice(f.habit_ids)}', {'reminder': rng.random() < 0.5}, None, None)),
+    'complete_habit': ('POST', '/complete_habit/<int:habit_id>',
+                       lambda rng, f: (f'/complete_habit/{rng.choice(f.habit_ids)}', None, None, None)),
+    'delete_habit': ('DELETE', '/delete_habit/<int:habit_id>',
+                     lambda rng, f: removal('/delete_habit', f.deletable['habits'])),
+    'habit_completions': ('GET', '/habit_completions/<int:habit_id>',
+                          lambda rng, f: (f'/habit_completions/{rng.choice(f.habit_ids)}', None, None, None)),
+    'habit_stats': ('GET', '/habit_stats/<int:habit_id>',
+                    lambda rng, f: (f'/habit_stats/{rng.choice(f.habit_ids)}', None, None, None)),
+    'list_bucket_list': ('GET', '/bucket-list', lambda rng, f: ('/bucket-list', None, None, None)),
+    'add_bucket_list_item': ('POST', '/bucket-list', lambda rng, f: ('/bucket-list', {
+        'title': f'Load test goal {rng.randrange(10 ** 6)}', 'category': 'personal', 'priority': 'medium',
+        'tags': ['travel'], 'steps': [{'title': 'Plan', 'completed': False}]}, None, None)),
+    'update_bucket_list_item': ('PUT', '/bucket-list/<int:item_id>', lambda rng, f: (
+        f'/bucket-list/{rng.choice(f.item_ids)}', {'progress': rng.randint(0, 100)}, None, None)),
+    'start_bucket_list_item': ('PUT', '/bucket-list/<int:item_id>/start', lambda rng, f: (
+        f'/bucket-list/{rng.choice(f.item_ids)}/start', None, None, None)),
+    'complete_bucket_list_item': ('PUT', '/bucket-list/<int:item_id>/complete', lambda rng, f: (
+        f'/bucket-list/{rng.choice(f.item_ids)}/complete', None, None, None)),
+    'delete_bucket_list_item': ('DELETE', '/bucket-list/<int:item_id>',
+                                lambda rng, f: removal('/bucket-list', f.deletable['items'])),
+    'bucket_list_stats': ('GET', '/bucket-list/stats', lambda rng, f: ('/bucket-list/stats', None, None, None)),
+    'bucket_list_search': ('GET', '/bucket-list/search', lambda rng, f: (
+        f"/bucket-list/search?query={rng.choice(('trip', 'learn', 'run', 'see'))}", None, None, None)),
+    'search': ('GET', '/search', lambda rng, f: (f'/search?q={rng.choice(f.words)[:rng.randint(3, 6)]}',
+                                                 None, None, None)),
+    'sync': ('GET', '/sync', lambda rng, f: ('/sync?since=1', None, None, None)),
+    'suggest_similar': ('POST', '/api/suggestions/similar', lambda rng, f: (
+        '/api/suggestions/similar', {'text': ' '.join(rng.sample(f.words, 2))}, None, None)),
+    'suggest_similar_batch': ('POST', '/api/suggestions/similar/batch', lambda rng, f: (
+        '/api/suggestions/similar/batch', {'texts': [' '.join(rng.sample(f.words, 2)) for _ in range(16)]},
+        None, None)),
+    'suggest_category': ('POST', '/api/suggestions/category', lambda rng, f: (
+        '/api/suggestions/category', {'title': ' '.join(rng.sample(f.words, 2)), 'description': ''},
+        None, None)),
+    'suggest_category_batch': ('POST', '/api/suggestions/category/batch', lambda rng, f: (
+        '/api/suggestions/category/batch',
+        {'items': [{'title': ' '.join(rng.sample(f.words, 2)), 'description': ''} for _ in range(16)]},
+        None, None)),
+    'upload': ('POST', '/upload', lambda rng, f: ('/upload', None, f.upload, {'Content-Type': 'image/png'})),
+    'serve_upload': ('GET', '/uploads/<filename>', lambda rng, f: (f.upload_url, None, None, None)
+                     if f.upload_url else None),
+    'metrics': ('GET', '/metrics', lambda rng, f: ('/metrics', None, None, None)),
+    'pool_metrics': ('GET', '/metrics/pool', lambda rng, f: ('/metrics/pool', None, None, None)),
+    'suggestion_cache_metrics': ('GET', '/metrics/suggestion-cache',
+                                 lambda rng, f: ('/metrics/suggestion-cache', None, None, None)),
+}
+
+
+def removal(prefix, pool):
+    row_id = pool.take()
+    return (f'{prefix}/{row_id}', None, None, None) if row_id is not None else None
+
+
+def query_totals(client):
+    """``{route: (sum, count)}`` of the server's per-request query histogram."""
+    status, body = client.request('GET', '/metrics')
+    totals = {}
+    for line in body.decode().splitlines() if status == 200 else []:
+        match = _SAMPLE_RE.match(line)
+        if match:
+            kind, route, value = match.groups()
+            total, count = totals.get(route, (0.0, 0.0))
+            totals[route] = (total + float(value), count) if kind == 'sum' else (total, count + float(value))
+    return totals
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_scenario(name, make_client, fixture, concurrency, requests, seed):
+    method, route, build = SCENARIOS[name]
+    latencies, errors, skipped = [], [0], [0]
+    lock = threading.Lock()
+
+    def worker(index):
+        client = make_client()
+        rng = random.Random(f'{seed}-{name}-{index}')
+        mine = []
+        for _ in range(requests // concurrency + (index < requests % concurrency)):
+            spec = build(rng, fixture)
+            if spec is None:
+                with lock:
+                    skipped[0] += 1
+                continue
+            path, json_body, body, headers = spec
+            start = time.perf_counter()
+            status, _body = client.request(method, path, json_body, body, headers)
+            mine.append((time.perf_counter() - start) * 1000)
+            if status >= 400 and status != 404:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+
+    monitor = make_client()
+    before = query_totals(monitor)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = query_totals(monitor)
+
+    queries = None
+    if route in after:
+        total = after[route][0] - before.get(route, (0.0, 0.0))[0]
+        count = after[route][1] - before.get(route, (0.0, 0.0))[1]
+        queries = round(total / count, 2) if count else None
+
+    latencies.sort()
+    return {
+        'scenario': name, 'method': method, 'route': route, 'concurrency': concurrency,
+        'requests': len(latencies), 'errors': errors[0], 'skipped': skipped[0],
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 3) if latencies else None,
+        'queries_per_request': queries,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'scenario':>26} {'conc':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'queries':>7} {'errors':>6}")
+    for row in results:
+        cells = [row['throughput_rps'], row['p50_ms'], row['p95_ms'], row['p99_ms']]
+        print(f"{row['scenario']:>26} {row['concurrency']:>4} "
+              + ' '.join(f'{cell:>9}' if cell is not None else f"{'-':>9}" for cell in cells)
+              + f" {row['queries_per_request'] if row['queries_per_request'] is not None else '-':>7}"
+              f" {row['errors']:>6}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {(row['scenario'], row['concurrency']): row for row in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+
+    def change(before, after):
+        if before in (None, 0) or after is None:
+            return '-'
+        return f'{(after - before) / before * 100:+.1f}%'
+
+    print(f"{'scenario':>26} {'conc':>4} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>9}")
+    for row in new:
+        base = old.get((row['scenario'], row['concurrency']))
+        if base is None:
+            continue
+        print(f"{row['scenario']:>26} {row['concurrency']:>4} "
+              f"{change(base['throughput_rps'], row['throughput_rps']):>9} "
+              f"{change(base['p50_ms'], row['p50_ms']):>9} {change(base['p95_ms'], row['p95_ms']):>9} "
+              f"{change(base['p99_ms'], row['p99_ms']):>9} "
+              f"{change(base['queries_per_request'], row['queries_per_request']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='server to test over HTTP; default is in-process')
+    parser.add_argument('--db', help='SQLite file for in-process runs (default: DATABASE_URL, else todo.db)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and concurrency level')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two saved result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.url:
+        def make_client():
+            return HttpClient(args.url)
+    else:
+        if args.db:
+            os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+        sys.path.insert(0, BACKEND_DIR)
+        from app import app
+
+        missing = {rule.rule for rule in app.url_map.iter_rules()} - UNTESTED_ROUTES - {
+            route for _method, route, _build in SCENARIOS.values()}
+        if missing:
+            print(f"No scenario covers: {', '.join(sorted(missing))}")
+
+        def make_client():
+            return InProcessClient(app)
+
+    fixture = Fixture(make_client(), random.Random(args.seed))
+    results = []
+    for concurrency in args.concurrency:
+        for name in args.scenarios:
+            results.append(run_scenario(name, make_client, fixture, concurrency, args.requests, args.seed))
+    print_results(results)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.utcnow().isoformat(),
+                    'revision': git_revision(),
+                    'target': args.url or 'in-process',
+                    'database': None if args.url else os.environ.get('DATABASE_URL', 'sqlite:///todo.db'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'requests': args.requests,
+                    'seed': args.seed,
+                    'rows': {'tasks': len(fixture.task_ids), 'habits': len(fixture.habits),
+                             'bucket_list': len(fixture.item_ids)},
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f'Saved {len(results)} results to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""Bulk creates, updates and deletes for tasks, habits and bucket-list items.
+
+``apply_batch`` validates every item first, then writes each kind of change
+for each table with one multi-row statement inside a single transaction:
+an INSERT ... RETURNING for creates, an executemany UPDATE keyed by primary
+key for updates and one DELETE ... IN for deletes. In ``atomic`` mode any
+invalid item aborts the whole batch; in ``best_effort`` mode invalid items
+are reported and the rest are applied. The caller commits.
+"""
+from datetime import datetime
+from habit_stats import rebuild_habit_stats
+from models import (Task, Habit, HabitCompletion, HabitStats, BucketList, BucketListStatus, Category,
+                    Priority, log_changes)
+from sqlalchemy import delete, insert, update
+
+MODES = ('atomic', 'best_effort')
+MAX_BATCH_ITEMS = 5000
+REQUIRED = object()
+
+
+def text(value):
+    if value is not None and not isinstance(value, str):
+        raise ValueError('must be a string')
+    return value
+
+def flag(value):
+    if not isinstance(value, bool):
+        raise ValueError('must be true or false')
+    return value
+
+def number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError('must be a number')
+    return value
+
+def timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+def day(value):
+    # Habits store midnight of the start day, as add_habit does
+    return datetime.fromisoformat(value.split('T')[0]) if value else None
+
+def member_of(enum_class):
+    def convert(value):
+        try:
+            return enum_class[value.upper()]
+        except (AttributeError, KeyError):
+            raise ValueError(f"must be one of {', '.join(member.value for member in enum_class)}")
+    return convert
+
+def passthrough(value):
+    return value
+
+
+# Field -> (converter, default on create). REQUIRED fields must be given on create.
+TASK_SPEC = {
+    'title': (text, REQUIRED),
+    'description': (text, ''),
+    'category': (member_of(Category), REQUIRED),
+    'priority': (member_of(Priority), REQUIRED),
+    'deadline': (timestamp, None),
+    'completed': (flag, False)
+}
+
+HABIT_SPEC = {
+    'name': (text, REQUIRED),
+    'description': (text, ''),
+    'frequency': (text, REQUIRED),
+    'category': (text, 'health'),
+    'start_date': (day, None),
+    'target_count': (number, 1),
+    'reminder': (flag, False),
+    'streak': (number, 0),
+    'last_completed': (timestamp, None)
+}
+
+BUCKET_LIST_SPEC = {
+    'title': (text, REQUIRED),
+    'description': (text, None),
+    'deadline': (timestamp, None),
+    'category': (member_of(Category), REQUIRED),
+    'priority': (member_of(Priority), REQUIRED),
+    'status': (member_of(BucketListStatus), BucketListStatus.NOT_STARTED),
+    'progress': (number, 0),
+    'image_url': (text, None),
+    'inspiration_images': (passthrough, []),
+    'tags': (passthrough, []),
+    'reward': (text, None),
+    'steps': (passthrough, []),
+    'motivation': (text, None)
+}
+
+# Request key -> (model, field spec)
+TABLES = {
+    'tasks': (Task, TASK_SPEC),
+    'habits': (Habit, HABIT_SPEC),
+    'bucket_list': (BucketList, BUCKET_LIST_SPEC)
+}
+
+
+def convert(spec, data, create):
+    """Column values for one item; raises ValueError naming the bad field."""
+    if not isinstance(data, dict):
+        raise ValueError('item must be an object')
+    unknown = [name for name in data if name != 'id' and name not in spec]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+    values = {}
+    for name, (converter, default) in spec.items():
+        if name in data:
+            try:
+                values[name] = converter(data[name])
+            except (TypeError, ValueError) as e:
+                raise ValueError(f'{name}: {e}')
+        elif create:
+            if default is REQUIRED:
+                raise ValueError(f'{name} is required')
+            # Copy list defaults so rows never share one JSON value
+            values[name] = list(default) if isinstance(default, list) else default
+    return values
+
+
+def existing_ids(session, model, ids):
+    return {row_id for (row_id,) in session.query(model.id).filter(model.id.in_(ids))} if ids else set()
+
+def item_id(item):
+    row_id = item.get('id') if isinstance(item, dict) else item
+    if isinstance(row_id, bool) or not isinstance(row_id, int):
+        raise ValueError('id must be an integer')
+    return row_id
+
+
+def count_items(payload):
+    """Number of items in ``payload``; raises ValueError if it is malformed."""
+    count = 0
+    for table in TABLES:
+        ops = payload.get(table) or {}
+        if not isinstance(ops, dict):
+            raise ValueError(f'{table} must be an object with create, update and delete lists')
+        for op in ('create', 'update', 'delete'):
+            items = ops.get(op) or []
+            if not isinstance(items, list):
+                raise ValueError(f'{table}.{op} must be a list')
+            count += len(items)
+    return count
+
+def succeeded(results):
+    return all(result['ok'] for table_results in results.values()
+               for op_results in table_results.values() for result in op_results)
+
+
+def validate(session, payload):
+    """Per table, the valid work plus one result per item: ``{'ok': False, 'error'}`` if invalid."""
+    plans, results = {}, {}
+    for table, (model, spec) in TABLES.items():
+        ops = payload.get(table) or {}
+        creates, updates, deletes = ops.get('create') or [], ops.get('update') or [], ops.get('delete') or []
+        plan = {'create': [], 'update': [], 'delete': []}
+        result = {'create': [None] * len(creates), 'update': [None] * len(updates), 'delete': [None] * len(deletes)}
+
+        for position, data in enumerate(creates):
+            try:
+                plan['create'].append((position, convert(spec, data, create=True)))
+            except ValueError as e:
+                result['create'][position] = {'ok': False, 'error': str(e)}
+
+        wanted = {}
+        for op, items in (('update', updates), ('delete', deletes)):
+            for position, item in enumerate(items):
+                try:
+                    row_id = item_id(item)
+                    values = convert(spec, item, create=False) if op == 'update' else None
+                    wanted.setdefault(op, []).append((position, row_id, values))
+                except ValueError as e:
+                    result[op][position] = {'ok': False, 'error': str(e)}
+
+        # One lookup per table tells which updated/deleted ids exist
+        found = existing_ids(session, model, {row_id for entries in wanted.values() for _p, row_id, _v in entries})
+        for op, entries in wanted.items():
+            for position, row_id, values in entries:
+                if row_id not in found:
+                    result[op][position] = {'ok': False, 'id': row_id, 'error': 'not found'}
+                else:
+                    plan[op].append((position, row_id, values))
+        plans[table], results[table] = plan, result
+    return plans, results
+
+
+def apply_batch(session, payload, mode='atomic'):
+    """Validate and apply ``payload``; returns ``(applied, results, effects)``.
+
+    ``payload`` maps ``tasks``, ``habits`` and ``bucket_list`` to
+    ``{'create': [...], 'update': [{'id': ...}, ...], 'delete': [ids]}``.
+    ``effects`` lists, per table, the created, updated and deleted ids, for
+    work the caller does after commit (search index, caches).
+    """
+    plans, results = validate(session, payload)
+    failed = any(result and not result['ok']
+                 for table_results in results.values() for op_results in table_results.values()
+                 for result in op_results)
+    if failed and mode == 'atomic':
+        for table_results in results.values():
+            for op_results in table_results.values():
+                for position, result in enumerate(op_results):
+                    if result is None:
+                        op_results[position] = {'ok': False, 'error': 'not applied'}
+        return False, results, {}
+
+    now = datetime.utcnow()
+    effects = {}
+    for table, (model, _spec) in TABLES.items():
+        plan = plans[table]
+        effect = effects[table] = {'created': [], 'updated': {}, 'deleted': []}
+
+        if plan['create']:
+            rows = [values for _position, values in plan['create']]
+            # sort_by_parameter_order would fall back to one INSERT per row on SQLite.
+            # Ids are allocated in VALUES order, only RETURNING's order is unspecified.
+            ids = sorted(session.scalars(insert(model).returning(model.id), rows).all())
+            for (position, _values), row_id in zip(plan['create'], ids):
+                results[table]['create'][position] = {'ok': True, 'id': row_id}
+            effect['created'] = list(ids)
+
+        updates = [(position, row_id, values) for position, row_id, values in plan['update'] if values]
+        if updates:
+            # Rows with the same set of changed columns share one executemany
+            by_columns = {}
+            for _position, row_id, values in updates:
+                row = dict(values, id=row_id)
+                if hasattr(model, 'updated_at'):
+                    row['updated_at'] = now
+                by_columns.setdefault(tuple(sorted(row)), []).append(row)
+            for rows in by_columns.values():
+                session.execute(update(model), rows)
+        for position, row_id, values in plan['update']:
+            results[table]['update'][position] = {'ok': True, 'id': row_id}
+            effect['updated'][row_id] = values or {}
+
+        deleted = [row_id for _position, row_id, _values in plan['delete']]
+        if deleted:
+            if model is Habit:
+                delete_habit_children(session, deleted)
+            session.execute(delete(model).where(model.id.in_(deleted)))
+        for position, row_id, _values in plan['delete']:
+            results[table]['delete'][position] = {'ok': True, 'id': row_id}
+        effect['deleted'] = deleted
+
+        log_changes(session, model.__tablename__, effect['created'] + list(effect['updated']))
+        log_changes(session, model.__tablename__, deleted, deleted=True)
+
+    # Streak periods depend on the frequency, as in update_habit
+    refrequenced = [row_id for row_id, values in effects['habits']['updated'].items() if 'frequency' in values]
+    if refrequenced:
+        for habit in session.query(Habit).filter(Habit.id.in_(refrequenced)):
+            rebuild_habit_stats(session, habit)
+    return True, results, effects
+
+
+def delete_habit_children(session, habit_ids):
+    # The ORM cascade does this for single deletes; bulk DELETEs bypass it
+    completion_ids = [row_id for (row_id,) in
+                      session.query(HabitCompletion.id).filter(HabitCompletion.habit_id.in_(habit_ids))]
+    session.execute(delete(HabitCompletion).where(HabitCompletion.habit_id.in_(habit_ids)))
+    session.execute(delete(HabitStats).where(HabitStats.habit_id.in_(habit_ids)))
+    log_changes(session, HabitCompletion.__tablename__, completion_ids, deleted=True)
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Point models/app at a throwaway database, embedding index, upload folder and
+# profile spool before either is imported, so the tests never touch todo.db,
+# ml_models/, uploads/ or profiles/
+_db_dir = tempfile.mkdtemp(prefix='todo-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['EMBEDDING_INDEX_DIR'] = os.path.join(_db_dir, 'index')
+os.environ['UPLOAD_FOLDER'] = os.path.join(_db_dir, 'uploads')
+os.environ['PROFILE_DIR'] = os.path.join(_db_dir, 'profiles')
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def client():
+    from app import app, invalidate_bucket_list_stats
+    from models import Base, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    invalidate_bucket_list_stats()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def query_counter():
+    """Collects every SQL statement the engine executes while the test runs."""
+    from models import engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', record)
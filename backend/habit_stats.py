@@ -0,0 +1,202 @@
+"""Materialized per-habit statistics.
+
+Each habit has one ``HabitStats`` row holding its streaks, totals and the
+per-day counts of the trailing year. ``record_completion`` updates it in the
+same session as the completion itself, so reading stats never touches the
+habit's completion history. Run this module to rebuild the rows:
+
+    python habit_stats.py              # every habit
+    python habit_stats.py --habit 3    # a single habit
+"""
+from datetime import date, datetime, timedelta
+from models import Session, Habit, HabitCompletion, HabitStats
+from sqlalchemy import false
+from sqlalchemy.dialects import postgresql, sqlite
+import argparse
+
+ROLLING_WINDOWS = (7, 30, 365)
+HISTORY_DAYS = max(ROLLING_WINDOWS)
+# INSERT constructs with ON CONFLICT support, by dialect name
+UPSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def period_start(day, frequency):
+    """First day of the daily/weekly/monthly period containing ``day``."""
+    if frequency == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if frequency == 'monthly':
+        return day.replace(day=1)
+    return day
+
+def previous_period(start, frequency):
+    if frequency == 'weekly':
+        return start - timedelta(weeks=1)
+    if frequency == 'monthly':
+        return (start - timedelta(days=1)).replace(day=1)
+    return start - timedelta(days=1)
+
+def rolling_counts(daily_counts, today):
+    """Sum of completion counts over each rolling window ending today."""
+    counts = dict.fromkeys(ROLLING_WINDOWS, 0)
+    for day, count in daily_counts.items():
+        age = (today - date.fromisoformat(day)).days
+        for window in ROLLING_WINDOWS:
+            if 0 <= age < window:
+                counts[window] += count
+    return counts
+
+def trim_history(daily_counts, today):
+    cutoff = (today - timedelta(days=HISTORY_DAYS)).isoformat()
+    return {day: count for day, count in daily_counts.items() if day >= cutoff}
+
+def apply_rolling_counts(stats, today):
+    counts = rolling_counts(stats.daily_counts or {}, today)
+    stats.count_7d = counts[7]
+    stats.count_30d = counts[30]
+    stats.count_365d = counts[365]
+    stats.as_of = today
+
+
+def upsert_completion(session, habit, day):
+    """Count one completion of ``habit`` on ``day`` with a single statement.
+
+    Inserts the day's row or bumps its count in one INSERT ... ON CONFLICT DO
+    UPDATE ... RETURNING against the unique (habit_id, completed_date) index,
+    so concurrent completions can neither add a second row nor lose an
+    increment. Daily habits count once per day. Returns ``(id, count)``, or
+    None if a daily habit was already completed. As the transaction's first
+    write it also takes SQLite's write lock, so a following
+    ``record_completion`` reads a stats row no one else is updating.
+    """
+    stmt = UPSERTS[session.get_bind().dialect.name](HabitCompletion).values(
+        habit_id=habit.id, completed_date=day, count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HabitCompletion.habit_id, HabitCompletion.completed_date],
+        set_={'count': HabitCompletion.count + 1},
+        where=false() if habit.frequency == 'daily' else None,
+    )
+    return session.execute(stmt.returning(HabitCompletion.id, HabitCompletion.count)).first()
+
+
+def record_completion(session, habit, day, increment=1):
+    """Fold ``increment`` completions on ``day`` into the habit's stats row.
+
+    Call this after adding or updating the HabitCompletion, in the same
+    transaction.
+    """
+    if habit.stats is None:
+        # First completion, or a habit that predates the stats table. The
+        # rebuild flushes first, so it already counts this completion.
+        return rebuild_habit_stats(session, habit, today=day)
+
+    stats = habit.stats
+
+    period = period_start(day, habit.frequency)
+    if stats.last_period is None or period > stats.last_period:
+        if stats.last_period is not None and previous_period(period, habit.frequency) == stats.last_period:
+            stats.current_streak += 1
+        else:
+            stats.current_streak = 1
+        stats.last_period = period
+        stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+
+    daily_counts = dict(stats.daily_counts or {})
+    key = day.isoformat()
+    daily_counts[key] = daily_counts.get(key, 0) + increment
+    # Reassign rather than mutate so the JSON column is flagged as changed
+    stats.daily_counts = trim_history(daily_counts, day)
+    stats.total_completions += increment
+    apply_rolling_counts(stats, day)
+
+    habit.streak = stats.current_streak
+    return stats
+
+
+def rebuild_habit_stats(session, habit, today=None):
+    """Recompute a habit's stats row from its full completion history."""
+    # The UTC date, like complete_habit, so rebuilt and incremental stats agree
+    today = today or datetime.utcnow().date()
+    # Pending completions (and a new habit's id) must reach the database first
+    session.flush()
+    rows = session.query(HabitCompletion.completed_date, HabitCompletion.count).filter(
+        HabitCompletion.habit_id == habit.id
+    ).order_by(HabitCompletion.completed_date).all()
+
+    current_streak = longest_streak = total = 0
+    last_period = None
+    daily_counts = {}
+    for completed_date, count in rows:
+        count = count or 1
+        total += count
+        daily_counts[completed_date.isoformat()] = daily_counts.get(completed_date.isoformat(), 0) + count
+
+        period = period_start(completed_date, habit.frequency)
+        if period == last_period:
+            continue
+        if last_period is not None and previous_period(period, habit.frequency) == last_period:
+            current_streak += 1
+        else:
+            current_streak = 1
+        last_period = period
+        longest_streak = max(longest_streak, current_streak)
+
+    stats = habit.stats or HabitStats(habit=habit)
+    stats.current_streak = current_streak
+    stats.longest_streak = longest_streak
+    stats.last_period = last_period
+    stats.total_completions = total
+    stats.daily_counts = trim_history(daily_counts, today)
+    apply_rolling_counts(stats, today)
+    session.add(stats)
+
+    habit.streak = current_streak
+    return stats
+
+
+def stats_snapshot(habit, stats, today):
+    """Read model for GET /habit_stats, computed from the stats row alone."""
+    daily_counts = stats.daily_counts or {}
+    if stats.as_of == today:
+        counts = {7: stats.count_7d, 30: stats.count_30d, 365: stats.count_365d}
+    else:
+        counts = rolling_counts(daily_counts, today)
+
+    # A streak only counts as current if its last period is this one or the one before
+    current_streak = stats.current_streak
+    this_period = period_start(today, habit.frequency)
+    if stats.last_period is None or stats.last_period < previous_period(this_period, habit.frequency):
+        current_streak = 0
+
+    thirty_days_ago = (today - timedelta(days=30)).isoformat()
+    history = {day: count for day, count in daily_counts.items() if day >= thirty_days_ago}
+
+    return {
+        'current_streak': current_streak,
+        'longest_streak': stats.longest_streak,
+        'total_completions': stats.total_completions,
+        'rolling_counts': {f'{window}d': counts[window] for window in ROLLING_WINDOWS},
+        'completion_history': history,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild materialized habit statistics.')
+    parser.add_argument('--habit', type=int, help='only rebuild this habit id')
+    args = parser.parse_args()
+
+    session = Session()
+    query = session.query(Habit)
+    if args.habit is not None:
+        query = query.filter(Habit.id == args.habit)
+
+    habits = query.all()
+    for habit in habits:
+        rebuild_habit_stats(session, habit)
+    session.commit()
+    Session.remove()
+    print(f"Rebuilt stats for {len(habits)} habit(s)")
+
+
+if __name__ == '__main__':
+    main()
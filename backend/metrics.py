@@ -0,0 +1,248 @@
+"""Request, SQL and AI-service instrumentation in the Prometheus text format.
+
+Metrics register themselves in ``REGISTRY`` when created and are rendered by
+``render()`` for the /metrics endpoint. ``instrument_app`` records per-route
+latency, status counts and in-flight requests; ``instrument_engine`` times
+every statement and attributes query counts and time to the current request.
+Set SLOW_QUERY_MS to log statements (with parameters) that take at least that
+long; SLOW_QUERY_LOG sends the log to a file instead of stderr.
+"""
+from bisect import bisect_left
+import functools
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=(), function=None):
+        """``function``, if given, returns the value (or ``{labels: value}``) at render time;
+        it may return None while there is nothing to report yet."""
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self):
+        """``(suffix, labelvalues, extra_labels, value)`` tuples for ``render``."""
+        if self.function is not None:
+            value = self.function()
+            if value is None:
+                return []
+            if not isinstance(value, dict):
+                value = {(): value}
+            return [('', labels, (), sample) for labels, sample in sorted(value.items())]
+        with self._lock:
+            return [('', labels, (), value) for labels, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.labelnames, labels, extra)} '
+                         f'{_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                # One count per bucket (the last is +Inf), then the sum
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for labels, counts in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    samples.append(('_bucket', labels, (('le', _format_value(bound)),), cumulative))
+                samples.append(('_sum', labels, (), counts[-1]))
+                samples.append(('_count', labels, (), cumulative))
+        return samples
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by route and status.', ['method', 'route', 'status'])
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to produce each response.', ['method', 'route'])
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled right now.')
+REQUEST_QUERIES = Histogram('http_request_queries', 'SQL statements issued per request.', ['route'],
+                            buckets=QUERY_COUNT_BUCKETS)
+REQUEST_QUERY_SECONDS = Histogram('http_request_query_seconds', 'Time spent in SQL per request.', ['route'])
+QUERY_SECONDS = Histogram('db_query_duration_seconds', 'SQL statement execution time.', ['operation'])
+SLOW_QUERIES = Counter('db_slow_queries_total', 'Statements at or over the slow-query threshold.')
+AI_CALL_SECONDS = Histogram('ai_service_call_seconds', 'Time spent in AIService calls.', ['method'])
+
+_ai_calls = threading.local()
+
+slow_query_threshold = float(os.environ['SLOW_QUERY_MS']) / 1000 if os.environ.get('SLOW_QUERY_MS') else None
+slow_query_log = logging.getLogger('todo.slow_queries')
+if os.environ.get('SLOW_QUERY_LOG'):
+    slow_query_log.addHandler(logging.FileHandler(os.environ['SLOW_QUERY_LOG']))
+    slow_query_log.setLevel(logging.WARNING)
+
+
+def ai_call(method):
+    """Decorator timing an AIService method into AI_CALL_SECONDS.
+
+    Only the outermost call adds to the current request's AI time, so methods
+    that call each other are not counted twice.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            depth = getattr(_ai_calls, 'depth', 0)
+            _ai_calls.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _ai_calls.depth = depth
+                AI_CALL_SECONDS.observe(elapsed, method)
+                if depth == 0 and has_request_context() and 'ai_time' in g:
+                    g.ai_time += elapsed
+        return timed
+    return decorator
+
+
+# Anything else a client sends is counted as 'other', so verbs cannot add series
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+def method_label():
+    return request.method if request.method in HTTP_METHODS else 'other'
+
+
+def route_label():
+    # The URL rule, not the path, so /update/1 and /update/2 share a series
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def instrument_app(app):
+    @app.before_request
+    def start_request_metrics():
+        IN_FLIGHT.inc()
+        g.metrics_start = time.perf_counter()
+        g.query_count = 0
+        g.query_time = 0.0
+        g.ai_time = 0.0
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exception=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        IN_FLIGHT.dec()
+        route = route_label()
+        status = 500 if exception is not None else g.get('metrics_status', 500)
+        method = method_label()
+        REQUEST_SECONDS.observe(time.perf_counter() - start, method, route)
+        REQUESTS.inc(method, route, str(status))
+        REQUEST_QUERIES.observe(g.get('query_count', 0), route)
+        REQUEST_QUERY_SECONDS.observe(g.get('query_time', 0.0), route)
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        QUERY_SECONDS.observe(elapsed, statement.lstrip().split(None, 1)[0].upper() if statement.strip() else '')
+        in_request = has_request_context() and 'query_count' in g
+        if in_request:
+            g.query_count += 1
+            g.query_time += elapsed
+        if slow_query_threshold is not None and elapsed >= slow_query_threshold:
+            SLOW_QUERIES.inc()
+            slow_query_log.warning('slow query %.1f ms%s: %s params=%r', elapsed * 1000,
+                                   f' in {method_label()} {route_label()}' if in_request else '',
+                                   statement, parameters)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_query_timer(exception_context):
+        # after_cursor_execute never runs for a failed statement
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_start_time'):
+            connection.info['query_start_time'].pop()
@@ -0,0 +1,50 @@
+"""add FTS5 full-text search indexes
+
+Revision ID: 2886fb2edeca
+Revises: 8163edae1352
+Create Date: 2026-10-17 16:02:51.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2886fb2edeca'
+down_revision: Union[str, None] = '8163edae1352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexed columns as of this revision; models.SEARCH_INDEXES is the live copy
+SEARCH_INDEXES = {
+    'tasks': ('title', 'description'),
+    'bucket_lists': ('title', 'description', 'tags', 'motivation', 'steps'),
+    'habits': ('name', 'description'),
+}
+
+
+def upgrade() -> None:
+    for table, columns in SEARCH_INDEXES.items():
+        fts = f'{table}_fts'
+        names = ', '.join(columns)
+        new = ', '.join(f'new.{column}' for column in columns)
+        old = ', '.join(f'old.{column}' for column in columns)
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+        insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+
+        op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', "
+                   f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} "
+                   f"BEGIN {delete_old} {insert_new} END")
+        # Index the rows that already exist
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for table in SEARCH_INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {table}_fts')
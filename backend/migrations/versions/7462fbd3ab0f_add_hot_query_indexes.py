@@ -0,0 +1,55 @@
+"""add indexes for hot filter columns
+
+Revision ID: 7462fbd3ab0f
+Revises: f5e232c96088
+Create Date: 2026-10-17 09:40:02.771563
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7462fbd3ab0f'
+down_revision: Union[str, None] = 'f5e232c96088'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fold duplicate same-day completions into the oldest row so the unique
+    # index can be built
+    op.execute("""
+        UPDATE habit_completions
+        SET count = (
+            SELECT SUM(COALESCE(dup.count, 1))
+            FROM habit_completions AS dup
+            WHERE dup.habit_id = habit_completions.habit_id
+              AND dup.completed_date = habit_completions.completed_date
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM habit_completions
+            GROUP BY habit_id, completed_date
+            HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM habit_completions
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM habit_completions
+            GROUP BY habit_id, completed_date
+        )
+    """)
+
+    op.create_index('ix_habit_completions_habit_date', 'habit_completions',
+                    ['habit_id', 'completed_date'], unique=True, if_not_exists=True)
+    op.create_index('ix_habits_start_date', 'habits', ['start_date'], if_not_exists=True)
+    op.create_index('ix_bucket_lists_status', 'bucket_lists', ['status'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bucket_lists_status', table_name='bucket_lists')
+    op.drop_index('ix_habits_start_date', table_name='habits')
+    op.drop_index('ix_habit_completions_habit_date', table_name='habit_completions')
@@ -0,0 +1,46 @@
+"""add change log and tasks.updated_at
+
+Revision ID: 8163edae1352
+Revises: 8daeb4464c8d
+Create Date: 2026-10-17 14:21:09.518330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8163edae1352'
+down_revision: Union[str, None] = '8daeb4464c8d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('tasks')}
+    if 'updated_at' not in columns:
+        op.add_column('tasks', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute('UPDATE tasks SET updated_at = created_at')
+
+    # Starts empty: rows that predate it reach clients through a full /sync
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+        if_not_exists=True
+    )
+    op.create_index('ix_change_log_table_id', 'change_log', ['table_name', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_change_log_table_id', table_name='change_log')
+    op.drop_table('change_log')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('updated_at')
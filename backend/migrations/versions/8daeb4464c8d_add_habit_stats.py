@@ -0,0 +1,42 @@
+"""add materialized habit stats
+
+Revision ID: 8daeb4464c8d
+Revises: 7462fbd3ab0f
+Create Date: 2026-10-17 11:05:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8daeb4464c8d'
+down_revision: Union[str, None] = '7462fbd3ab0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are filled lazily on first read, or all at once with "python habit_stats.py"
+    op.create_table(
+        'habit_stats',
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=True),
+        sa.Column('longest_streak', sa.Integer(), nullable=True),
+        sa.Column('last_period', sa.Date(), nullable=True),
+        sa.Column('total_completions', sa.Integer(), nullable=True),
+        sa.Column('count_7d', sa.Integer(), nullable=True),
+        sa.Column('count_30d', sa.Integer(), nullable=True),
+        sa.Column('count_365d', sa.Integer(), nullable=True),
+        sa.Column('as_of', sa.Date(), nullable=True),
+        sa.Column('daily_counts', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('habit_id'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('habit_stats')
@@ -0,0 +1,95 @@
+"""initial schema
+
+Revision ID: f5e232c96088
+Revises: 
+Create Date: 2026-10-17 09:12:44.318102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5e232c96088'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRIORITY = sa.Enum('LOW', 'MEDIUM', 'HIGH', name='priority')
+CATEGORY = sa.Enum('WORK', 'PERSONAL', 'SHOPPING', 'URGENT', name='category')
+BUCKET_LIST_STATUS = sa.Enum('NOT_STARTED', 'IN_PROGRESS', 'COMPLETED', 'ABANDONED', name='bucketliststatus')
+
+
+def create_table_if_missing(name, *columns):
+    # Databases created by models.Base.metadata.create_all already have these
+    # tables, so the baseline only fills in what is missing
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade() -> None:
+    create_table_if_missing(
+        'bucket_lists',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.String(length=1000), nullable=True),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('status', BUCKET_LIST_STATUS, nullable=True),
+        sa.Column('category', CATEGORY, nullable=True),
+        sa.Column('priority', PRIORITY, nullable=True),
+        sa.Column('progress', sa.Float(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        sa.Column('inspiration_images', sa.JSON(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('reward', sa.String(length=200), nullable=True),
+        sa.Column('steps', sa.JSON(), nullable=True),
+        sa.Column('motivation', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    create_table_if_missing(
+        'tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.String(length=500), nullable=True),
+        sa.Column('category', CATEGORY, nullable=True),
+        sa.Column('priority', PRIORITY, nullable=True),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('completed', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    create_table_if_missing(
+        'habits',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('frequency', sa.String(), nullable=True),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('streak', sa.Integer(), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('last_completed', sa.DateTime(), nullable=True),
+        sa.Column('reminder', sa.Boolean(), nullable=True),
+        sa.Column('target_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    create_table_if_missing(
+        'habit_completions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('completed_date', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.String(length=200), nullable=True),
+        sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('habit_completions')
+    op.drop_table('habits')
+    op.drop_table('tasks')
+    op.drop_table('bucket_lists')
@@ -1,10 +1,13 @@
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Boolean, ForeignKey, Date, Float, JSON
+from sqlalchemy import create_engine, event, exc, insert, Column, Integer, String, DateTime, Enum, Boolean, ForeignKey, Date, Float, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import scoped_session, sessionmaker, relationship
+from sqlalchemy.pool import QueuePool, SingletonThreadPool, StaticPool
 from werkzeug.security import generate_password_hash, check_password_hash
 import enum
+import os
+import threading
+import time
 
 Base = declarative_base()
 
@@ -33,7 +36,7 @@ class BucketList(Base):
     title = Column(String(200), nullable=False)
     description = Column(String(1000))
     deadline = Column(DateTime)
-    status = Column(Enum(BucketListStatus), default=BucketListStatus.NOT_STARTED)
+    status = Column(Enum(BucketListStatus), default=BucketListStatus.NOT_STARTED, index=True)
     category = Column(Enum(Category), default=Category.PERSONAL)
     priority = Column(Enum(Priority), default=Priority.MEDIUM)
     progress = Column(Float, default=0.0)  # 0 to 100
@@ -58,6 +61,11 @@ class HabitCompletion(Base):
     
     habit = relationship("Habit", back_populates="completions")
 
+    __table_args__ = (
+        # One row per habit per day; also serves every per-habit date range lookup
+        Index('ix_habit_completions_habit_date', 'habit_id', 'completed_date', unique=True),
+    )
+
 class Task(Base):
     __tablename__ = 'tasks'
     
@@ -68,6 +76,7 @@ class Task(Base):
     priority = Column(Enum(Priority), default=Priority.MEDIUM)
     deadline = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed = Column(Boolean, default=False)
 
 class Habit(Base):
@@ -79,22 +88,244 @@ class Habit(Base):
     frequency = Column(String)
     category = Column(String)
     streak = Column(Integer, default=0)
-    start_date = Column(DateTime)
+    start_date = Column(DateTime, index=True)
     last_completed = Column(DateTime)
     reminder = Column(Boolean, default=False)
     target_count = Column(Integer, default=1)
     
     completions = relationship("HabitCompletion", back_populates="habit", cascade="all, delete-orphan")
+    stats = relationship("HabitStats", back_populates="habit", uselist=False, cascade="all, delete-orphan")
+
+class HabitStats(Base):
+    __tablename__ = 'habit_stats'
+    
+    # Maintained by habit_stats.record_completion; rebuild with habit_stats.py
+    habit_id = Column(Integer, ForeignKey('habits.id'), primary_key=True)
+    current_streak = Column(Integer, default=0)
+    longest_streak = Column(Integer, default=0)
+    last_period = Column(Date)  # Start of the latest day/week/month with a completion
+    total_completions = Column(Integer, default=0)
+    count_7d = Column(Integer, default=0)
+    count_30d = Column(Integer, default=0)
+    count_365d = Column(Integer, default=0)
+    as_of = Column(Date)  # Day the rolling counts were computed for
+    daily_counts = Column(JSON, default=dict)  # ISO date -> count for the trailing year
+    
+    habit = relationship("Habit", back_populates="stats")
+
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+    
+    # Appended by record_changes on every flush; the id is the sync token
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, default=False, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Latest version per table for ETags
+        Index('ix_change_log_table_id', 'table_name', 'id'),
+        # Never reuse ids, so a token always means the same point in the log
+        {'sqlite_autoincrement': True},
+    )
+
+# Tables clients keep local copies of through /sync
+SYNCED_TABLES = ('tasks', 'bucket_lists', 'habits', 'habit_completions')
+
+# Full-text indexed columns per table. Each gets an external-content FTS5
+# table "<table>_fts" kept in step by triggers; see search.py for queries.
+SEARCH_INDEXES = {
+    'tasks': ('title', 'description'),
+    'bucket_lists': ('title', 'description', 'tags', 'motivation', 'steps'),
+    'habits': ('name', 'description'),
+}
+
+def search_index_ddl(table, columns):
+    """CREATE statements for one table's FTS5 index and its sync triggers."""
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        # prefix indexes make 2- and 3-letter type-ahead prefixes index lookups
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete_old} {insert_new} END",
+    ]
+
+@event.listens_for(Base.metadata, 'after_create')
+def create_search_indexes(target, connection, **kw):
+    # Migrations create these too; this covers databases built by create_all
+    if connection.dialect.name != 'sqlite':
+        return
+    for table, columns in SEARCH_INDEXES.items():
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f'{table}_fts',)).first()
+        for statement in search_index_ddl(table, columns):
+            connection.exec_driver_sql(statement)
+        if not exists:
+            # Index rows written before the FTS table existed
+            connection.exec_driver_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+@event.listens_for(Base.metadata, 'after_drop')
+def drop_search_indexes(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for table in SEARCH_INDEXES:
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS {table}_fts')
 
 # Database setup
-engine = create_engine(
-    'sqlite:///todo.db',
-    connect_args={
-        'timeout': 30,
-        'check_same_thread': False
-    },
-    poolclass=StaticPool
-)
-
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///todo.db')
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and synchronous=NORMAL is durable in WAL mode except for the
+# last commits before a power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # negative means KiB, so ~64MB of page cache
+    'busy_timeout': 30000,
+    'temp_store': 'MEMORY',
+}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+        return connection
+
+
+def create_db_engine(url=None, pool=None, pool_size=None, max_overflow=None, pool_timeout=None,
+                     pragmas=SQLITE_PRAGMAS):
+    """Build the engine; settings default to the DB_* environment variables.
+
+    ``pool`` is ``queue`` for a sized, shared pool or ``thread`` for one
+    connection per thread. In-memory SQLite always uses a single shared
+    connection, since every new connection would be a different database.
+    ``pragmas`` are applied to each new SQLite connection; pass ``None`` to skip.
+    """
+    url = url or DATABASE_URL
+    pool = pool or os.environ.get('DB_POOL', 'queue')
+    kwargs = {}
+
+    if url.startswith('sqlite'):
+        # Connections move between threads through the pool, never concurrently
+        kwargs['connect_args'] = {'timeout': 30, 'check_same_thread': False}
+
+    if url in ('sqlite://', 'sqlite:///:memory:'):
+        kwargs['poolclass'] = StaticPool
+    elif pool == 'thread':
+        kwargs['poolclass'] = SingletonThreadPool
+        kwargs['pool_size'] = pool_size or int(os.environ.get('DB_POOL_SIZE', 5))
+    elif pool == 'queue':
+        kwargs['poolclass'] = MeteredQueuePool
+        kwargs['pool_size'] = pool_size or int(os.environ.get('DB_POOL_SIZE', 5))
+        kwargs['max_overflow'] = max_overflow if max_overflow is not None else int(os.environ.get('DB_MAX_OVERFLOW', 10))
+        kwargs['pool_timeout'] = pool_timeout or float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    else:
+        raise ValueError(f"Unknown pool type: {pool}. Expected 'queue' or 'thread'")
+
+    new_engine = create_engine(url, **kwargs)
+
+    if url.startswith('sqlite') and pragmas:
+        apply_sqlite_pragmas(new_engine, pragmas)
+
+    return new_engine
+
+
+def apply_sqlite_pragmas(sync_engine, pragmas=SQLITE_PRAGMAS):
+    """Run ``pragmas`` on every new connection of ``sync_engine``."""
+    @event.listens_for(sync_engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def pool_metrics(engine):
+    """Snapshot of connection pool usage for the given engine."""
+    pool = engine.pool
+    metrics = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    if isinstance(pool, MeteredQueuePool):
+        with pool._metrics_lock:
+            metrics.update({
+                'checkouts': pool.checkouts,
+                'timeouts': pool.timeouts,
+                'wait_time_total_ms': round(pool.wait_time_total * 1000, 3),
+                'wait_time_max_ms': round(pool.wait_time_max * 1000, 3),
+            })
+    return metrics
+
+
+engine = create_db_engine()
+# One session per thread; the Flask app removes it when the app context ends
+Session = scoped_session(sessionmaker(bind=engine))
+
+
+def init_db(bind=None):
+    """Create any missing tables, FTS indexes included.
+
+    Run explicitly (``flask init-db``) rather than at import, so starting a
+    worker never issues DDL. Existing databases are upgraded with Alembic.
+    """
+    Base.metadata.create_all(bind if bind is not None else engine)
+
+
+@event.listens_for(Session, 'after_flush')
+def record_changes(session, flush_context):
+    """Log every synced row this flush inserted, updated or deleted."""
+    changes = []
+    for obj in session.new:
+        changes.append((obj, False))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            changes.append((obj, False))
+    for obj in session.deleted:
+        changes.append((obj, True))
+
+    rows = [{'table_name': obj.__tablename__, 'row_id': obj.id, 'deleted': deleted}
+            for obj, deleted in changes if getattr(obj, '__tablename__', None) in SYNCED_TABLES]
+    if rows:
+        session.connection().execute(insert(ChangeLog), rows)
+
+
+def log_changes(session, table_name, row_ids, deleted=False):
+    """Log rows written with bulk statements, which skip the flush hook above."""
+    if row_ids:
+        session.execute(insert(ChangeLog), [
+            {'table_name': table_name, 'row_id': row_id, 'deleted': deleted} for row_id in row_ids
+        ])
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""Opt-in profiling of individual requests, captured to a bounded spool.
+
+A request is profiled when it carries ``X-Profile: <PROFILE_TOKEN>`` or is
+picked by PROFILE_SAMPLE_RATE (0 to 1). ``cprofile`` mode writes a pstats
+file (``python -m pstats``, snakeviz); ``sample`` mode polls the request
+thread's stack every PROFILE_INTERVAL_MS and writes collapsed stacks that
+flamegraph.pl or speedscope read directly. Each capture has a JSON sidecar
+with the route, status, duration, query count and SQL and AIService time.
+Only the newest PROFILE_MAX_CAPTURES captures are kept.
+"""
+from collections import Counter
+from datetime import datetime
+import cProfile
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from flask import abort, g, jsonify, request, send_from_directory
+
+MODES = ('cprofile', 'sample')
+EXTENSIONS = {'cprofile': '.pstats', 'sample': '.collapsed'}
+
+
+def frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Counts the stacks one thread is in, sampled from a background thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfileSpool:
+    """Directory of captures, each a profile file plus its ``.json`` sidecar."""
+
+    def __init__(self, root, max_captures=50):
+        self.root = root
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+
+    def save(self, mode, write, meta):
+        """Store one capture; ``write(path)`` writes the profile itself."""
+        os.makedirs(self.root, exist_ok=True)
+        # Timestamp first, so names sort oldest to newest
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{meta['endpoint']}-{uuid.uuid4().hex[:8]}{EXTENSIONS[mode]}"
+        write(os.path.join(self.root, name))
+        meta = dict(meta, name=name, mode=mode)
+        with open(os.path.join(self.root, name + '.json'), 'w') as f:
+            json.dump(meta, f)
+        self.prune()
+        return meta
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if name.endswith(tuple(EXTENSIONS.values())))
+
+    def prune(self):
+        with self._lock:
+            names = self.names()
+            for name in names[:max(len(names) - self.max_captures, 0)]:
+                for path in (name, name + '.json'):
+                    try:
+                        os.remove(os.path.join(self.root, path))
+                    except FileNotFoundError:
+                        pass
+
+    def index(self):
+        captures = []
+        for name in reversed(self.names()):
+            try:
+                with open(os.path.join(self.root, name + '.json')) as f:
+                    captures.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue
+        return captures
+
+
+class RequestProfiler:
+    def __init__(self, spool, token=None, sample_rate=0.0, mode='sample', interval=0.005):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.spool = spool
+        self.token = token
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+
+    def authorized(self):
+        supplied = request.headers.get('X-Profile')
+        return bool(self.token and supplied and hmac.compare_digest(supplied, self.token))
+
+    def init_app(self, app):
+        app.before_request(self.start)
+        app.teardown_request(self.finish)
+
+        @app.route('/profiles', methods=['GET'])
+        def list_profiles():
+            if not self.authorized():
+                abort(403)
+            return jsonify(self.spool.index())
+
+        @app.route('/profiles/<name>', methods=['GET'])
+        def download_profile(name):
+            if not self.authorized():
+                abort(403)
+            if name not in self.spool.names():
+                abort(404)
+            return send_from_directory(os.path.abspath(self.spool.root), name, as_attachment=True)
+
+    def start(self):
+        if request.endpoint in ('list_profiles', 'download_profile'):
+            return
+        if not (self.authorized() or (self.sample_rate and random.random() < self.sample_rate)):
+            return
+        mode = request.headers.get('X-Profile-Mode', self.mode)
+        if mode not in MODES:
+            mode = self.mode
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+        g.profile = (mode, profiler, time.perf_counter())
+
+    def finish(self, exception=None):
+        capture = g.pop('profile', None)
+        if capture is None:
+            return
+        mode, profiler, start = capture
+        duration = time.perf_counter() - start
+        if mode == 'cprofile':
+            profiler.disable()
+            write, extra = profiler.dump_stats, {}
+        else:
+            profiler.stop()
+
+            def write(path):
+                with open(path, 'w') as f:
+                    f.write(profiler.collapsed())
+            extra = {'samples': profiler.samples, 'interval_ms': self.interval * 1000}
+
+        try:
+            self.spool.save(mode, write, dict({
+                'endpoint': request.endpoint or 'unmatched',
+                'route': request.url_rule.rule if request.url_rule is not None else None,
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'status': 500 if exception is not None else g.get('metrics_status'),
+                'created_at': datetime.utcnow().isoformat(),
+                'duration_ms': round(duration * 1000, 3),
+                'queries': g.get('query_count'),
+                'query_ms': round(g.get('query_time', 0.0) * 1000, 3),
+                'ai_ms': round(g.get('ai_time', 0.0) * 1000, 3),
+            }, **extra))
+        except OSError as e:
+            print(f"Error saving request profile: {e}")
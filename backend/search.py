@@ -0,0 +1,106 @@
+"""Full-text search over tasks, bucket-list items and habits.
+
+Queries run against the FTS5 tables declared by ``models.SEARCH_INDEXES``.
+Results are ranked by BM25 with the title weighted above the other
+columns, the last word of the query also matches as a prefix for
+type-ahead, and each hit carries a snippet with the matched terms marked.
+"""
+from models import SEARCH_INDEXES, BucketListStatus, Category, Priority
+from sqlalchemy import text
+import re
+
+_TERM_RE = re.compile(r'\w+')
+
+SNIPPET_OPEN, SNIPPET_CLOSE = '<mark>', '</mark>'
+SNIPPET_TOKENS = 12
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+TITLE_WEIGHT = 10.0
+
+# Result type -> table, title column, and facet -> (column, enum or None).
+# Facets a type lacks exclude that type when they are filtered on.
+SOURCES = {
+    'task': {
+        'table': 'tasks',
+        'title': 'title',
+        'facets': {'category': ('category', Category), 'priority': ('priority', Priority)},
+    },
+    'bucket_list': {
+        'table': 'bucket_lists',
+        'title': 'title',
+        'facets': {'category': ('category', Category), 'priority': ('priority', Priority),
+                   'status': ('status', BucketListStatus)},
+    },
+    'habit': {
+        'table': 'habits',
+        'title': 'name',
+        'facets': {'category': ('category', None)},
+    },
+}
+FACETS = ('category', 'priority', 'status')
+
+
+def match_expression(query, prefix=True):
+    """FTS5 MATCH string for free text: every word must appear, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators typed by users are matched literally.
+    Returns None if the query has no words.
+    """
+    terms = _TERM_RE.findall(query.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def facet_value(enum_class, value):
+    if enum_class is None:
+        return value
+    try:
+        # Enum columns store member names
+        return enum_class[value.upper()].name
+    except KeyError:
+        raise ValueError(f"Unknown value {value!r}; expected one of "
+                         f"{', '.join(member.value for member in enum_class)}")
+
+
+def search_source(session, kind, match, filters, limit):
+    """Best ``limit`` hits of one type as ``(id, title, snippet, score)`` rows, best first."""
+    source = SOURCES[kind]
+    table, fts = source['table'], f"{source['table']}_fts"
+    conditions, params = [f'{fts} MATCH :match'], {'match': match, 'limit': limit}
+    for facet, value in filters.items():
+        column, enum_class = source['facets'][facet]
+        conditions.append(f'{table}.{column} = :{facet}')
+        params[facet] = facet_value(enum_class, value)
+
+    # bm25() weights follow the FTS column order; the first column is the title
+    columns = len(SEARCH_INDEXES[table])
+    weights = ', '.join([str(TITLE_WEIGHT)] + ['1.0'] * (columns - 1))
+    rows = session.execute(text(
+        f"SELECT {table}.id, {table}.{source['title']}, "
+        f"snippet({fts}, -1, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}', '...', {SNIPPET_TOKENS}), "
+        f"bm25({fts}, {weights}) AS score "
+        f"FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid "
+        f"WHERE {' AND '.join(conditions)} ORDER BY score LIMIT :limit"
+    ), params).all()
+    # bm25 is lower-is-better; flip it so clients see higher-is-better
+    return [(row_id, title, snippet, -score) for row_id, title, snippet, score in rows]
+
+
+def search(session, query, kinds=None, filters=None, limit=DEFAULT_LIMIT, prefix=True):
+    """Hits across ``kinds`` (all types by default), merged by score."""
+    match = match_expression(query, prefix)
+    if match is None:
+        return []
+    filters = {facet: value for facet, value in (filters or {}).items() if value}
+    hits = []
+    for kind in kinds or SOURCES:
+        if any(facet not in SOURCES[kind]['facets'] for facet in filters):
+            continue
+        hits.extend({'type': kind, 'id': row_id, 'title': title, 'snippet': snippet, 'score': score}
+                    for row_id, title, snippet, score in search_source(session, kind, match, filters, limit))
+    hits.sort(key=lambda hit: hit['score'], reverse=True)
+    return hits[:limit]
@@ -0,0 +1,167 @@
+"""Schema-driven JSON serialization for model rows.
+
+Each model has one ``Schema``: an ordered map of output field -> (column,
+converter). Endpoints select only the columns behind the fields they send,
+as Core rows with the primary key first, and turn them into dicts with
+``schema.serializer(names)``. That function is generated once per field
+list, and the most recently used ones are kept: plain positional lookups
+with the converters inlined, no per-field branching or ORM objects. ``OrjsonProvider`` makes ``jsonify`` use orjson
+when it is installed and Flask's stdlib encoder otherwise.
+"""
+from collections import OrderedDict
+from flask.json.provider import DefaultJSONProvider
+from models import Task, Habit, HabitCompletion, BucketList
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def iso_or_none(value):
+    return value.isoformat() if value else None
+
+def enum_value(value):
+    return value.value if value else None
+
+
+# Compiled serializers kept per schema, least recently used dropped first
+SERIALIZER_CACHE_SIZE = 256
+
+
+class Schema:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def columns(self, names):
+        """Columns to select for ``names``; the primary key always comes first."""
+        return [self.model.id] + [self.fields[name][0] for name in names]
+
+    def serializer(self, names):
+        """``(serialize_row, serialize_rows)`` for rows selected with ``columns(names)``."""
+        names = tuple(names)
+        with self._lock:
+            compiled = self._compiled.get(names)
+            if compiled is not None:
+                self._compiled.move_to_end(names)
+                return compiled
+        compiled = self._compile(names)
+        with self._lock:
+            compiled = self._compiled.setdefault(names, compiled)
+            if len(self._compiled) > SERIALIZER_CACHE_SIZE:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def _compile(self, names):
+        namespace = {}
+        items = []
+        for position, name in enumerate(names, start=1):
+            converter = self.fields[name][1]
+            if converter is None:
+                items.append(f'{name!r}: row[{position}]')
+            else:
+                namespace[f'convert_{position}'] = converter
+                items.append(f'{name!r}: (convert_{position}(row[{position}]) '
+                             f'if row[{position}] is not None else None)')
+        body = '{' + ', '.join(items) + '}'
+        source = (f'def serialize_row(row):\n    return {body}\n'
+                  f'def serialize_rows(rows):\n    return [{body} for row in rows]\n')
+        exec(compile(source, f'<serializer {self.model.__name__}>', 'exec'), namespace)
+        return namespace['serialize_row'], namespace['serialize_rows']
+
+
+TASK = Schema(Task, {
+    'id': (Task.id, None),
+    'title': (Task.title, None),
+    'description': (Task.description, None),
+    'category': (Task.category, enum_value),
+    'priority': (Task.priority, enum_value),
+    'deadline': (Task.deadline, iso_or_none),
+    'completed': (Task.completed, None),
+    'updated_at': (Task.updated_at, iso_or_none)
+})
+
+BUCKET_LIST = Schema(BucketList, {
+    'id': (BucketList.id, None),
+    'title': (BucketList.title, None),
+    'description': (BucketList.description, None),
+    'deadline': (BucketList.deadline, iso_or_none),
+    'status': (BucketList.status, enum_value),
+    'category': (BucketList.category, enum_value),
+    'priority': (BucketList.priority, enum_value),
+    'progress': (BucketList.progress, None),
+    'image_url': (BucketList.image_url, None),
+    'inspiration_images': (BucketList.inspiration_images, None),
+    'tags': (BucketList.tags, None),
+    'reward': (BucketList.reward, None),
+    'steps': (BucketList.steps, None),
+    'motivation': (BucketList.motivation, None),
+    'created_at': (BucketList.created_at, iso_or_none),
+    'updated_at': (BucketList.updated_at, iso_or_none)
+})
+
+HABIT = Schema(Habit, {
+    'id': (Habit.id, None),
+    'name': (Habit.name, None),
+    'description': (Habit.description, None),
+    'frequency': (Habit.frequency, None),
+    'category': (Habit.category, None),
+    'streak': (Habit.streak, None),
+    'start_date': (Habit.start_date, iso_or_none),
+    'last_completed': (Habit.last_completed, iso_or_none),
+    'reminder': (Habit.reminder, None),
+    'target_count': (Habit.target_count, None)
+})
+
+HABIT_COMPLETION = Schema(HabitCompletion, {
+    'id': (HabitCompletion.id, None),
+    'habit_id': (HabitCompletion.habit_id, None),
+    'date': (HabitCompletion.completed_date, iso_or_none),
+    'count': (HabitCompletion.count, None),
+    'notes': (HabitCompletion.notes, None)
+})
+
+
+def dumps(obj):
+    """Compact JSON as bytes, for bodies built outside jsonify (NDJSON streams)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the stdlib provider's output rules.
+
+    Keys are sorted and dates go through Flask's default hook (HTTP date
+    format), as with DefaultJSONProvider, so responses do not change.
+    """
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options())
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
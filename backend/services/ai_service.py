@@ -1,91 +1,181 @@
+import copy
 import json
 import os
 from pathlib import Path
+from metrics import ai_call
+from services.ann import make_ann
+from services.category_classifier import CategoryClassifier
+from services.embedding_index import EmbeddingIndex, file_hash
+from services.similarity import load_encoder
+from services.suggestion_cache import SuggestionCache, make_key
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL_DIR = BASE_DIR / 'ml_models' / 'todo_embeddings_model'
+RECOMMENDATIONS_PATH = BASE_DIR / 'ml_models' / 'recommendations.json'
+CATEGORY_KEYWORDS_PATH = BASE_DIR / 'ml_models' / 'category_keywords.json'
+INDEX_DIR = Path(os.environ.get('EMBEDDING_INDEX_DIR', BASE_DIR / 'ml_models' / 'index'))
+# Above ANN_MIN_ROWS entries, similarity search switches from an exact scan to
+# the ANN backend; more probes mean better recall and slower queries
+ANN_BACKEND = os.environ.get('SIMILARITY_ANN', 'ivf')
+ANN_MIN_ROWS = int(os.environ.get('SIMILARITY_ANN_MIN_ROWS', 20000))
+ANN_PROBES = int(os.environ.get('SIMILARITY_ANN_PROBES', 8))
+# Suggestion results are memoised per normalized input; set the path to share
+# the cache between worker processes, and the TTL (seconds) to bound staleness
+SUGGESTION_CACHE_SIZE = int(os.environ.get('SUGGESTION_CACHE_SIZE', 4096))
+SUGGESTION_CACHE_TTL = float(os.environ.get('SUGGESTION_CACHE_TTL', 0))
+SUGGESTION_CACHE_PATH = os.environ.get('SUGGESTION_CACHE_PATH')
 
 class AIService:
     def __init__(self):
-        self.recommendations = []
+        encoder = load_encoder(MODEL_DIR)
+        # Each index fits its own encoder state; the model itself is shared
+        self.recommendation_index = EmbeddingIndex(INDEX_DIR / 'recommendations', encoder,
+                                                   make_ann(ANN_BACKEND, n_probe=ANN_PROBES), ANN_MIN_ROWS)
+        self.task_index = EmbeddingIndex(INDEX_DIR / 'tasks', copy.copy(encoder),
+                                         make_ann(ANN_BACKEND, n_probe=ANN_PROBES), ANN_MIN_ROWS)
+        self.category_classifier = CategoryClassifier(CATEGORY_KEYWORDS_PATH)
+        self.suggestion_cache = SuggestionCache(SUGGESTION_CACHE_SIZE, SUGGESTION_CACHE_TTL, SUGGESTION_CACHE_PATH)
         self.load_recommendations()
+        self.load_task_index()
     
+    @ai_call('load_recommendations')
     def load_recommendations(self):
         try:
-            base_dir = Path(__file__).resolve().parent.parent
-            recommendations_path = base_dir / 'ml_models' / 'recommendations.json'
+            # Reuse the on-disk index unless recommendations.json has changed
+            source_hash = file_hash(RECOMMENDATIONS_PATH)
+            if self.recommendation_index.is_current(source_hash):
+                self.recommendation_index.open()
+                return
             
-            with open(recommendations_path, 'r') as f:
-                self.recommendations = json.load(f)
+            with open(RECOMMENDATIONS_PATH, 'r') as f:
+                recommendations = json.load(f)
+            self.recommendation_index.build(
+                ((str(i), rec.get('task', ''), rec) for i, rec in enumerate(recommendations)),
+                source_hash
+            )
+            # Keys carry the corpus hash, so this only frees the old entries early
+            self.suggestion_cache.clear()
         except FileNotFoundError as e:
             print(f"Error loading recommendations: {e}")
-            self.recommendations = []
         except Exception as e:
             print(f"Unexpected error loading recommendations: {e}")
-            self.recommendations = []
     
+    def load_task_index(self):
+        try:
+            if self.task_index.read_header() is None:
+                self.task_index.build([])
+            else:
+                self.task_index.open()
+        except Exception as e:
+            print(f"Error loading task index: {e}")
+    
+    @ai_call('index_tasks')
+    def index_tasks(self, tasks):
+        """Add or refresh ``(id, title, description)`` rows with one index append."""
+        try:
+            self.task_index.upsert([
+                (str(task_id), f"{title} {description or ''}".strip(), {'id': task_id, 'title': title})
+                for task_id, title, description in tasks
+            ])
+        except Exception as e:
+            print(f"Error indexing tasks: {e}")
+    
+    def remove_tasks(self, task_ids):
+        try:
+            self.task_index.remove([str(task_id) for task_id in task_ids])
+        except Exception as e:
+            print(f"Error removing tasks from index: {e}")
+    
+    @ai_call('sync_tasks')
+    def sync_tasks(self, tasks):
+        """Re-sync the task index with ``(id, title, description)`` rows."""
+        return self.task_index.sync(
+            (str(task_id), f"{title} {description or ''}".strip(), {'id': task_id, 'title': title})
+            for task_id, title, description in tasks
+        )
+    
+    @ai_call('find_similar_tasks')
     def find_similar_tasks(self, input_text, existing_tasks=None, top_k=3):
         try:
             if not input_text:
                 return []
-                
-            input_words = set(input_text.lower().split())
-            similarities = []
-            
-            for rec in self.recommendations:
-                try:
-                    # Get task text from recommendation
-                    task_text = rec.get('task', '').lower()
-                    task_words = set(task_text.split())
-                    
-                    # Calculate word overlap similarity
-                    union_length = len(input_words.union(task_words))
-                    if union_length > 0:
-                        intersection_length = len(input_words.intersection(task_words))
-                        similarity = intersection_length / union_length
-                        
-                        # Create a new dictionary with similarity score
-                        suggestion = {
-                            'title': rec.get('task'),
-                            'category': rec.get('category', 'personal'),
-                            'description': rec.get('description', ''),
-                            'priority': rec.get('priority', 'medium'),
-                            'similarity_score': similarity,
-                            'similar_habits': rec.get('similar_habits', [])
-                        }
-                        similarities.append((similarity, suggestion))
-                except Exception as e:
-                    print(f"Error processing recommendation: {e}")
-                    continue
-            
-            # Sort by similarity score
-            similarities.sort(key=lambda x: x[0], reverse=True)
-            
-            # Return only the suggestion dictionaries, not the scores
-            return [item[1] for item in similarities[:top_k]]
-            
+            return self.find_similar_tasks_batch([input_text], top_k)[0]
         except Exception as e:
             print(f"Error in find_similar_tasks: {e}")
             return []
     
+    @property
+    def corpus_version(self):
+        header = self.recommendation_index.header
+        return header['source_hash'] if header else None
+    
+    @ai_call('find_similar_tasks_batch')
+    def find_similar_tasks_batch(self, input_texts, top_k=3):
+        """Suggestions for every text in ``input_texts`` from one scoring pass."""
+        results = [[] for _ in input_texts]
+        version = self.corpus_version
+        keys, positions = {}, []
+        # Empty texts get no suggestions, as in find_similar_tasks
+        for i, text in enumerate(input_texts):
+            if not text:
+                continue
+            keys[i] = make_key('similar', version, top_k, text)
+            cached = self.suggestion_cache.get(keys[i])
+            if cached is None:
+                positions.append(i)
+            else:
+                results[i] = cached
+        if not positions:
+            return results
+        matches = self.recommendation_index.search_batch([input_texts[i] for i in positions], top_k)
+        for position, hits in zip(positions, matches):
+            results[position] = [{
+                'title': rec.get('task'),
+                'category': rec.get('category', 'personal'),
+                'description': rec.get('description', ''),
+                'priority': rec.get('priority', 'medium'),
+                'similarity_score': similarity,
+                'similar_habits': rec.get('similar_habits', [])
+            } for _key, similarity, rec in hits]
+            self.suggestion_cache.put(keys[position], results[position])
+        return results
+    
+    @ai_call('find_similar_existing_tasks')
+    def find_similar_existing_tasks(self, input_text, top_k=3):
+        """The user's own tasks closest to ``input_text``, to flag likely duplicates."""
+        try:
+            if not input_text:
+                return []
+            # Pick up tasks indexed by other worker processes
+            self.task_index.refresh()
+            return [{
+                'id': task['id'],
+                'title': task['title'],
+                'similarity_score': similarity
+            } for _key, similarity, task in self.task_index.search(input_text, top_k)]
+        except Exception as e:
+            print(f"Error in find_similar_existing_tasks: {e}")
+            return []
+    
+    def _classify(self, title, description):
+        text = f"{title} {description}"
+        key = make_key('category', self.category_classifier.version, text)
+        return self.suggestion_cache.get_or_compute(key, lambda: list(self.category_classifier.classify(text)))
+    
+    @ai_call('suggest_category')
     def suggest_category(self, title, description):
         try:
-            text = f"{title} {description}".lower()
-            
-            category_keywords = {
-                'work': ['work', 'project', 'meeting', 'deadline', 'office'],
-                'personal': ['home', 'family', 'self', 'life', 'personal'],
-                'shopping': ['buy', 'shop', 'purchase', 'grocery', 'store'],
-                'urgent': ['urgent', 'important', 'asap', 'deadline', 'critical']
-            }
-            
-            max_matches = 0
-            suggested_category = 'personal'  # default
-            
-            for category, keywords in category_keywords.items():
-                matches = sum(1 for keyword in keywords if keyword in text)
-                if matches > max_matches:
-                    max_matches = matches
-                    suggested_category = category
-            
-            return suggested_category
+            return self._classify(title, description)[0]
         except Exception as e:
             print(f"Error in suggest_category: {e}")
-            return 'personal'
\ No newline at end of file
+            return 'personal'
+    
+    @ai_call('category_scores')
+    def category_scores(self, title, description):
+        """Per-category keyword scores behind suggest_category."""
+        return self._classify(title, description)[1]
+    
+    @ai_call('suggest_category_batch')
+    def suggest_category_batch(self, items):
+        """Categories for a list of ``(title, description)`` pairs."""
+        return [self.suggest_category(title, description) for title, description in items]
\ No newline at end of file
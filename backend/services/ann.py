@@ -0,0 +1,138 @@
+"""Approximate nearest-neighbour search over an embedding matrix.
+
+Backends share one interface so EmbeddingIndex can swap them freely:
+
+    build(vectors)                      train on the rows present now
+    search(vectors, query, top_k, exclude=None) -> [(row, score), ...]
+    search_batch(vectors, queries, top_k, exclude=None) -> one such list per query
+    save(path) / load(path)
+
+``IVFFlatIndex`` clusters the rows with spherical k-means and, per query,
+scores only the rows in the ``n_probe`` lists whose centroids are closest.
+Raising ``n_probe`` trades speed for recall; ``n_probe == n_lists`` is exact.
+Rows appended after ``build`` are not in any list, so callers search them
+exhaustively (see ``built_rows``).
+"""
+import numpy as np
+
+from services.similarity import top_k_rows, top_k_rows_batch
+
+ASSIGN_BATCH_SIZE = 65536
+
+
+class ExactSearch:
+    name = 'exact'
+    built_rows = 0
+
+    def build(self, vectors):
+        self.built_rows = len(vectors)
+        return self
+
+    def search(self, vectors, query, top_k, exclude=None):
+        return top_k_rows(vectors, query, top_k, exclude)
+
+    def search_batch(self, vectors, queries, top_k, exclude=None):
+        return top_k_rows_batch(vectors, queries, top_k, exclude)
+
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        return self
+
+
+class IVFFlatIndex:
+    name = 'ivf'
+
+    def __init__(self, n_lists=None, n_probe=8, iterations=10, train_size=100000, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.train_size = train_size
+        self.seed = seed
+        self.centroids = None
+        self.order = None  # row ids grouped by list
+        self.list_offsets = None  # list i holds order[list_offsets[i]:list_offsets[i + 1]]
+        self.built_rows = 0
+
+    def _assign(self, vectors):
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+            batch = np.asarray(vectors[start:start + ASSIGN_BATCH_SIZE])
+            assignments[start:start + len(batch)] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+
+    def build(self, vectors):
+        rows = len(vectors)
+        self.built_rows = rows
+        if not rows:
+            self.centroids = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.list_offsets = np.zeros(1, dtype=np.int64)
+            return self
+
+        n_lists = min(self.n_lists or max(1, int(4 * np.sqrt(rows))), rows)
+        rng = np.random.default_rng(self.seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(rows, min(rows, max(self.train_size, n_lists)), replace=False))])
+
+        # Spherical k-means: rows are unit vectors, so nearest means highest dot product
+        self.centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ self.centroids.T, axis=1)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty lists from random sample rows
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.centroids = (sums / norms).astype(np.float32)
+
+        assignments = self._assign(vectors)
+        self.order = np.argsort(assignments, kind='stable').astype(np.int64)
+        self.list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=n_lists)))).astype(np.int64)
+        return self
+
+    def search(self, vectors, query, top_k, exclude=None):
+        if self.centroids is None or not len(self.centroids) or top_k <= 0:
+            return []
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        probe = np.argpartition(self.centroids @ query, -n_probe)[-n_probe:]
+        candidates = np.concatenate([self.order[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probe])
+        if not len(candidates):
+            return []
+        candidates.sort()  # sequential access into the memory-mapped matrix
+
+        candidate_exclude = None if exclude is None else np.asarray(exclude)[candidates]
+        return [(int(candidates[i]), score)
+                for i, score in top_k_rows(np.asarray(vectors[candidates]), query, top_k, candidate_exclude)]
+
+    def search_batch(self, vectors, queries, top_k, exclude=None):
+        # Each query probes different lists, so there is no shared matrix to batch over
+        return [self.search(vectors, query, top_k, exclude) for query in queries]
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, order=self.order, list_offsets=self.list_offsets,
+                 built_rows=np.int64(self.built_rows))
+
+    def load(self, path):
+        with np.load(path) as data:
+            self.centroids = data['centroids']
+            self.order = data['order']
+            self.list_offsets = data['list_offsets']
+            self.built_rows = int(data['built_rows'])
+        return self
+
+
+ANN_BACKENDS = ('exact', 'ivf')
+
+
+def make_ann(kind='exact', n_lists=None, n_probe=8):
+    """Build an ANN backend by name, e.g. from configuration."""
+    if kind == 'exact':
+        return ExactSearch()
+    if kind == 'ivf':
+        return IVFFlatIndex(n_lists=n_lists, n_probe=n_probe)
+    raise ValueError(f"Unknown ANN backend: {kind}. Expected one of: {', '.join(ANN_BACKENDS)}")
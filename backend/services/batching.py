@@ -0,0 +1,62 @@
+"""Micro-batching for AI suggestion requests.
+
+Concurrent single requests are queued and handed to a batch handler together,
+so N simultaneous callers share one vectorized scoring pass. The worker waits
+at most ``max_wait`` seconds after the first queued item for others to join.
+"""
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+
+class MicroBatcher:
+    def __init__(self, handler, max_batch_size=64, max_wait=0.002, name='micro-batcher'):
+        """``handler`` takes a list of items and returns a list of results in the same order."""
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """Queue ``item`` and block until its batch has been processed, or raise
+        TimeoutError after ``timeout`` seconds."""
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _future in batch]
+            try:
+                results = self.handler(items)
+            except Exception as e:
+                for _item, future in batch:
+                    future.set_exception(e)
+                continue
+            if len(results) != len(batch):
+                # Results can no longer be matched to items, so none are trusted
+                error = RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+                for _item, future in batch:
+                    future.set_exception(error)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_item, future), result in zip(batch, results):
+                future.set_result(result)
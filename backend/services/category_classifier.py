@@ -0,0 +1,139 @@
+"""Keyword-weighted category classifier for AIService.suggest_category.
+
+Keywords and weights live in ml_models/category_keywords.json. They are
+compiled once into hash tables keyed by whole word, word prefix and word
+sequence, so classifying a text is one tokenizing pass plus a few dict
+lookups per word, however many categories and keywords there are. Matching
+is on whole words ("self" does not match "herself"); a single-word keyword
+ending in ``*`` also matches longer words ("shop*" matches "shopping").
+Each distinct keyword counts once per text, and ties go to the category
+listed first. The file is reloaded when it changes on disk.
+"""
+from pathlib import Path
+import json
+import os
+import re
+import threading
+import time
+
+RELOAD_CHECK_INTERVAL = 1.0  # seconds between mtime checks
+TOKEN_CACHE_SIZE = 100000  # distinct words remembered per matcher
+
+_WORD_RE = re.compile(r'\w+')
+
+
+class _Matcher:
+    """Immutable compiled form of one configuration, swapped in whole on reload."""
+
+    def __init__(self, config):
+        self.categories = list(config['categories'])
+        self.default = config.get('default', self.categories[0] if self.categories else 'personal')
+
+        # keyword -> [(category index, weight)]; one keyword may feed several categories
+        self.weights = {}
+        for index, category in enumerate(self.categories):
+            for keyword, weight in config['categories'][category].items():
+                keyword = ' '.join(keyword.lower().split())
+                self.weights.setdefault(keyword, []).append((index, float(weight)))
+
+        self.words, self.prefixes, self.phrases = {}, {}, {}
+        for keyword in self.weights:
+            words = keyword.rstrip('*').split()
+            if len(words) > 1:
+                self.phrases[tuple(words)] = keyword
+            elif keyword.endswith('*'):
+                self.prefixes[words[0]] = keyword
+            else:
+                self.words[words[0]] = keyword
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.prefixes})
+        self.phrase_lengths = sorted({len(phrase) for phrase in self.phrases})
+        # word -> keywords it matches, filled lazily; task vocabularies are small
+        self.seen = {}
+
+    def _word_keywords(self, token):
+        keywords = [self.prefixes[token[:length]] for length in self.prefix_lengths
+                    if length <= len(token) and token[:length] in self.prefixes]
+        if token in self.words:
+            keywords.append(self.words[token])
+        keywords = tuple(keywords)
+        if len(self.seen) >= TOKEN_CACHE_SIZE:
+            self.seen.clear()
+        self.seen[token] = keywords
+        return keywords
+
+    def matched_keywords(self, text):
+        tokens = _WORD_RE.findall(text.lower())
+        matched = set()
+        seen = self.seen
+        for token in set(tokens):
+            keywords = seen.get(token)
+            if keywords is None:
+                keywords = self._word_keywords(token)
+            if keywords:
+                matched.update(keywords)
+        for length in self.phrase_lengths:
+            for start in range(len(tokens) - length + 1):
+                keyword = self.phrases.get(tuple(tokens[start:start + length]))
+                if keyword:
+                    matched.add(keyword)
+        return matched
+
+
+class CategoryClassifier:
+    def __init__(self, config_path):
+        self.config_path = Path(config_path)
+        self._reload_lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """(Re)compile the matcher from the config file."""
+        with self._reload_lock:
+            mtime = os.stat(self.config_path).st_mtime_ns
+            with open(self.config_path) as f:
+                matcher = _Matcher(json.load(f))
+            # A single attribute swap, so readers never see a half-built matcher
+            self._matcher = matcher
+            self._mtime = mtime
+
+    @property
+    def categories(self):
+        return self._matcher.categories
+
+    @property
+    def version(self):
+        """Changes whenever the configuration is reloaded."""
+        self._maybe_reload()
+        return self._mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + RELOAD_CHECK_INTERVAL
+        try:
+            if os.stat(self.config_path).st_mtime_ns != self._mtime:
+                self.reload()
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the last good configuration
+            print(f"Error reloading category keywords: {e}")
+
+    def scores(self, text):
+        """Summed keyword weight per category for ``text``."""
+        self._maybe_reload()
+        matcher = self._matcher
+        totals = [0.0] * len(matcher.categories)
+        for keyword in matcher.matched_keywords(text):
+            for index, weight in matcher.weights[keyword]:
+                totals[index] += weight
+        return dict(zip(matcher.categories, totals))
+
+    def classify(self, text):
+        """Best category and all scores; the default category if nothing matched."""
+        scores = self.scores(text)
+        best, best_score = self._matcher.default, 0.0
+        for category, score in scores.items():
+            if score > best_score:
+                best, best_score = category, score
+        return best, scores
@@ -0,0 +1,368 @@
+"""Persistent, memory-mapped embedding index.
+
+An index is a directory of flat files that are only ever appended to:
+
+    header.json   row count, dimension, encoder name, source hash and a
+                  generation bumped by every write
+    vectors.f32   float32 rows, memory-mapped read-only for search
+    offsets.u64   byte offset of each row's line in meta.jsonl
+    meta.jsonl    one {"key", "hash", "data"} line per row
+    dead.u8       1 for rows superseded by an edit or removed
+    encoder.npz   fitted encoder state (e.g. IDF weights)
+    ann_<kind>.npz  optional ANN structure over the first ``built_rows`` rows
+
+Opening an index reads only the header and maps the rest, so startup cost
+and private memory stay flat as the corpus grows, and every worker process
+shares the same page-cache pages. Each row carries a SHA-256 of its text so
+``sync`` re-encodes only new or changed entries.
+
+Searches read one immutable ``IndexState``; ``open`` and ``refresh`` build
+the next one aside and publish it with a single assignment, so a search on
+another thread never pairs new vectors with an old dead mask or searcher.
+Only writers, holding the index lock, rebuild and save the ANN structure;
+readers load the saved one or search exactly.
+"""
+from collections import namedtuple
+from pathlib import Path
+import copy
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from services.ann import ExactSearch
+from services.similarity import top_k_rows_batch
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are serialized per process only
+    fcntl = None
+
+INDEX_VERSION = 1
+ENCODE_BATCH_SIZE = 10000
+# Rebuild the ANN structure once this share of rows was appended after it
+ANN_MAX_TAIL_FRACTION = 0.1
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _FileLock:
+    """Exclusive lock shared by every process that writes to the index."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._file = open(self.path, 'a')
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._thread_lock.release()
+
+
+IndexState = namedtuple('IndexState', 'header vectors offsets dead searcher')
+
+
+class EmbeddingIndex:
+    """``ann`` is an ANN backend from services.ann, used once the index holds
+    at least ``ann_min_rows`` rows; smaller indexes are searched exactly. It
+    is only a template: each published state gets its own copy."""
+
+    def __init__(self, path, encoder, ann=None, ann_min_rows=0):
+        self.path = Path(path)
+        self.encoder = encoder
+        self.ann = ann or ExactSearch()
+        self.ann_min_rows = ann_min_rows
+        self.state = IndexState(None, np.zeros((0, encoder.dim), dtype=np.float32), np.zeros(0, dtype=np.uint64),
+                                np.zeros(0, dtype=np.uint8), ExactSearch())
+        self._keys = None  # key -> (row, hash); only built for writers
+        self._keys_generation = None  # header generation _keys reflects
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = _FileLock(self.path / '.lock')
+        self._open_lock = threading.Lock()
+
+    @property
+    def header(self):
+        return self.state.header
+
+    @header.setter
+    def header(self, header):
+        self.state = self.state._replace(header=header)
+
+    @property
+    def vectors(self):
+        return self.state.vectors
+
+    @property
+    def offsets(self):
+        return self.state.offsets
+
+    @property
+    def dead(self):
+        return self.state.dead
+
+    @property
+    def searcher(self):
+        return self.state.searcher
+
+    def __len__(self):
+        return 0 if self.header is None else self.header['rows']
+
+    def _file(self, name):
+        return self.path / name
+
+    def read_header(self):
+        try:
+            with open(self._file('header.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def is_current(self, source_hash=None):
+        """True if the on-disk index was built by this encoder from this source."""
+        header = self.read_header()
+        return bool(header) and header.get('version') == INDEX_VERSION \
+            and header.get('encoder') == self.encoder.name \
+            and header.get('dim') == self.encoder.dim \
+            and header.get('source_hash') == source_hash
+
+    def open(self, _rebuild_ann=False):
+        """Map the index files; cheap enough to call again after another process appends."""
+        with self._open_lock:
+            header = self.read_header()
+            if header is None:
+                raise FileNotFoundError(f"No embedding index at {self.path}")
+            self._publish(header, _rebuild_ann)
+        return self
+
+    def _publish(self, header, rebuild_ann):
+        state_path = self._file('encoder.npz')
+        if state_path.exists():
+            with np.load(state_path) as state:
+                self.encoder.load_state(dict(state))
+
+        rows, dim = header['rows'], header['dim']
+        if rows:
+            vectors = np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(rows, dim))
+            offsets = np.memmap(self._file('offsets.u64'), dtype=np.uint64, mode='r', shape=(rows,))
+            dead = np.memmap(self._file('dead.u8'), dtype=np.uint8, mode='r', shape=(rows,))
+        else:
+            vectors = np.zeros((0, dim), dtype=np.float32)
+            offsets = np.zeros(0, dtype=np.uint64)
+            dead = np.zeros(0, dtype=np.uint8)
+        self.state = IndexState(header, vectors, offsets, dead, self._load_ann(vectors, rebuild_ann))
+
+    def _load_ann(self, vectors, rebuild):
+        if isinstance(self.ann, ExactSearch) or len(vectors) < self.ann_min_rows:
+            return ExactSearch().build(vectors)
+
+        ann_path = self._file(f'ann_{self.ann.name}.npz')
+        if ann_path.exists():
+            ann = copy.copy(self.ann).load(ann_path)
+            tail = len(vectors) - ann.built_rows
+            # Readers keep a stale structure (its tail is scanned exactly) until a writer rebuilds it
+            if 0 <= tail <= ANN_MAX_TAIL_FRACTION * len(vectors) or (tail >= 0 and not rebuild):
+                return ann
+        if not rebuild:
+            return ExactSearch().build(vectors)
+
+        ann = copy.copy(self.ann).build(vectors)
+        # Write then rename so other processes never load a partial file
+        tmp_path = self._file(f'ann_{self.ann.name}.{os.getpid()}.tmp.npz')
+        ann.save(tmp_path)
+        os.replace(tmp_path, ann_path)
+        return ann
+
+    def refresh(self):
+        """Pick up rows appended or removed by other processes."""
+        with self._open_lock:
+            header = self.read_header()
+            if header and header != self.header:
+                self._publish(header, False)
+
+    def _write_header(self, rows, source_hash, generation):
+        header = {
+            'version': INDEX_VERSION,
+            'encoder': self.encoder.name,
+            'dim': self.encoder.dim,
+            'rows': rows,
+            'source_hash': source_hash,
+            'generation': generation
+        }
+        tmp_path = self._file('header.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # The header is the commit point: rows past header['rows'] are ignored
+        os.replace(tmp_path, self._file('header.json'))
+
+    def _append_rows(self, entries, start_row):
+        """Encode and append ``(key, text, data)`` entries; returns the new row count."""
+        row = start_row
+        with open(self._file('vectors.f32'), 'ab') as vectors, \
+                open(self._file('offsets.u64'), 'ab') as offsets, \
+                open(self._file('meta.jsonl'), 'ab') as meta, \
+                open(self._file('dead.u8'), 'ab') as dead:
+            for start in range(0, len(entries), ENCODE_BATCH_SIZE):
+                batch = entries[start:start + ENCODE_BATCH_SIZE]
+                encoded = self.encoder.encode([text for _key, text, _data in batch])
+                vectors.write(np.ascontiguousarray(encoded, dtype=np.float32).tobytes())
+
+                positions = []
+                for key, text, data in batch:
+                    positions.append(meta.tell())
+                    text_hash = content_hash(text)
+                    line = json.dumps({'key': key, 'hash': text_hash, 'data': data}) + '\n'
+                    meta.write(line.encode('utf-8'))
+                    if self._keys is not None:
+                        self._keys[key] = (row, text_hash)
+                    row += 1
+                offsets.write(np.array(positions, dtype=np.uint64).tobytes())
+                dead.write(bytes(len(batch)))
+            for f in (vectors, offsets, meta, dead):
+                f.flush()
+                os.fsync(f.fileno())
+        return row
+
+    def build(self, entries, source_hash=None):
+        """Replace the index with ``(key, text, data)`` entries."""
+        entries = list(entries)
+        with self._lock:
+            generation = (self.read_header() or {}).get('generation', 0) + 1
+            self.encoder.fit(text for _key, text, _data in entries)
+            # Drop the header first so a crash mid-build never looks current
+            self._file('header.json').unlink(missing_ok=True)
+            stale = [self._file(name) for name in ('vectors.f32', 'offsets.u64', 'meta.jsonl', 'dead.u8')]
+            stale.extend(self.path.glob('ann_*.npz'))
+            for path in stale:
+                # Unlink rather than truncate so other processes keep their old mapping
+                path.unlink(missing_ok=True)
+            np.savez(self._file('encoder.npz'), **self.encoder.state())
+            self._keys = {}
+            rows = self._append_rows(entries, 0)
+            self._write_header(rows, source_hash, generation)
+            self._keys_generation = generation
+            return self.open(_rebuild_ann=True)
+
+    def _load_keys(self):
+        """Refresh and make sure ``_keys`` matches the index on disk; call with the lock held."""
+        self.refresh()
+        if self._keys is not None and self._keys_generation == self.header.get('generation'):
+            return
+        # Later lines win, so an edited entry maps to its newest row
+        keys = {}
+        with open(self._file('meta.jsonl'), 'rb') as meta:
+            for row, line in zip(range(len(self)), meta):
+                entry = json.loads(line)
+                keys[entry['key']] = (row, entry['hash'])
+        dead = self.dead
+        self._keys = {key: value for key, value in keys.items() if not dead[value[0]]}
+        self._keys_generation = self.header.get('generation')
+
+    def _commit(self, rows):
+        """Publish a write: bump the generation so every process's ``refresh`` notices."""
+        generation = self.header.get('generation', 0) + 1
+        self._write_header(rows, self.header['source_hash'], generation)
+        self._keys_generation = generation
+        self.open(_rebuild_ann=True)
+
+    def _mark_dead(self, rows):
+        if not rows:
+            return
+        with open(self._file('dead.u8'), 'r+b') as dead:
+            for row in rows:
+                dead.seek(row)
+                dead.write(b'\x01')
+            dead.flush()
+            os.fsync(dead.fileno())
+
+    def upsert(self, entries):
+        """Append new or changed ``(key, text, data)`` entries, retiring the rows they replace."""
+        with self._lock:
+            self._load_keys()
+            changed = [entry for entry in entries
+                       if self._keys.get(entry[0], (None, None))[1] != content_hash(entry[1])]
+            if not changed:
+                return 0
+            replaced = [self._keys[key][0] for key, _text, _data in changed if key in self._keys]
+            rows = self._append_rows(changed, len(self))
+            self._mark_dead(replaced)
+            self._commit(rows)
+        return len(changed)
+
+    def _retire(self, keys):
+        rows = [self._keys.pop(key)[0] for key in keys if key in self._keys]
+        if rows:
+            self._mark_dead(rows)
+            self._commit(len(self))
+        return len(rows)
+
+    def remove(self, keys):
+        with self._lock:
+            self._load_keys()
+            return self._retire(keys)
+
+    def sync(self, entries):
+        """Make the index hold exactly ``entries``, re-encoding only what changed.
+
+        Returns the number of entries (re-)encoded and the number removed.
+        """
+        entries = list(entries)
+        upserted = self.upsert(entries)
+        wanted = {key for key, _text, _data in entries}
+        with self._lock:
+            self._load_keys()
+            removed = self._retire([key for key in self._keys if key not in wanted])
+        return upserted, removed
+
+    def metadata(self, row, offsets=None):
+        offsets = self.offsets if offsets is None else offsets
+        with open(self._file('meta.jsonl'), 'rb') as meta:
+            meta.seek(int(offsets[row]))
+            return json.loads(meta.readline())
+
+    def search_batch(self, texts, top_k=3):
+        """``(key, score, data)`` lists for each text, from one vectorized scoring pass."""
+        state = self.state
+        rows = len(state.vectors)
+        if state.header is None or not rows or not texts:
+            return [[] for _ in texts]
+        queries = self.encoder.encode(texts)
+        batch_hits = state.searcher.search_batch(state.vectors, queries, top_k, exclude=state.dead)
+
+        # Rows appended since the ANN structure was built are scanned exactly
+        built = state.searcher.built_rows
+        if built < rows:
+            tails = top_k_rows_batch(state.vectors[built:], queries, top_k, exclude=state.dead[built:])
+            batch_hits = [sorted(hits + [(built + row, score) for row, score in tail],
+                                 key=lambda hit: -hit[1])[:top_k]
+                          for hits, tail in zip(batch_hits, tails)]
+
+        results = []
+        for hits in batch_hits:
+            entries = [(self.metadata(row, state.offsets), score) for row, score in hits]
+            results.append([(entry['key'], score, entry['data']) for entry, score in entries])
+        return results
+
+    def search(self, text, top_k=3):
+        """Return ``(key, score, data)`` for the ``top_k`` best live rows."""
+        return self.search_batch([text], top_k)[0]
@@ -0,0 +1,62 @@
+"""Background writer for the similar-task index.
+
+Request handlers queue task changes with ``put`` and ``discard`` and return at
+once. A worker thread waits ``max_wait`` seconds after the first change so a
+burst can join, keeps only the latest change per task, and applies them with
+one upsert and one remove. A burst of writes then shares one set of index
+fsyncs, and only the worker, never a request, loads the AI service.
+"""
+import threading
+import time
+
+
+class IndexQueue:
+    def __init__(self, upsert, remove, max_wait=0.05, name='index-queue'):
+        """``upsert`` takes ``(id, title, description)`` rows, ``remove`` a list of ids."""
+        self.upsert = upsert
+        self.remove = remove
+        self.max_wait = max_wait
+        self.batches = 0
+        self._pending = {}  # task id -> (title, description), or None to remove it
+        self._busy = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def put(self, task_id, title, description=''):
+        with self._cond:
+            self._pending[task_id] = (title, description)
+            self._cond.notify_all()
+
+    def discard(self, task_id):
+        with self._cond:
+            self._pending[task_id] = None
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until every queued change has been applied; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+            time.sleep(self.max_wait)
+            with self._cond:
+                pending, self._pending = self._pending, {}
+                self._busy = True
+            try:
+                rows = [(task_id, *values) for task_id, values in pending.items() if values is not None]
+                removed = [task_id for task_id, values in pending.items() if values is None]
+                if rows:
+                    self.upsert(rows)
+                if removed:
+                    self.remove(removed)
+                self.batches += 1
+            except Exception as e:
+                print(f"Error applying task index changes: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,51 @@
+"""Deferred construction for services that are expensive to start.
+
+``LazyService`` stands in for the object a factory builds and creates it on
+first attribute access, so importing the app costs nothing and a worker can
+take requests before the model stack has loaded. Construction happens once,
+under a lock; concurrent first callers wait for the same instance. ``warm_up``
+builds it on a background thread instead of on the first request.
+"""
+import threading
+
+
+class LazyService:
+    def __init__(self, factory, name='lazy-service'):
+        self._factory = factory
+        self._name = name
+        self._instance = None
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def get(self):
+        """The service, built by this call if no other thread has built it yet."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def warm_up(self):
+        """Build the service on a daemon thread; returns the thread."""
+        with self._lock:
+            if self._warm_up_thread is None and self._instance is None:
+                self._warm_up_thread = threading.Thread(target=self._warm_up, name=f'{self._name}-warm-up',
+                                                        daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except Exception as e:
+            # The next request retries and reports the failure itself
+            print(f"Error warming up {self._name}: {e}")
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,179 @@
+"""Vector similarity engine behind AIService.find_similar_tasks.
+
+The corpus is encoded once into a contiguous float32 matrix of L2-normalized
+rows, so scoring a query is one matrix-vector product plus an argpartition
+top-k. The bundled sentence-transformer is used when its weights are present;
+otherwise a hashed TF-IDF encoder with the same interface takes its place.
+"""
+from pathlib import Path
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 384  # Matches the bundled model, so both encoders give the same matrix shape
+WEIGHT_FILES = ('model.safetensors', 'pytorch_model.bin')
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+class HashingEncoder:
+    """TF-IDF over hashed word and character trigram features.
+
+    Character trigrams let partially typed words ("medit") match whole ones
+    ("meditate"). Features are hashed with CRC32 so vectors are stable across
+    processes.
+    """
+
+    name = 'hashing-tfidf'
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _features(self, text):
+        features = []
+        for word in _WORD_RE.findall(text.lower()):
+            features.append(word)
+            padded = f'#{word}#'
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _term_matrix(self, texts):
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                rows.append(row)
+                cols.append(h % self.dim)
+                # The top bit picks a sign so collisions tend to cancel out
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(signs, dtype=np.float32))
+        return matrix
+
+    def fit(self, texts, batch_size=10000):
+        """Learn inverse document frequencies from the corpus, a batch at a time."""
+        texts = list(texts)
+        document_frequency = np.zeros(self.dim, dtype=np.int64)
+        for start in range(0, len(texts), batch_size):
+            document_frequency += np.count_nonzero(self._term_matrix(texts[start:start + batch_size]), axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self
+
+    def state(self):
+        return {'idf': self.idf}
+
+    def load_state(self, state):
+        self.idf = np.asarray(state['idf'], dtype=np.float32)
+
+    def encode(self, texts):
+        matrix = self._term_matrix(list(texts))
+        matrix *= self.idf
+        return _normalize_rows(matrix)
+
+
+class SentenceTransformerEncoder:
+    """Mean-pooled, normalized embeddings from the bundled sentence-transformer."""
+
+    name = 'sentence-transformer'
+
+    def __init__(self, model_dir):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(str(model_dir), device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts):
+        return self
+
+    def state(self):
+        return {}
+
+    def load_state(self, state):
+        pass
+
+    def encode(self, texts):
+        embeddings = self.model.encode(list(texts), batch_size=64, convert_to_numpy=True,
+                                       normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+def load_encoder(model_dir=None):
+    """The sentence-transformer if its weights can be loaded, else the hashing encoder."""
+    if model_dir is not None and any((Path(model_dir) / name).exists() for name in WEIGHT_FILES):
+        try:
+            return SentenceTransformerEncoder(model_dir)
+        except Exception as e:
+            print(f"Falling back to hashing encoder, could not load {model_dir}: {e}")
+    return HashingEncoder()
+
+
+# Cap on the rows x queries score block held in memory at once (~256MB of float32)
+MAX_SCORE_BLOCK = 1 << 26
+
+
+def top_k_rows_batch(matrix, queries, top_k, exclude=None):
+    """``(row, score)`` lists for each query against ``matrix``, best first.
+
+    All queries are scored in one matrix product per block, so the matrix is
+    read once per block instead of once per query. Rows where ``exclude`` is
+    non-zero are never returned.
+    """
+    rows = len(matrix)
+    if not rows or top_k <= 0:
+        return [[] for _ in range(len(queries))]
+
+    excluded = None if exclude is None else np.asarray(exclude, dtype=bool)
+    k = min(top_k, rows)
+    block = max(1, MAX_SCORE_BLOCK // rows)
+    results = []
+    for start in range(0, len(queries), block):
+        scores = matrix @ np.asarray(queries[start:start + block]).T  # rows x queries
+        if excluded is not None:
+            scores[excluded] = -np.inf
+        if k < rows:
+            top = np.argpartition(scores, -k, axis=0)[-k:]
+        else:
+            top = np.broadcast_to(np.arange(rows)[:, None], scores.shape)
+        for column in range(scores.shape[1]):
+            column_scores = scores[top[:, column], column]
+            order = np.argsort(-column_scores, kind='stable')
+            results.append([(int(top[i, column]), float(column_scores[i]))
+                            for i in order if column_scores[i] != -np.inf])
+    return results
+
+
+def top_k_rows(matrix, query, top_k, exclude=None):
+    """``(row, score)`` pairs for the ``top_k`` rows of ``matrix`` closest to ``query``."""
+    return top_k_rows_batch(matrix, np.asarray(query)[None, :], top_k, exclude)[0]
+
+
+class SimilarityEngine:
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.matrix = np.zeros((0, getattr(encoder, 'dim', EMBEDDING_DIM)), dtype=np.float32)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def build(self, texts):
+        """Encode the whole corpus once into a contiguous float32 matrix."""
+        texts = list(texts)
+        self.encoder.fit(texts)
+        self.matrix = np.ascontiguousarray(self.encoder.encode(texts), dtype=np.float32)
+        return self
+
+    def search(self, text, top_k=3):
+        """Return ``(row, score)`` pairs for the ``top_k`` most similar rows."""
+        if not len(self):
+            return []
+        return top_k_rows(self.matrix, self.encoder.encode([text])[0], top_k)
@@ -0,0 +1,173 @@
+"""Memo cache for AI suggestion results.
+
+Keys are the normalized input (lowercased, whitespace collapsed) plus the
+version of the data the answer came from, e.g. the recommendations file hash,
+so a reloaded corpus never serves stale suggestions. Entries live in a bounded
+in-process LRU with an optional TTL. With ``path`` set, a shared SQLite file
+sits behind it so every worker process on the host reuses each other's
+results; the file is a cache only and may be deleted at any time.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+# Shared-tier eviction runs once per this many writes rather than on every put
+SHARED_EVICT_EVERY = 64
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def make_key(namespace, version, *parts):
+    return '\x1f'.join([namespace, str(version), *(normalize(part) if isinstance(part, str) else str(part)
+                                                   for part in parts)])
+
+
+class SuggestionCache:
+    def __init__(self, max_entries=4096, ttl=None, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.path = path
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        if path:
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                             '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, used REAL NOT NULL)')
+
+    def _connect(self):
+        # sqlite3 connections are per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def _expiry(self, now):
+        return now + self.ttl if self.ttl else None
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expired += 1
+
+        if self.path:
+            value = self._shared_get(key, now)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+                    self._store(key, value, self._expiry(now))
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        now = time.time()
+        expires = self._expiry(now)
+        with self._lock:
+            self._store(key, value, expires)
+        if self.path:
+            self._shared_put(key, value, expires, now)
+
+    def _store(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _shared_get(self, key, now):
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value, expires FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                with self._lock:
+                    self.expired += 1
+                return None
+            conn.execute('UPDATE entries SET used = ? WHERE key = ?', (now, key))
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Error reading suggestion cache: {e}")
+            return None
+
+    def _shared_put(self, key, value, expires, now):
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO entries (key, value, expires, used) VALUES (?, ?, ?, ?)',
+                         (key, json.dumps(value), expires, now))
+            with self._lock:
+                self._writes += 1
+                evict = self._writes % SHARED_EVICT_EVERY == 0
+            if evict:
+                self._shared_evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"Error writing suggestion cache: {e}")
+
+    def _shared_evict(self, conn, now):
+        conn.execute('DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        excess = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM entries WHERE key IN '
+                         '(SELECT key FROM entries ORDER BY used LIMIT ?)', (excess,))
+            with self._lock:
+                self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            try:
+                self._connect().execute('DELETE FROM entries')
+            except sqlite3.Error as e:
+                print(f"Error clearing suggestion cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'shared': bool(self.path),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
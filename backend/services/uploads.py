@@ -0,0 +1,178 @@
+"""Content-addressed image uploads with background renditions.
+
+An upload is streamed to a temporary file in fixed-size chunks while it is
+hashed, then renamed to ``<sha256>.<ext>``, so identical images are stored
+once and different images never overwrite each other. Smaller WebP
+renditions (``<sha256>_<name>.webp``) are rendered by a bounded worker
+pool; when its queue is full the uploading request renders them itself,
+which keeps memory bounded under bursts. A rendition asked for before it
+is ready is rendered (or waited for) on demand.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+CHUNK_SIZE = 64 * 1024
+# Rendition name -> longest side in pixels
+RENDITIONS = {'thumb': 256, 'medium': 1024}
+WEBP_QUALITY = 80
+
+# Leading bytes -> stored extension. The content decides the type, not the filename.
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+_NAME_RE = re.compile(r'(?P<digest>[0-9a-f]{64})(?:_(?P<rendition>[a-z]+))?\.(?P<ext>[a-z]+)')
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+def sniff_extension(head):
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    raise UnsupportedImage('File is not a PNG, JPEG or GIF image')
+
+
+def rendition_name(digest, rendition):
+    return f'{digest}_{rendition}.webp'
+
+
+def content_address(filename):
+    """The part of ``filename`` that names its content, or None for other files.
+
+    Content-addressed files never change, so this doubles as a strong ETag.
+    """
+    match = _NAME_RE.fullmatch(filename)
+    return filename.rsplit('.', 1)[0] if match else None
+
+
+class UploadStore:
+    def __init__(self, root, max_workers=2, max_pending=32):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='renditions')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = {}  # digest -> Future
+        self._lock = threading.Lock()
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def save(self, stream, max_size=None):
+        """Store an image from a binary stream; returns its digest, filename and whether it was new."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                head = b''
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UnsupportedImage(f'File is larger than {max_size} bytes')
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    out.write(chunk)
+            extension = sniff_extension(head)
+            digest = digest.hexdigest()
+            filename = f'{digest}.{extension}'
+            created = not os.path.exists(self.path(filename))
+            if created:
+                os.replace(tmp_path, self.path(filename))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if created or not self.renditions_ready(digest):
+            self.schedule_renditions(digest, filename)
+        return {'digest': digest, 'filename': filename, 'size': size, 'created': created}
+
+    def renditions_ready(self, digest):
+        return all(os.path.exists(self.path(rendition_name(digest, name))) for name in RENDITIONS)
+
+    def schedule_renditions(self, digest, filename):
+        with self._lock:
+            if digest in self._pending:
+                return self._pending[digest]
+        if not self._slots.acquire(blocking=False):
+            # Queue full: render in the caller rather than queue without bound
+            try:
+                self.render(digest, filename)
+            except Exception as e:
+                print(f"Error rendering {filename}: {e}")
+            return None
+        with self._lock:
+            future = self._executor.submit(self._render_job, digest, filename)
+            self._pending[digest] = future
+        return future
+
+    def _render_job(self, digest, filename):
+        try:
+            self.render(digest, filename)
+        except Exception as e:
+            print(f"Error rendering {filename}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+            self._slots.release()
+
+    def render(self, digest, filename):
+        """Write every missing WebP rendition of ``filename``."""
+        with Image.open(self.path(filename)) as image:
+            # First frame of animations, upright according to EXIF
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            for name, size in RENDITIONS.items():
+                target = self.path(rendition_name(digest, name))
+                if os.path.exists(target):
+                    continue
+                copy = image.copy()
+                copy.thumbnail((size, size))
+                fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.rendition-')
+                with os.fdopen(fd, 'wb') as out:
+                    copy.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+                os.replace(tmp_path, target)
+
+    def ensure(self, filename):
+        """Make sure ``filename`` exists, rendering it now if it is a missing rendition."""
+        if os.path.exists(self.path(filename)):
+            return True
+        match = _NAME_RE.fullmatch(filename)
+        if not match or match['rendition'] not in RENDITIONS or match['ext'] != 'webp':
+            return False
+        digest = match['digest']
+        with self._lock:
+            future = self._pending.get(digest)
+        if future is not None:
+            future.result()
+        else:
+            originals = [f'{digest}.{extension}' for _signature, extension in SIGNATURES]
+            original = next((name for name in originals if os.path.exists(self.path(name))), None)
+            if original is None:
+                return False
+            try:
+                self.render(digest, original)
+            except Exception as e:
+                print(f"Error rendering {original}: {e}")
+        return os.path.exists(self.path(filename))
+
+    def wait(self):
+        """Block until queued renditions are written (tests, shutdown)."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result()
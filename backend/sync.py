@@ -0,0 +1,84 @@
+"""Change tracking for delta sync and conditional list requests.
+
+Every ORM flush appends one ``change_log`` row per synced row it touched
+(``models.record_changes``). The log id is a monotonic version: a client
+that last synced at token N asks ``/sync?since=N`` and gets only the rows
+changed after N, as their current values or as tombstones. The newest log
+id per table also serves as the list endpoints' ETag.
+
+``prune_change_log`` (``flask prune-change-log``, run it from cron) deletes
+the oldest rows. Pruning only ever removes a prefix of the log and keeps its
+newest row, so every id below the oldest remaining one may have been pruned:
+a token older than that gets a full resync instead of a delta.
+"""
+from models import ChangeLog
+from sqlalchemy import delete, func, select
+import os
+
+# Changes per /sync response; clients keep calling while "more" is true
+SYNC_MAX_CHANGES = 5000
+# Change log rows older than this are pruned; clients that stay away longer resync in full
+CHANGE_LOG_RETENTION_DAYS = float(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 30))
+PRUNE_BATCH_SIZE = 10000
+
+
+def current_token(session):
+    return session.query(func.max(ChangeLog.id)).scalar() or 0
+
+def pruned_through(session):
+    """Highest token whose changes may have been pruned; older tokens need a full resync."""
+    oldest = session.query(func.min(ChangeLog.id)).scalar()
+    return oldest - 1 if oldest else 0
+
+def table_versions(session, tables):
+    """Newest change log id for each of ``tables`` (0 if never changed), in one query.
+
+    A table whose every change was pruned reports the pruning horizon instead,
+    which is newer than any version it had, so its ETag never goes backwards.
+    """
+    *versions, oldest = session.execute(select(*[
+        select(func.max(ChangeLog.id)).where(ChangeLog.table_name == table).scalar_subquery()
+        for table in tables
+    ], select(func.min(ChangeLog.id)).scalar_subquery())).one()
+    horizon = oldest - 1 if oldest else 0
+    return [max(version or 0, horizon) for version in versions]
+
+def prune_change_log(session, older_than, batch_size=PRUNE_BATCH_SIZE):
+    """Delete change log rows written before ``older_than``; returns how many.
+
+    Deletes in batches of ``batch_size``, committing each, and always keeps
+    the newest row so the token never goes backwards.
+    """
+    boundary = session.query(func.min(ChangeLog.id)).filter(ChangeLog.changed_at >= older_than).scalar()
+    if boundary is None:
+        boundary = current_token(session)
+    pruned = 0
+    while True:
+        batch = select(ChangeLog.id).where(ChangeLog.id < boundary).order_by(ChangeLog.id).limit(batch_size)
+        count = session.execute(delete(ChangeLog).where(ChangeLog.id.in_(batch))).rowcount
+        session.commit()
+        pruned += count
+        if count < batch_size:
+            return pruned
+
+def changes_since(session, since, limit=SYNC_MAX_CHANGES):
+    """Rows changed after token ``since``.
+
+    Returns ``(token, more, changes)`` where ``changes`` maps table name to
+    ``(changed_ids, deleted_ids)``, each row listed once by its latest state.
+    """
+    entries = session.query(ChangeLog.id, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.deleted) \
+        .filter(ChangeLog.id > since).order_by(ChangeLog.id).limit(limit + 1).all()
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _id, table, row_id, deleted in entries:
+        latest[table, row_id] = deleted
+
+    changes = {}
+    for (table, row_id), deleted in latest.items():
+        changed_ids, deleted_ids = changes.setdefault(table, ([], []))
+        (deleted_ids if deleted else changed_ids).append(row_id)
+    token = entries[-1][0] if entries else since
+    return token, more, changes
@@ -0,0 +1,259 @@
+from services.ai_service import AIService
+from services.ann import IVFFlatIndex
+from services.batching import MicroBatcher
+from services.category_classifier import CategoryClassifier
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from services.embedding_index import EmbeddingIndex
+from services.index_queue import IndexQueue
+from services.suggestion_cache import SuggestionCache, make_key
+from services.similarity import HashingEncoder, SimilarityEngine, top_k_rows
+import numpy as np
+import pytest
+
+
+def test_engine_ranks_closest_entry_first():
+    corpus = ['Go for a morning run', 'Buy groceries', 'Meditate for 10 minutes', 'Plan your day']
+    engine = SimilarityEngine(HashingEncoder()).build(corpus)
+
+    results = engine.search('buy some groceries', top_k=2)
+
+    assert len(results) == 2
+    assert corpus[results[0][0]] == 'Buy groceries'
+    assert results[0][1] > results[1][1]
+
+
+def test_find_similar_tasks_matches_partial_words():
+    service = AIService()
+
+    suggestions = service.find_similar_tasks('medit')
+
+    assert suggestions[0]['title'] == 'Meditate for 10 minutes'
+    assert set(suggestions[0]) == {'title', 'category', 'description', 'priority',
+                                   'similarity_score', 'similar_habits'}
+
+
+def test_embedding_index_persists_and_appends(tmp_path):
+    entries = [('1', 'Buy groceries', {'id': 1}), ('2', 'Plan your day', {'id': 2})]
+    EmbeddingIndex(tmp_path, HashingEncoder()).build(entries, source_hash='v1')
+
+    index = EmbeddingIndex(tmp_path, HashingEncoder())
+    assert index.is_current('v1')
+    assert not index.is_current('v2')
+    index.open()
+    assert index.search('groceries', top_k=1)[0][0] == '1'
+
+    # Editing appends a new row and retires the old one; unchanged entries are skipped
+    assert index.upsert([('1', 'Call the dentist', {'id': 1}), ('2', 'Plan your day', {'id': 2})]) == 1
+    assert len(index) == 3
+    assert index.search('dentist', top_k=1)[0][0] == '1'
+    assert sorted(key for key, _score, _data in index.search('groceries', top_k=5)) == ['1', '2']
+
+    index.remove(['2'])
+    assert [key for key, _score, _data in EmbeddingIndex(tmp_path, HashingEncoder()).open().search('day', 5)] == ['1']
+
+
+def test_remove_is_seen_by_other_writers(tmp_path):
+    EmbeddingIndex(tmp_path, HashingEncoder()).build([('1', 'Buy groceries', {})])
+    first = EmbeddingIndex(tmp_path, HashingEncoder()).open()
+    assert first.upsert([('1', 'Buy groceries', {})]) == 0
+
+    EmbeddingIndex(tmp_path, HashingEncoder()).open().remove(['1'])
+
+    # The other writer's key cache must not treat the removed row as current
+    assert first.upsert([('1', 'Buy groceries', {})]) == 1
+    assert first.search('groceries', top_k=1)[0][0] == '1'
+
+
+def test_searches_stay_consistent_while_another_writer_appends(tmp_path):
+    EmbeddingIndex(tmp_path, HashingEncoder()).build([(str(i), f'task number {i}', {}) for i in range(200)])
+    reader = EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=4, n_probe=4)).open()
+    writer = EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=4, n_probe=4)).open()
+    done = []
+
+    def search(_):
+        while not done:
+            reader.refresh()
+            assert len(reader.search('task number', top_k=3)) == 3
+
+    with ThreadPoolExecutor(4) as pool:
+        searches = [pool.submit(search, i) for i in range(4)]
+        for i in range(40):
+            writer.upsert([(str(i), f'edited task {i}', {})])
+            writer.remove([str(199 - i)])
+        done.append(True)
+        for future in searches:
+            future.result()
+
+
+def test_similar_endpoint_reports_existing_tasks(client):
+    client.post('/add', json={'title': 'Renew passport', 'category': 'personal', 'priority': 'high'})
+    # Indexing happens off the request path
+    from app import task_indexer
+    assert task_indexer.flush(timeout=10)
+
+    response = client.post('/api/suggestions/similar', json={'text': 'renew my passport'}).json
+
+    assert response['existing_matches'][0]['title'] == 'Renew passport'
+
+
+def test_ivf_with_every_list_probed_matches_exact_search():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ivf = IVFFlatIndex(n_lists=16, n_probe=16).build(vectors)
+
+    for query in vectors[:20]:
+        assert [row for row, _ in ivf.search(vectors, query, 5)] == [row for row, _ in top_k_rows(vectors, query, 5)]
+
+
+def test_embedding_index_searches_rows_appended_after_ann_build(tmp_path):
+    words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel']
+    entries = [(str(i), f'{words[i % 8]} {words[(i // 8) % 8]} task {i}', {}) for i in range(500)]
+    index = EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=8, n_probe=2))
+    index.build(entries)
+    assert index.searcher.built_rows == 500
+
+    index.upsert([('new', 'renew passport at the embassy', {})])
+
+    assert index.search('renew passport', top_k=1)[0][0] == 'new'
+
+
+def test_only_writers_rebuild_the_ann_structure(tmp_path):
+    entries = [(str(i), f'task number {i}', {}) for i in range(100)]
+    EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=4)).build(entries)
+    (tmp_path / 'ann_ivf.npz').unlink()
+
+    reader = EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=4)).open()
+    assert reader.searcher.name == 'exact'
+    assert not list(tmp_path.glob('ann_*'))
+
+    EmbeddingIndex(tmp_path, HashingEncoder(), IVFFlatIndex(n_lists=4)).open().upsert([('new', 'renew passport', {})])
+    assert [path.name for path in tmp_path.glob('ann_*')] == ['ann_ivf.npz']
+    reader.refresh()
+    assert reader.searcher.name == 'ivf'
+
+
+def test_batch_routes_match_single_routes(client):
+    texts = ['morning run', '', 'plan the day']
+
+    batch = client.post('/api/suggestions/similar/batch', json={'texts': texts}).json['results']
+    singles = [client.post('/api/suggestions/similar', json={'text': text}).json['suggestions'] for text in texts]
+    # Zero-score ties may come back in either order, so compare the best match
+    assert [len(results) for results in batch] == [len(results) for results in singles] == [3, 0, 3]
+    assert [results[0]['title'] for results in batch if results] == ['Go for a morning run', 'Plan your day']
+    assert [results[0]['title'] for results in singles if results] == ['Go for a morning run', 'Plan your day']
+
+    items = [{'title': 'Buy milk', 'description': 'grocery store'}, {'title': 'Team meeting', 'description': ''}]
+    categories = client.post('/api/suggestions/category/batch', json={'items': items}).json['categories']
+    assert categories == ['shopping', 'work']
+
+
+def test_similar_routes_reject_bad_top_k_and_survive_batch_failures(client, monkeypatch):
+    for top_k in ('3', 0, -1, 1000, True, 2.5):
+        response = client.post('/api/suggestions/similar/batch', json={'texts': ['run'], 'top_k': top_k})
+        assert response.status_code == 400
+
+    def fail(texts):
+        raise RuntimeError('scoring failed')
+
+    monkeypatch.setattr('app.similar_batcher', MicroBatcher(fail, max_wait=0))
+    response = client.post('/api/suggestions/similar', json={'text': 'morning run'})
+    assert response.status_code == 200
+    assert response.json['suggestions'] == []
+
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    batches = []
+
+    def handler(items):
+        batches.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=8, max_wait=0.05)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(batcher.submit, range(8)))
+
+    assert results == [i * 2 for i in range(8)]
+    assert len(batches) < 8
+
+
+def test_micro_batcher_fails_a_batch_with_missing_results():
+    batcher = MicroBatcher(lambda items: items[:-1], max_wait=0)
+
+    with pytest.raises(RuntimeError, match='returned 0 results for 1 items'):
+        batcher.submit('text', timeout=5)
+
+
+def test_category_keywords_match_whole_words_only():
+    service = AIService()
+
+    assert service.suggest_category('Call herself', '') == 'personal'
+    assert service.category_scores('Call herself', '')['personal'] == 0
+    assert service.suggest_category('Go shopping', 'for groceries') == 'shopping'
+    assert service.suggest_category('Finish report', 'urgent, due asap') == 'urgent'
+
+
+def test_category_classifier_reloads_when_config_changes(tmp_path):
+    config_path = tmp_path / 'keywords.json'
+    config_path.write_text(json.dumps({'default': 'personal', 'categories': {'work': {'standup': 1}}}))
+    classifier = CategoryClassifier(config_path)
+    assert classifier.classify('daily standup')[0] == 'work'
+
+    config_path.write_text(json.dumps({'default': 'personal', 'categories': {'health': {'standup': 2}}}))
+    os.utime(config_path, ns=(0, 1))
+    classifier._next_check = 0
+
+    assert classifier.classify('daily standup') == ('health', {'health': 2.0})
+
+
+def test_suggestion_cache_evicts_expires_and_shares(tmp_path):
+    cache = SuggestionCache(max_entries=2, ttl=60)
+    cache.put(make_key('similar', 'v1', 'Buy  Milk'), ['a'])
+    cache.put(make_key('similar', 'v1', 'call mom'), ['b'])
+    assert cache.get(make_key('similar', 'v1', 'buy milk')) == ['a']
+    cache.put(make_key('similar', 'v1', 'walk dog'), ['c'])
+
+    assert cache.get(make_key('similar', 'v1', 'call mom')) is None
+    assert cache.get(make_key('similar', 'v2', 'buy milk')) is None
+    assert cache.stats()['evictions'] == 1
+
+    cache._entries[make_key('similar', 'v1', 'buy milk')] = (0, ['a'])
+    assert cache.get(make_key('similar', 'v1', 'buy milk')) is None
+    assert cache.stats()['expired'] == 1
+
+    path = str(tmp_path / 'suggestions.db')
+    SuggestionCache(path=path).put('key', {'category': 'work'})
+    other = SuggestionCache(path=path)
+    assert other.get('key') == {'category': 'work'}
+    assert other.stats()['shared_hits'] == 1
+
+
+def test_similar_suggestions_are_cached_per_corpus_version():
+    service = AIService()
+    first = service.find_similar_tasks('Morning  run')
+    hits = service.suggestion_cache.hits
+
+    assert service.find_similar_tasks('morning run') == first
+    assert service.suggestion_cache.hits == hits + 1
+
+    service.recommendation_index.header = dict(service.recommendation_index.header, source_hash='changed')
+    service.find_similar_tasks('morning run')
+    assert service.suggestion_cache.hits == hits + 1
+
+
+def test_index_queue_applies_the_latest_change_per_task_in_one_batch():
+    calls = []
+    index_queue = IndexQueue(lambda rows: calls.append(('upsert', sorted(rows))),
+                             lambda ids: calls.append(('remove', sorted(ids))), max_wait=0.05)
+    index_queue.put(1, 'Pay rent')
+    index_queue.put(2, 'Call mom')
+    index_queue.put(1, 'Pay rent today')
+    index_queue.discard(2)
+    index_queue.put(3, 'Walk dog', 'around the park')
+
+    assert index_queue.flush(timeout=10)
+    assert calls == [('upsert', [(1, 'Pay rent today', ''), (3, 'Walk dog', 'around the park')]),
+                     ('remove', [2])]
+    assert index_queue.batches == 1
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+pytest.importorskip('greenlet')
+
+
+def call(app, method, path, query=b'', body=b'', headers=()):
+    """Run one HTTP request through the ASGI app; returns ``(status, headers, body)``."""
+    messages = []
+    if body:
+        headers = list(headers) + [('Content-Length', str(len(body)))]
+    sent = [False]
+
+    async def receive():
+        if sent[0]:
+            await asyncio.sleep(3600)
+        sent[0] = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query, 'root_path': '',
+             'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+             'client': ('127.0.0.1', 1234), 'server': ('testserver', 80)}
+    asyncio.run(app(scope, receive, send))
+    start = next(message for message in messages if message['type'] == 'http.response.start')
+    content = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return start['status'], {name.decode().lower(): value.decode() for name, value in start['headers']}, content
+
+
+@pytest.fixture
+def asgi_app(client):
+    from asgi import AsyncApp, create_async_db_engine
+    from app import app
+
+    return AsyncApp(app, create_async_db_engine())
+
+
+def test_async_listings_match_the_flask_responses(client, asgi_app):
+    for i in range(3):
+        client.post('/add', json={'title': f'Task {i}', 'category': 'work', 'priority': 'low'})
+    client.post('/add_habit', json={'name': 'Read', 'frequency': 'daily', 'category': 'learning'})
+
+    for path, query in (('/tasks', b''), ('/tasks', b'limit=2&fields=title'), ('/habits', b'')):
+        expected = client.get(f"{path}?{query.decode()}")
+        status, headers, body = call(asgi_app, 'GET', path, query)
+
+        assert status == 200
+        assert json.loads(body) == expected.json
+        assert headers['etag'] == expected.headers['ETag']
+        assert headers.get('x-next-cursor') == expected.headers.get('X-Next-Cursor')
+
+    etag = client.get('/tasks').headers['ETag']
+    status, _headers, body = call(asgi_app, 'GET', '/tasks', headers=[('If-None-Match', etag)])
+    assert (status, body) == (304, b'')
+    assert call(asgi_app, 'GET', '/tasks', b'limit=0')[0] == 400
+
+
+def test_suggestions_run_on_the_executor_and_other_routes_reach_flask(client, asgi_app):
+    status, _headers, body = call(asgi_app, 'POST', '/api/suggestions/similar', body=b'{"text": "buy milk"}',
+                                  headers=[('Content-Type', 'application/json')])
+    assert status == 200 and json.loads(body)['status'] == 'success'
+
+    status, _headers, body = call(asgi_app, 'POST', '/add', headers=[('Content-Type', 'application/json')],
+                                  body=b'{"title": "Via Flask", "category": "work", "priority": "high"}')
+    assert status == 200
+    assert [task['title'] for task in client.get('/tasks').json] == ['Via Flask']
@@ -0,0 +1,66 @@
+
+def task(title, **fields):
+    return dict({'title': title, 'category': 'work', 'priority': 'low'}, **fields)
+
+
+def titles(client):
+    return sorted(task['title'] for task in client.get('/tasks').json)
+
+
+def test_atomic_batch_rolls_back_on_any_invalid_item(client):
+    response = client.post('/batch', json={'tasks': {
+        'create': [task('Write report'), task('Call plumber', priority='someday')],
+        'delete': [999]
+    }})
+
+    assert response.status_code == 400
+    assert response.json['status'] == 'rolled_back'
+    results = response.json['results']['tasks']
+    assert results['create'][0] == {'ok': False, 'error': 'not applied'}
+    assert results['create'][1]['error'].startswith('priority')
+    assert results['delete'][0] == {'ok': False, 'id': 999, 'error': 'not found'}
+    assert titles(client) == []
+
+
+def test_best_effort_batch_applies_valid_items(client):
+    created = client.post('/batch', json={'tasks': {'create': [task('Write report'), task('Call plumber')]}})
+    first, second = [result['id'] for result in created.json['results']['tasks']['create']]
+    token = client.get('/sync').json['token']
+
+    response = client.post('/batch', json={'mode': 'best_effort', 'tasks': {
+        'create': [task('Buy milk'), {'title': 'No category'}],
+        'update': [{'id': first, 'completed': True}, {'id': 999, 'completed': True}],
+        'delete': [second]
+    }, 'bucket_list': {'create': [{'title': 'Visit Japan', 'category': 'personal', 'priority': 'high'}]}})
+
+    assert response.json['status'] == 'partial'
+    assert [result['ok'] for result in response.json['results']['tasks']['create']] == [True, False]
+    assert titles(client) == ['Buy milk', 'Write report']
+    assert [t['completed'] for t in client.get('/tasks').json if t['id'] == first] == [True]
+    assert client.get('/bucket-list/stats').json['total_goals'] == 1
+
+    changes = client.get(f'/sync?since={token}').json['changes']
+    assert sorted(t['title'] for t in changes['tasks']['upserts']) == ['Buy milk', 'Write report']
+    assert changes['tasks']['tombstones'] == [second]
+
+
+def test_batch_habit_delete_removes_completions(client):
+    created = client.post('/batch', json={'habits': {'create': [
+        {'name': 'Read', 'frequency': 'daily', 'start_date': '2024-01-01'}
+    ]}})
+    habit_id = created.json['results']['habits']['create'][0]['id']
+    client.post(f'/complete_habit/{habit_id}')
+
+    client.post('/batch', json={'habits': {'delete': [habit_id]}})
+
+    assert client.get('/habits').json == []
+    assert client.get(f'/habit_completions/{habit_id}').json == []
+
+
+def test_batch_statement_count_does_not_grow_with_items(client, query_counter):
+    def create(count):
+        query_counter.clear()
+        client.post('/batch', json={'tasks': {'create': [task(f'Task {i}') for i in range(count)]}})
+        return len(query_counter)
+
+    assert create(1) == create(200)
@@ -0,0 +1,36 @@
+def add_item(client, title, category='personal', priority='medium'):
+    return client.post('/bucket-list', json={
+        'title': title,
+        'category': category,
+        'priority': priority
+    }).json['id']
+
+
+def test_bucket_list_stats_breakdown(client):
+    first = add_item(client, 'Visit Japan', 'personal', 'high')
+    add_item(client, 'Run a marathon', 'personal', 'medium')
+    third = add_item(client, 'Learn Rust', 'work', 'medium')
+    client.put(f'/bucket-list/{first}/complete')
+    client.put(f'/bucket-list/{third}/start')
+
+    stats = client.get('/bucket-list/stats').json
+
+    assert stats['total_goals'] == 3
+    assert stats['completed_goals'] == 1
+    assert stats['in_progress'] == 1
+    assert round(stats['completion_rate'], 2) == 33.33
+    assert stats['by_status'] == {'completed': 1, 'in_progress': 1, 'not_started': 1}
+    assert stats['by_category'] == {'personal': 2, 'work': 1}
+    assert stats['by_priority'] == {'high': 1, 'medium': 2}
+
+
+def test_bucket_list_stats_cached_until_mutation(client, query_counter):
+    item_id = add_item(client, 'Visit Japan')
+    client.get('/bucket-list/stats')
+
+    query_counter.clear()
+    assert client.get('/bucket-list/stats').json['total_goals'] == 1
+    assert query_counter == []
+
+    client.delete(f'/bucket-list/{item_id}')
+    assert client.get('/bucket-list/stats').json['total_goals'] == 0
@@ -1,5 +1,6 @@
-from models import Session
-from sqlalchemy import text  # Import the text function
+from models import Session, create_db_engine, pool_metrics
+from sqlalchemy import exc, text  # Import the text function
+import pytest
 
 def test_database_connection():
     session = Session()
@@ -12,5 +13,18 @@ def test_database_connection():
     finally:
         session.close()
 
+def test_pool_counts_only_successful_checkouts_and_real_timeouts(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool='queue', pool_size=1,
+                              max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    stats = pool_metrics(engine)
+    assert stats['checkouts'] == 1
+    assert stats['timeouts'] == 1
+    engine.dispose()
+
 if __name__ == "__main__":
     test_database_connection()
\ No newline at end of file
@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from habit_stats import rebuild_habit_stats, record_completion, stats_snapshot
+from models import Session, ChangeLog, Habit, HabitCompletion
+
+
+def add_habits(count, history_days):
+    session = Session()
+    today = date.today()
+    for i in range(count):
+        habit = Habit(name=f'Habit {i}', frequency='daily', category='health',
+                      start_date=datetime(2020, 1, 1))
+        habit.completions = [HabitCompletion(completed_date=today - timedelta(days=day), count=1)
+                             for day in range(history_days)]
+        session.add(habit)
+    session.commit()
+    Session.remove()
+
+
+def test_get_habits_filters_completions_to_selected_date(client):
+    add_habits(2, history_days=10)
+    selected = date.today() - timedelta(days=3)
+
+    habits = client.get(f'/habits?date={selected.isoformat()}T00:00:00').json
+
+    assert len(habits) == 2
+    for habit in habits:
+        assert habit['completions'] == [{'date': selected.isoformat(), 'count': 1}]
+
+
+def test_get_habits_query_count_does_not_grow_with_habits(client, query_counter):
+    add_habits(1, history_days=30)
+    query_counter.clear()
+    client.get(f'/habits?date={date.today().isoformat()}')
+    single_habit_queries = len(query_counter)
+
+    add_habits(49, history_days=30)
+    query_counter.clear()
+    client.get(f'/habits?date={date.today().isoformat()}')
+
+    assert len(query_counter) == single_habit_queries
+    # ETag version lookup, habits, that day's completions
+    assert len(query_counter) <= 3
+
+
+def test_weekly_streak_counts_consecutive_weeks(client):
+    session = Session()
+    habit = Habit(name='Long run', frequency='weekly', start_date=datetime(2024, 1, 1))
+    session.add(habit)
+    monday = date(2024, 6, 3)
+    # Two completions in the first week, then one in each of the next two weeks
+    for day in (monday, monday + timedelta(days=4), monday + timedelta(days=9), monday + timedelta(days=15)):
+        session.add(HabitCompletion(habit=habit, completed_date=day, count=1))
+        record_completion(session, habit, day)
+    session.commit()
+
+    assert habit.stats.current_streak == 3
+    assert habit.stats.longest_streak == 3
+    assert habit.stats.total_completions == 4
+    Session.remove()
+
+
+def test_incremental_stats_match_rebuild(client):
+    add_habits(1, history_days=0)
+    habit_id = Session().query(Habit.id).scalar()
+    Session.remove()
+    for _ in range(3):
+        client.post(f'/complete_habit/{habit_id}')
+
+    session = Session()
+    habit = session.get(Habit, habit_id)
+    today = datetime.utcnow().date()
+    incremental = stats_snapshot(habit, habit.stats, today)
+    rebuilt = stats_snapshot(habit, rebuild_habit_stats(session, habit, today), today)
+    Session.remove()
+
+    assert incremental == rebuilt
+    assert incremental['current_streak'] == 1
+    assert incremental['rolling_counts']['7d'] == 1
+
+
+def test_habit_stats_reads_do_not_scan_history(client, query_counter):
+    add_habits(1, history_days=400)
+    habit_id = Session().query(Habit.id).scalar()
+    Session.remove()
+    client.get(f'/habit_stats/{habit_id}')
+
+    query_counter.clear()
+    stats = client.get(f'/habit_stats/{habit_id}').json
+
+    assert not any('FROM habit_completions' in statement for statement in query_counter)
+    assert stats['streak'] == 400
+    assert stats['rolling_counts'] == {'7d': 7, '30d': 30, '365d': 365}
+
+
+def hammer(client, habit_id, threads, per_thread):
+    """POST /complete_habit from ``threads`` threads at once; returns every response body."""
+    def complete(_):
+        with client.application.test_client() as thread_client:
+            return [thread_client.post(f'/complete_habit/{habit_id}').json for _ in range(per_thread)]
+
+    with ThreadPoolExecutor(threads) as pool:
+        return [body for bodies in pool.map(complete, range(threads)) for body in bodies]
+
+
+def test_concurrent_completions_neither_duplicate_nor_lose_counts(client):
+    session = Session()
+    habit = Habit(name='Water', frequency='weekly', start_date=datetime(2024, 1, 1))
+    session.add(habit)
+    session.commit()
+    habit_id = habit.id
+    Session.remove()
+
+    responses = hammer(client, habit_id, threads=16, per_thread=10)
+
+    assert all(response['message'] == 'Habit completed' for response in responses)
+    # Every increment got its own count back
+    assert sorted(response['completion_count'] for response in responses) == list(range(1, 161))
+
+    session = Session()
+    completions = session.query(HabitCompletion).filter_by(habit_id=habit_id).all()
+    assert [completion.count for completion in completions] == [160]
+    habit = session.get(Habit, habit_id)
+    assert habit.stats.total_completions == 160
+    assert habit.stats.daily_counts == {datetime.utcnow().date().isoformat(): 160}
+    assert session.query(ChangeLog).filter_by(table_name='habit_completions',
+                                              row_id=completions[0].id).count() == 160
+    Session.remove()
+
+
+def test_concurrent_completions_count_a_daily_habit_once(client):
+    add_habits(1, history_days=0)
+    habit_id = Session().query(Habit.id).scalar()
+    Session.remove()
+
+    responses = hammer(client, habit_id, threads=8, per_thread=5)
+
+    assert [response['message'] for response in responses].count('Habit completed') == 1
+    session = Session()
+    assert [completion.count for completion in session.query(HabitCompletion)] == [1]
+    assert session.get(Habit, habit_id).stats.total_completions == 1
+    Session.remove()
@@ -0,0 +1,52 @@
+import logging
+
+import metrics
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_metrics_endpoint_reports_routes_statuses_and_queries(client):
+    before = client.get('/metrics').get_data(as_text=True)
+    client.post('/add', json={'title': 'Pay rent', 'category': 'personal', 'priority': 'high'})
+    client.get('/tasks')
+    client.get('/tasks')
+    client.put('/update/999', json={'completed': True})
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.content_type == metrics.CONTENT_TYPE
+    ok = 'http_requests_total{method="GET",route="/tasks",status="200"}'
+    assert sample(text, ok) - (sample(before, ok) or 0) == 2
+    assert sample(text, 'http_requests_total{method="PUT",route="/update/<int:task_id>",status="404"}') >= 1
+    assert sample(text, 'http_request_queries_count{route="/tasks"}') >= 2
+    assert sample(text, 'http_request_queries_bucket{route="/tasks",le="0"}') == 0
+    assert sample(text, 'http_requests_in_flight') == 1  # the /metrics request itself
+    assert '# TYPE http_request_duration_seconds histogram' in text
+
+
+def test_slow_query_log_captures_statement_and_parameters(client, monkeypatch, caplog):
+    monkeypatch.setattr(metrics, 'slow_query_threshold', 0)
+    with caplog.at_level(logging.WARNING, logger='todo.slow_queries'):
+        client.get('/tasks?fields=title')
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any('in GET /tasks' in message and 'FROM tasks' in message for message in messages)
+    assert any("params=('tasks',)" in message for message in messages)
+
+
+def test_unknown_methods_share_one_series(client):
+    series = 'http_requests_total{method="other",route="unmatched",status="404"}'
+    before = sample(client.get('/metrics').get_data(as_text=True), series) or 0
+    client.open('/nowhere', method='BREW')
+    client.open('/nowhere', method='PROPFIND')
+
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert 'method="BREW"' not in text and 'method="PROPFIND"' not in text
+    assert sample(text, series) - before == 2
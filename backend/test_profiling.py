@@ -0,0 +1,54 @@
+import pstats
+
+import pytest
+
+from app import profiler
+
+TOKEN = 'test-profile-token'
+
+
+@pytest.fixture
+def profiling(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, 'token', TOKEN)
+    monkeypatch.setattr(profiler.spool, 'root', str(tmp_path))
+    return client
+
+
+def test_requests_are_only_profiled_with_the_admin_token(profiling):
+    profiling.get('/habits')
+    profiling.get('/habits', headers={'X-Profile': 'wrong'})
+
+    assert profiling.get('/profiles').status_code == 403
+    assert profiling.get('/profiles', headers={'X-Profile': TOKEN}).json == []
+
+
+def test_cprofile_capture_is_annotated_and_downloadable(profiling, tmp_path):
+    profiling.post('/add_habit', json={'name': 'Read', 'frequency': 'daily'})
+    profiling.get('/habits', headers={'X-Profile': TOKEN, 'X-Profile-Mode': 'cprofile'})
+
+    [capture] = profiling.get('/profiles', headers={'X-Profile': TOKEN}).json
+    assert capture['mode'] == 'cprofile'
+    assert capture['route'] == '/habits'
+    assert capture['status'] == 200
+    assert capture['queries'] >= 2
+
+    download = profiling.get(f"/profiles/{capture['name']}", headers={'X-Profile': TOKEN})
+    assert download.status_code == 200
+    functions = {name for _file, _line, name in pstats.Stats(str(tmp_path / capture['name'])).stats}
+    assert 'get_habits' in functions
+
+
+def test_sampled_captures_are_collapsed_stacks_and_the_spool_is_bounded(profiling, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, 'sample_rate', 1.0)
+    monkeypatch.setattr(profiler, 'interval', 0.0005)
+    monkeypatch.setattr(profiler.spool, 'max_captures', 3)
+    for _ in range(5):
+        profiling.get('/tasks')
+
+    captures = profiling.get('/profiles', headers={'X-Profile': TOKEN}).json
+    assert len(captures) == 3
+    assert len(list(tmp_path.iterdir())) == 6
+    assert all(capture['mode'] == 'sample' for capture in captures)
+    for line in (tmp_path / captures[0]['name']).read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0 and ';' in stack
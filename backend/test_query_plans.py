@@ -0,0 +1,63 @@
+from datetime import date, datetime
+from sqlalchemy.orm import Session as OrmSession
+from models import Base, BucketList, BucketListStatus, ChangeLog, Habit, HabitCompletion, create_db_engine
+from sqlalchemy import func
+import re
+
+import pytest
+
+
+# The filters used by the habit, bucket-list and sync endpoints
+def hot_queries(session):
+    today = date.today()
+    return {
+        'completion_for_day': session.query(HabitCompletion).filter(
+            HabitCompletion.habit_id == 1,
+            HabitCompletion.completed_date == today
+        ),
+        'completions_since': session.query(HabitCompletion).filter(
+            HabitCompletion.habit_id == 1,
+            HabitCompletion.completed_date >= today
+        ),
+        'completions_by_date': session.query(HabitCompletion).filter(
+            HabitCompletion.habit_id == 1
+        ).order_by(HabitCompletion.completed_date.desc()),
+        'habits_started_by': session.query(Habit).filter(Habit.start_date <= datetime.utcnow()),
+        'bucket_list_by_status': session.query(BucketList).filter(
+            BucketList.status == BucketListStatus.COMPLETED
+        ),
+        'table_version': session.query(func.max(ChangeLog.id)).filter(ChangeLog.table_name == 'tasks'),
+        'changes_since': session.query(ChangeLog).filter(ChangeLog.id > 0).order_by(ChangeLog.id),
+    }
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_db_engine(url=f"sqlite:///{tmp_path / 'plans.db'}")
+    Base.metadata.create_all(engine)
+    with OrmSession(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def query_plan(session, query):
+    compiled = query.statement.compile(session.bind)
+    # Parameter values do not change the plan, only their presence does
+    params = tuple(None for _ in compiled.positiontup)
+    rows = session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).fetchall()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize('name', [
+    'completion_for_day',
+    'completions_since',
+    'completions_by_date',
+    'habits_started_by',
+    'bucket_list_by_status',
+    'table_version',
+    'changes_since',
+])
+def test_hot_query_uses_index(session, name):
+    plan = query_plan(session, hot_queries(session)[name])
+    full_scans = [step for step in plan if re.fullmatch(r'SCAN \w+', step)]
+    assert not full_scans, f'{name} falls back to a full table scan: {plan}'
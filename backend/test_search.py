@@ -0,0 +1,53 @@
+def add_task(client, title, description='', category='work', priority='medium'):
+    client.post('/add', json={'title': title, 'description': description,
+                              'category': category, 'priority': priority})
+
+
+def add_item(client, title, **fields):
+    return client.post('/bucket-list', json=dict({
+        'title': title, 'category': 'personal', 'priority': 'medium'
+    }, **fields)).json['id']
+
+
+def test_search_ranks_title_matches_first_and_marks_snippets(client):
+    add_task(client, 'Email the landlord', 'About the garden fence')
+    add_task(client, 'Fix the garden fence')
+    client.post('/add_habit', json={'name': 'Garden watering', 'frequency': 'daily'})
+
+    results = client.get('/search?q=garden').json['results']
+
+    assert [(hit['type'], hit['title']) for hit in results][-1] == ('task', 'Email the landlord')
+    assert {hit['type'] for hit in results} == {'task', 'habit'}
+    assert '<mark>garden</mark>' in results[-1]['snippet'].lower()
+
+
+def test_search_prefix_matching_and_facets(client):
+    add_task(client, 'Plan vacation', priority='high')
+    add_task(client, 'Plant tomatoes', category='personal', priority='low')
+    add_item(client, 'Plan a trip to Japan', tags=['travel'])
+
+    assert len(client.get('/search?q=pla').json['results']) == 3
+    assert client.get('/search?q=pla&prefix=0').json['results'] == []
+    assert [hit['title'] for hit in client.get('/search?q=pla&priority=low').json['results']] == ['Plant tomatoes']
+    assert [hit['type'] for hit in client.get('/search?q=travel').json['results']] == ['bucket_list']
+    assert client.get('/search?q=plan&priority=urgentish').status_code == 400
+
+
+def test_search_index_follows_updates_and_deletes(client):
+    add_task(client, 'Call the dentist')
+    task_id = client.get('/tasks').json[0]['id']
+
+    client.put(f'/update/{task_id}', json={'title': 'Call the plumber'})
+    assert client.get('/search?q=dentist').json['results'] == []
+    assert client.get('/search?q=plumber').json['results'][0]['id'] == task_id
+
+    client.delete(f'/remove/{task_id}')
+    assert client.get('/search?q=plumber').json['results'] == []
+
+
+def test_bucket_list_search_returns_matching_items(client):
+    add_item(client, 'Run a marathon', motivation='Prove I can')
+    add_item(client, 'Learn Rust', category='work')
+
+    assert [item['title'] for item in client.get('/bucket-list/search?query=prove').json] == ['Run a marathon']
+    assert [item['title'] for item in client.get('/bucket-list/search?category=work').json] == ['Learn Rust']
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import app
+import serializers
+from serializers import TASK, OrjsonProvider
+
+
+def test_orjson_provider_matches_stdlib_output():
+    payload = {'b': [1, 2.5, None, True], 'a': {'nested': 'é'}, 'when': datetime(2024, 5, 1, 12, 30)}
+    with app.app_context():
+        fast = OrjsonProvider(app).dumps(payload)
+        stdlib = DefaultJSONProvider(app).dumps(payload)
+
+    assert json.loads(fast) == json.loads(stdlib)
+    assert list(json.loads(fast)) == ['a', 'b', 'when']
+
+
+def test_compiled_serializer_converts_fields(client):
+    client.post('/add', json={'title': 'Write report', 'category': 'work', 'priority': 'high',
+                              'deadline': '2024-05-01T09:00:00'})
+
+    names = ['title', 'priority', 'deadline']
+    serialize_row, serialize_rows = TASK.serializer(names)
+    row = (1, 'Write report', None, None)
+
+    assert TASK.serializer(names)[0] is serialize_row
+    assert serialize_rows([row]) == [{'title': 'Write report', 'priority': None, 'deadline': None}]
+    assert client.get('/tasks?fields=title,priority,deadline').json == [
+        {'title': 'Write report', 'priority': 'high', 'deadline': '2024-05-01T09:00:00'}
+    ]
+
+
+def test_field_lists_are_canonical_and_compiled_serializers_bounded(client, monkeypatch):
+    client.post('/add', json={'title': 'Write report', 'category': 'work', 'priority': 'high'})
+
+    assert client.get('/tasks?fields=priority,title,title,priority').json == [
+        {'title': 'Write report', 'priority': 'high'}
+    ]
+    assert client.get('/tasks?fields=title,nope,bogus').json == {'error': 'Unknown fields: bogus, nope'}
+
+    monkeypatch.setattr(serializers, 'SERIALIZER_CACHE_SIZE', 4)
+    for end in range(1, len(TASK.fields) + 1):
+        TASK.serializer(list(TASK.fields)[:end])
+    assert len(TASK._compiled) == 4
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from services.lazy import LazyService
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_importing_app_runs_no_ddl_and_defers_the_ai_stack():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'fresh.db')
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', EMBEDDING_INDEX_DIR=os.path.join(tmp, 'index'),
+                   UPLOAD_FOLDER=os.path.join(tmp, 'uploads'))
+        env.pop('AI_SERVICE_WARMUP', None)
+        output = subprocess.run(
+            [sys.executable, '-c', 'import sys, app; print(app.ai_service.loaded, "numpy" in sys.modules)'],
+            env=env, cwd=BACKEND_DIR, check=True, capture_output=True, text=True).stdout
+
+        assert output.split() == ['False', 'False']
+        if os.path.exists(db_path):
+            conn = sqlite3.connect(db_path)
+            assert conn.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+            conn.close()
+
+
+def test_lazy_service_builds_once_under_concurrent_first_use():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'ready': True}
+
+    service = LazyService(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert service.get()['ready'] is True
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from models import Session, ChangeLog
+from sync import current_token, prune_change_log
+
+
+def add_task(client, title):
+    client.post('/add', json={'title': title, 'description': '', 'category': 'work', 'priority': 'low'})
+    return [task for task in client.get('/tasks').json if task['title'] == title][0]['id']
+
+
+def test_sync_returns_only_changes_since_token(client):
+    kept = add_task(client, 'Write report')
+    removed = add_task(client, 'Call plumber')
+    client.post('/bucket-list', json={'title': 'Visit Japan', 'category': 'personal', 'priority': 'high'})
+
+    snapshot = client.get('/sync').json
+    assert snapshot['full']
+    assert [task['id'] for task in snapshot['changes']['tasks']['upserts']] == [kept, removed]
+
+    client.put(f'/update/{kept}', json={'completed': True})
+    client.delete(f'/remove/{removed}')
+    delta = client.get(f"/sync?since={snapshot['token']}").json
+
+    assert not delta['full'] and not delta['more']
+    assert [(task['id'], task['completed']) for task in delta['changes']['tasks']['upserts']] == [(kept, True)]
+    assert delta['changes']['tasks']['tombstones'] == [removed]
+    assert delta['changes']['bucket_lists'] == {'upserts': [], 'tombstones': []}
+
+    again = client.get(f"/sync?since={delta['token']}").json
+    assert again['token'] == delta['token']
+    assert all(change == {'upserts': [], 'tombstones': []} for change in again['changes'].values())
+
+
+def test_list_endpoints_answer_if_none_match_with_304(client):
+    add_task(client, 'Write report')
+    client.post('/add_habit', json={'name': 'Read', 'frequency': 'daily', 'start_date': '2024-01-01'})
+
+    for path in ('/tasks', '/bucket-list', '/habits'):
+        etag = client.get(path).headers['ETag']
+        assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+        # Different query parameters are different representations
+        assert client.get(f'{path}?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+    etag = client.get('/tasks').headers['ETag']
+    add_task(client, 'Call plumber')
+    response = client.get('/tasks', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_pruned_tokens_get_a_full_resync_and_etags_never_repeat(client):
+    kept = add_task(client, 'Write report')
+    client.post('/bucket-list', json={'title': 'Visit Japan', 'category': 'personal', 'priority': 'high'})
+    old_token = client.get('/sync').json['token']
+    bucket_etag = client.get('/bucket-list').headers['ETag']
+    client.put(f'/update/{kept}', json={'completed': True})
+    client.put(f'/update/{kept}', json={'title': 'Write the report'})
+
+    session = Session()
+    newest = current_token(session)
+    assert prune_change_log(session, datetime.utcnow() + timedelta(days=1), batch_size=2) > 0
+    assert [row.id for row in session.query(ChangeLog)] == [newest]
+    assert current_token(session) == newest
+    Session.remove()
+
+    resync = client.get(f'/sync?since={old_token}').json
+    assert resync['full'] and resync['token'] == newest
+    assert [task['id'] for task in resync['changes']['tasks']['upserts']] == [kept]
+    # Every bucket-list change was pruned, but its ETag moves forward, not back to 0
+    assert client.get('/bucket-list', headers={'If-None-Match': bucket_etag}).status_code == 200
+    assert not client.get(f'/sync?since={newest}').json['full']
@@ -0,0 +1,124 @@
+import io
+import multiprocessing
+import random
+
+import pytest
+
+import todo
+from todo import JournaledTasks, load_tasks
+
+
+def test_journal_matches_list_semantics_across_reopens_and_compactions(tmp_path):
+    filename = str(tmp_path / 'tasks.txt')
+    rng = random.Random(7)
+    expected = []
+    store = JournaledTasks(filename, sync_every=5, compact_min=20)
+    for step in range(500):
+        if step % 50 == 0:
+            store.close()
+            store = JournaledTasks(filename, sync_every=5, compact_min=20)
+        # A small vocabulary keeps plenty of duplicates around
+        task = f'task {rng.randrange(30)}'
+        if rng.random() < 0.6:
+            store.append(task)
+            expected.append(task)
+        elif task in expected:
+            store.remove(task)
+            expected.remove(task)
+        assert list(store) == expected
+    store.close()
+
+    assert list(JournaledTasks(filename)) == expected
+    JournaledTasks(filename).compact()
+    assert load_tasks(filename) == expected
+
+
+def test_recovery_drops_torn_record_and_ignores_folded_journal(tmp_path):
+    filename = str(tmp_path / 'tasks.txt')
+    with JournaledTasks(filename) as store:
+        store.extend(['a', 'b'])
+    with open(filename + '.journal', 'ab') as journal:
+        journal.write(b'+half-writ')  # crash in the middle of a record
+
+    with JournaledTasks(filename) as store:
+        assert list(store) == ['a', 'b']
+        store.append('c')
+        with open(filename + '.journal', 'rb') as journal:
+            stale_journal = journal.read()
+        store.compact()
+    # Crash after compaction replaced tasks.txt but before it reset the journal
+    with open(filename + '.journal', 'wb') as journal:
+        journal.write(stale_journal)
+
+    assert list(JournaledTasks(filename)) == ['a', 'b', 'c']
+
+
+def test_multiline_tasks_are_rejected_and_bad_records_are_not_truncated(tmp_path):
+    filename = str(tmp_path / 'tasks.txt')
+    with JournaledTasks(filename) as store:
+        store.append('a')
+        for task in ('b\n-a', 'b\r', 'b\u2028c'):
+            with pytest.raises(ValueError):
+                store.append(task)
+        with pytest.raises(ValueError):
+            store.extend(['b', 'c\nd'])
+        assert list(store) == ['a']
+    with open(filename + '.journal', 'ab') as journal:
+        journal.write(b'?garbage\n+b\n')
+
+    with pytest.raises(ValueError, match='unreadable record'):
+        JournaledTasks(filename)
+    with open(filename + '.journal', 'rb') as journal:
+        assert journal.read().endswith(b'?garbage\n+b\n')
+
+
+def test_instances_sharing_a_list_see_each_others_changes(tmp_path):
+    filename = str(tmp_path / 'tasks.txt')
+    first = JournaledTasks(filename, compact_min=4)
+    second = JournaledTasks(filename, compact_min=4)
+    first.append('a')
+    second.append('b')
+    first.remove('b')
+    second.extend(['c', 'd'])  # compacts, replacing the journal under first
+    first.append('e')
+    second.remove('a')
+
+    assert list(first) == ['a', 'c', 'd', 'e']
+    assert list(second) == ['c', 'd', 'e']
+    first.close()
+    second.close()
+    assert list(JournaledTasks(filename)) == ['c', 'd', 'e']
+
+
+def append_many(filename, prefix):
+    with JournaledTasks(filename, compact_min=50) as store:
+        for i in range(200):
+            store.append(f'{prefix} {i}')
+
+
+@pytest.mark.skipif(todo.fcntl is None, reason='needs flock')
+def test_concurrent_processes_lose_no_tasks(tmp_path):
+    filename = str(tmp_path / 'tasks.txt')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=append_many, args=(filename, prefix)) for prefix in 'abcd']
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(JournaledTasks(filename)) == sorted(f'{prefix} {i}' for prefix in 'abcd' for i in range(200))
+
+
+def test_batch_commands(tmp_path, monkeypatch, capsys):
+    filename = str(tmp_path / 'tasks.txt')
+    monkeypatch.setattr('sys.stdin', io.StringIO('Water plants\n\nPay rent\n'))
+
+    assert todo.main(['--file', filename, 'import']) == 0
+    assert todo.main(['--file', filename, 'add', 'Call mom']) == 0
+    assert todo.main(['--file', filename, 'remove', 'Pay rent', 'Walk dog']) == 1
+    capsys.readouterr()
+    todo.main(['--file', filename, 'list'])
+
+    assert capsys.readouterr().out == 'Tasks:\n1. Water plants\n2. Call mom\n'
+    assert todo.main(['--file', filename, 'compact']) == 0
+    assert load_tasks(filename) == ['Water plants', 'Call mom']
@@ -0,0 +1,82 @@
+from io import BytesIO
+from PIL import Image
+from urllib.parse import urlparse
+import os
+
+
+def png_bytes(size=(800, 600), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def upload(client, data, filename='photo.png'):
+    return client.post('/upload', data={'file': (BytesIO(data), filename)}, content_type='multipart/form-data')
+
+
+def test_upload_dedupes_by_content(client):
+    data = png_bytes()
+    first = upload(client, data).json
+    second = upload(client, data, filename='copy.png').json
+    other = upload(client, png_bytes(color=(0, 0, 255)), filename='photo.png').json
+
+    assert first['filename'] == second['filename'] == f"{first['sha256']}.png"
+    assert not first['duplicate'] and second['duplicate']
+    assert other['filename'] != first['filename']
+    assert client.get(f"/uploads/{first['filename']}").data == data
+
+
+def test_upload_renditions_are_small_webp(client):
+    from app import upload_store
+
+    response = client.post('/upload', data=png_bytes((2000, 1000)), content_type='image/png').json
+    upload_store.wait()
+
+    thumb = client.get(urlparse(response['renditions']['thumb']).path)
+    image = Image.open(BytesIO(thumb.data))
+    assert image.format == 'WEBP'
+    assert max(image.size) == 256
+
+
+def test_missing_rendition_is_rendered_on_demand(client):
+    from app import upload_store
+
+    response = upload(client, png_bytes()).json
+    upload_store.wait()
+    thumb_name = f"{response['sha256']}_thumb.webp"
+    os.remove(upload_store.path(thumb_name))
+
+    assert client.get(f'/uploads/{thumb_name}').status_code == 200
+
+
+def test_upload_rejects_non_images(client):
+    assert upload(client, b'not really a png').status_code == 400
+    assert upload(client, png_bytes(), filename='notes.txt').status_code == 400
+
+
+def test_content_addressed_files_are_immutable_and_revalidate(client):
+    data = png_bytes()
+    url = f"/uploads/{upload(client, data).json['filename']}"
+
+    response = client.get(url)
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+
+    partial = client.get(url, headers={'Range': 'bytes=0-7'})
+    assert partial.status_code == 206
+    assert partial.data == data[:8]
+
+
+def test_nginx_accel_redirect(client, monkeypatch):
+    import app
+
+    filename = upload(client, png_bytes()).json['filename']
+    monkeypatch.setattr(app, 'UPLOAD_ACCEL', 'nginx')
+
+    response = client.get(f'/uploads/{filename}')
+    assert response.headers['X-Accel-Redirect'] == f'/protected-uploads/{filename}'
+    assert response.data == b''
+    assert client.get(f'/uploads/{filename}', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -1,4 +1,35 @@
 # to_do_list.py
+"""A todo list kept in a text file, one task per line.
+
+    python todo.py                          # interactive
+    python todo.py add "Buy milk" "Call mom"
+    python todo.py remove "Buy milk"
+    python todo.py list
+    python todo.py import < more_tasks.txt  # one task per line
+    python todo.py compact
+
+By default every change is appended to an operation journal next to the list
+(tasks.txt.journal) as it happens, and the journal is folded back into
+tasks.txt once it outgrows the list, so a crash loses at most the last unsynced
+changes. ``--storage text`` keeps the original behaviour: load the whole file,
+rewrite it on quit. It does not read the journal, so run ``compact`` first.
+"""
+from collections import deque
+from contextlib import contextmanager
+import argparse
+import locale
+import os
+import sys
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: nothing stops two processes sharing one list
+    fcntl = None
+
+# tasks.txt is read and written with open()'s default encoding, as it always was
+ENCODING = locale.getpreferredencoding(False)
+
 
 def load_tasks(filename="tasks.txt"):
     """Load tasks from a file."""
@@ -15,18 +46,308 @@ def save_tasks(tasks, filename="tasks.txt"):
         for task in tasks:
             file.write(task + "\n")
 
+def write_atomically(filename, data):
+    """Replace ``filename`` with ``data`` so a crash leaves the old or the new file, never half of one."""
+    temp = filename + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, filename)
+    try:
+        directory = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        return  # Windows cannot open directories; the rename is durable there
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+def journal_header(snapshot):
+    # Ties a journal to the exact snapshot it applies to
+    return b"#todo-journal %08x %d\n" % (zlib.crc32(snapshot), len(snapshot))
+
+def check_task(task):
+    """Raise ValueError unless ``task`` stays one line in tasks.txt and one journal record."""
+    if task and task.splitlines() != [task]:
+        raise ValueError(f"task must fit on one line: {task!r}")
+
+
+class JournaledTasks:
+    """The task list as a snapshot file plus an append-only operation journal.
+
+    Acts like the list ``load_tasks`` returns (append, extend, remove,
+    iteration, len), so add_task, remove_task and display_tasks work on either.
+    Removed tasks leave a None in the list instead of shifting it, and a hash
+    index from text to positions, built on the first removal, makes
+    ``remove`` O(1) while still dropping the first occurrence like
+    ``list.remove``. Opening costs the same as ``load_tasks`` plus the replay.
+
+    Each change is written to the journal as one ``+task`` or ``-task`` line and
+    handed to the OS immediately, which survives the process crashing. The
+    journal is fsynced every ``sync_every`` records and on ``close``, which
+    bounds what a power loss can take. Once the journal holds more records
+    than the list has tasks (and at least ``compact_min``), ``compact``
+    rewrites tasks.txt and starts a new journal.
+
+    The journal's header records the checksum of the snapshot it was started
+    against. A journal whose header does not match tasks.txt was already
+    folded in by a compaction that crashed before it could reset the journal,
+    so it is discarded. A torn final record from a crash mid-write is dropped;
+    any other unreadable record raises ValueError instead of silently losing
+    everything after it. Tasks containing line breaks are rejected up front.
+
+    Several processes can share one list: opening, every change and
+    ``compact`` hold an exclusive lock on tasks.txt.lock, and each change
+    first replays whatever other processes appended since, or reloads
+    everything if one of them compacted.
+    """
+
+    def __init__(self, filename="tasks.txt", sync_every=64, compact_min=10000):
+        self.filename = filename
+        self.journal_name = filename + ".journal"
+        self.sync_every = sync_every
+        self.compact_min = compact_min
+        self._unsynced = 0
+        self._journal = None
+        self._lock_file = open(filename + ".lock", "ab")
+        with self._locked():
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        if fcntl:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        if self._journal is not None:
+            self._journal.close()
+        try:
+            with open(self.filename, "rb") as file:
+                snapshot = file.read()
+        except FileNotFoundError:
+            snapshot = b""
+        self.tasks = snapshot.decode(ENCODING).splitlines()
+        self.live = len(self.tasks)
+        self.index = None
+        self.records = 0
+        self._header = journal_header(snapshot)
+        self._replay()
+
+    def _catch_up(self):
+        # Compaction swaps in a new journal file, so a different inode means
+        # another process folded everything, ours included, into tasks.txt
+        try:
+            current = os.stat(self.journal_name)
+        except FileNotFoundError:
+            current = None
+        if current is None or current.st_ino != os.fstat(self._journal.fileno()).st_ino:
+            self._load()
+        elif current.st_size > self._offset:
+            self._replay(self._offset)
+
+    def _build_index(self):
+        tasks = self.tasks
+        # Walking backwards leaves each text mapped to its first occurrence
+        self.index = dict(zip(reversed(tasks), range(len(tasks) - 1, -1, -1)))
+        self.index.pop(None, None)
+        if len(self.index) != self.live:
+            self.index = {}
+            for task_id, task in enumerate(tasks):
+                if task is not None:
+                    self._index(task, task_id)
+
+    def _index(self, task, task_id):
+        # A single id for unique tasks; a deque only for duplicated ones
+        ids = self.index.get(task)
+        if ids is None:
+            self.index[task] = task_id
+        elif isinstance(ids, int):
+            self.index[task] = deque((ids, task_id))
+        else:
+            ids.append(task_id)
+
+    def _add(self, task):
+        self.tasks.append(task)
+        self.live += 1
+        if self.index is not None:
+            self._index(task, len(self.tasks) - 1)
+
+    def _discard(self, task):
+        if self.index is None:
+            self._build_index()
+        ids = self.index.get(task)
+        if ids is None:
+            return False
+        if isinstance(ids, int):
+            del self.index[task]
+            task_id = ids
+        else:
+            task_id = ids.popleft()
+            if len(ids) == 1:
+                self.index[task] = ids[0]
+        self.tasks[task_id] = None
+        self.live -= 1
+        return True
+
+    def _replay(self, offset=0):
+        """Apply the journal from byte ``offset``; 0 opens it, checking the header."""
+        try:
+            with open(self.journal_name, "rb") as file:
+                file.seek(offset)
+                journal = file.read()
+        except FileNotFoundError:
+            journal = b""
+        end = 0
+        if not offset:
+            if not journal.startswith(self._header):
+                self._start_journal()
+                return
+            end = len(self._header)
+
+        while True:
+            newline = journal.find(b"\n", end)
+            if newline == -1:
+                break
+            record = journal[end:newline]
+            try:
+                task = record[1:].decode("utf-8")
+            except UnicodeDecodeError:
+                task = None
+            if task is not None and record[:1] == b"+":
+                self._add(task)
+            elif task is not None and record[:1] == b"-":
+                self._discard(task)
+            else:
+                # Only the final write can be torn, and it has no newline yet
+                raise ValueError(f"{self.journal_name}: unreadable record at byte {offset + end}")
+            self.records += 1
+            end = newline + 1
+
+        if end < len(journal):
+            # Drop the torn tail so new records do not get glued onto it
+            os.truncate(self.journal_name, offset + end)
+        self._offset = offset + end
+        if not offset:
+            self._journal = open(self.journal_name, "ab")
+
+    def _start_journal(self):
+        write_atomically(self.journal_name, self._header)
+        self._journal = open(self.journal_name, "ab")
+        self._offset = len(self._header)
+        self.records = 0
+        self._unsynced = 0
+
+    def _log(self, data, count):
+        # Called with the lock held, after _catch_up and the in-memory change
+        self._journal.write(data)
+        self._journal.flush()
+        self._offset += len(data)
+        self.records += count
+        self._unsynced += count
+        if self._unsynced >= self.sync_every:
+            self.sync()
+        if self.records >= max(self.compact_min, self.live):
+            self._compact()
+
+    def append(self, task):
+        check_task(task)
+        with self._locked():
+            self._catch_up()
+            self._add(task)
+            self._log(b"+" + task.encode("utf-8") + b"\n", 1)
+
+    def extend(self, tasks):
+        """Add many tasks with one journal write."""
+        tasks = list(tasks)
+        for task in tasks:
+            check_task(task)
+        with self._locked():
+            self._catch_up()
+            for task in tasks:
+                self._add(task)
+            self._log(b"".join(b"+" + task.encode("utf-8") + b"\n" for task in tasks), len(tasks))
+
+    def remove(self, task):
+        """Remove the first occurrence of ``task``; ValueError if there is none."""
+        with self._locked():
+            self._catch_up()
+            if not self._discard(task):
+                raise ValueError(task)
+            self._log(b"-" + task.encode("utf-8") + b"\n", 1)
+
+    def __contains__(self, task):
+        if self.index is None:
+            self._build_index()
+        return task in self.index
+
+    def __iter__(self):
+        return (task for task in self.tasks if task is not None)
+
+    def __len__(self):
+        return self.live
+
+    def sync(self):
+        """Make every journaled change durable."""
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def compact(self):
+        """Rewrite tasks.txt and start an empty journal."""
+        with self._locked():
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        self.tasks = list(self)
+        self.index = None
+        snapshot = "".join(task + "\n" for task in self.tasks).encode(ENCODING)
+        self.sync()
+        write_atomically(self.filename, snapshot)
+        # The old journal's header no longer matches, so a crash from here on
+        # leaves it ignored rather than replayed twice
+        self._journal.close()
+        self._header = journal_header(snapshot)
+        self._start_journal()
+
+    def close(self):
+        self.sync()
+        self._journal.close()
+        self._lock_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def add_task(tasks, task):
     """Add a task to the list."""
-    tasks.append(task)
-    print(f"Added task: {task}")
+    try:
+        check_task(task)
+        tasks.append(task)
+        print(f"Added task: {task}")
+        return True
+    except ValueError as error:
+        print(f"Cannot add task: {error}")
+        return False
 
 def remove_task(tasks, task):
     """Remove a task from the list."""
     try:
         tasks.remove(task)
         print(f"Removed task: {task}")
+        return True
     except ValueError:
         print(f"Task not found: {task}")
+        return False
 
 def display_tasks(tasks):
     """Display all tasks."""
@@ -37,11 +358,13 @@ def display_tasks(tasks):
         for i, task in enumerate(tasks, 1):
             print(f"{i}. {task}")
 
-def main():
-    tasks = load_tasks()
+def interactive(tasks):
     while True:
         print("\nOptions: add, remove, display, quit")
-        choice = input("Enter your choice: ").strip().lower()
+        try:
+            choice = input("Enter your choice: ").strip().lower()
+        except EOFError:
+            choice = "quit"
 
         if choice == "add":
             task = input("Enter a task: ").strip()
@@ -52,11 +375,60 @@ def main():
         elif choice == "display":
             display_tasks(tasks)
         elif choice == "quit":
-            save_tasks(tasks)
             print("Goodbye!")
             break
         else:
             print("Invalid choice. Please try again.")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a todo list in a text file.")
+    parser.add_argument("--file", default="tasks.txt")
+    parser.add_argument("--storage", choices=("journal", "text"), default="journal",
+                        help="journal: log each change as it happens (default); text: rewrite the file on exit")
+    commands = parser.add_subparsers(dest="command", metavar="command",
+                                     help="add, remove, list, import or compact; none for interactive mode")
+    commands.add_parser("add", help="add tasks").add_argument("tasks", nargs="+")
+    commands.add_parser("remove", help="remove tasks").add_argument("tasks", nargs="+")
+    commands.add_parser("list", help="print every task")
+    commands.add_parser("import", help="add one task per line read from stdin")
+    commands.add_parser("compact", help="fold the journal into the task file")
+    args = parser.parse_args(argv)
+
+    if args.storage == "journal":
+        # A person at the prompt gets every change synced; batch commands sync once at the end
+        tasks = JournaledTasks(args.file, sync_every=1 if args.command is None else 64)
+    else:
+        tasks = load_tasks(args.file)
+
+    status = 0
+    if args.command is None:
+        interactive(tasks)
+    elif args.command == "add":
+        if not all([add_task(tasks, task) for task in args.tasks]):
+            status = 1
+    elif args.command == "remove":
+        if not all([remove_task(tasks, task) for task in args.tasks]):
+            status = 1
+    elif args.command == "list":
+        display_tasks(tasks)
+    elif args.command == "import":
+        imported = [line.strip() for line in sys.stdin if line.strip()]
+        try:
+            for task in imported:
+                check_task(task)
+            tasks.extend(imported)
+            print(f"Imported {len(imported)} tasks.")
+        except ValueError as error:
+            print(f"Nothing imported: {error}")
+            status = 1
+    elif args.command == "compact" and args.storage == "journal":
+        tasks.compact()
+
+    if args.storage == "journal":
+        tasks.close()
+    elif args.command != "list":
+        save_tasks(tasks, args.file)
+    return status
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())